@@ -0,0 +1,297 @@
+"""Mide la contención de la cuenta bancaria con distintos diseños de sincronización.
+
+A diferencia de CuentaBancaria.py, aquí no hay sleep ni print dentro de la
+sección crítica: cada hilo (o proceso) hace ingresos, retiros y consultas
+tan rápido como puede durante --duracion segundos. Diseños comparados:
+  - rlock:       un threading.RLock para todo, como CuentaBancaria,
+  - lock:        un Lock simple (no reentrante, más barato),
+  - fragmentado: el saldo se reparte en un fragmento por trabajador, cada uno
+                 con su propio Lock; ingresos y retiros usan el fragmento
+                 propio y un retiro sin fondos trae lo que falta de los demás,
+  - cola:        un único escritor aplica las operaciones que le llegan por una cola.
+
+Todos los diseños guardan los saldos igual: con hilos, en atributos normales
+(como CuentaBancaria); con procesos, en multiprocessing.RawValue.
+
+Se informa de operaciones por segundo y del tiempo medio esperando un
+cerrojo (o una plaza en la cola) por operación. Al final se comprueba que
+saldo = ingresado - retirado.
+
+Uso:
+    python benchmark-cuenta-bancaria.py --hilos 1 2 4 8 16 --procesos 1 2 4 --duracion 1
+"""
+import argparse
+import multiprocessing
+import queue
+import random
+import threading
+import time
+
+# Plazas de la cola del diseño con un único escritor
+LIMITE_COLA = 1024
+
+class Valor:
+    """Entero en un atributo normal con la misma interfaz (.value) que multiprocessing.RawValue"""
+    def __init__(self):
+        self.value = 0
+
+def crear_valor(procesos):
+    """Entero para un saldo: RawValue compartido entre procesos, un atributo normal entre hilos"""
+    return multiprocessing.RawValue("q", 0) if procesos else Valor()
+
+def adquirir(cerrojo, medicion):
+    """Toma un cerrojo sumando la espera a la medición"""
+    inicio = time.perf_counter()
+    cerrojo.acquire()
+    medicion.espera += time.perf_counter() - inicio
+
+class CuentaCerrojo:
+    """Saldo protegido por un único cerrojo (RLock o Lock)"""
+    def __init__(self, cerrojo, procesos):
+        self.saldo = crear_valor(procesos)
+        self.retirado = crear_valor(procesos)
+        self.lock = cerrojo
+
+    def cliente(self, numero):
+        """Objeto con el que opera el trabajador 'numero' (aquí, la propia cuenta)"""
+        return self
+
+    def ingresar(self, cantidad, medicion):
+        adquirir(self.lock, medicion)
+        try:
+            self.saldo.value += cantidad
+        finally:
+            self.lock.release()
+
+    def retirar(self, cantidad, medicion):
+        adquirir(self.lock, medicion)
+        try:
+            if self.saldo.value >= cantidad:
+                self.saldo.value -= cantidad
+                self.retirado.value += cantidad
+        finally:
+            self.lock.release()
+
+    def consultar_saldo(self, medicion):
+        adquirir(self.lock, medicion)
+        try:
+            return self.saldo.value
+        finally:
+            self.lock.release()
+
+    def saldo_total(self):
+        """(saldo, retirado) al terminar la medición"""
+        return self.saldo.value, self.retirado.value
+
+class Fragmento:
+    """Parte del saldo de una CuentaFragmentada con su propio cerrojo"""
+    def __init__(self, cerrojo, procesos):
+        self.saldo = crear_valor(procesos)
+        self.retirado = crear_valor(procesos)
+        self.lock = cerrojo
+
+    def ingresar(self, cantidad, medicion):
+        adquirir(self.lock, medicion)
+        try:
+            self.saldo.value += cantidad
+        finally:
+            self.lock.release()
+
+    def retirar(self, cantidad, medicion):
+        """Retira si el fragmento tiene fondos; devuelve lo que le falta (0 si ha retirado)"""
+        adquirir(self.lock, medicion)
+        try:
+            if self.saldo.value >= cantidad:
+                self.saldo.value -= cantidad
+                self.retirado.value += cantidad
+                return 0
+            return cantidad - self.saldo.value
+        finally:
+            self.lock.release()
+
+    def sacar(self, cantidad, medicion):
+        """Quita hasta 'cantidad' del saldo para traspasarla a otro fragmento; devuelve lo quitado"""
+        adquirir(self.lock, medicion)
+        try:
+            quitado = min(cantidad, self.saldo.value)
+            self.saldo.value -= quitado
+            return quitado
+        finally:
+            self.lock.release()
+
+class ClienteFragmentado:
+    """Vista de un trabajador sobre una CuentaFragmentada: opera en su fragmento y reequilibra al retirar"""
+    def __init__(self, cuenta, numero):
+        self.cuenta = cuenta
+        self.propio = cuenta.fragmentos[numero % len(cuenta.fragmentos)]
+        self.otros = [fragmento for fragmento in cuenta.fragmentos if fragmento is not self.propio]
+
+    def ingresar(self, cantidad, medicion):
+        self.propio.ingresar(cantidad, medicion)
+
+    def retirar(self, cantidad, medicion):
+        faltante = self.propio.retirar(cantidad, medicion)
+        if not faltante:
+            return
+        # Reequilibrar: traer lo que falta de los demás fragmentos, tomando un solo cerrojo
+        # cada vez para no poder bloquearse con otro trabajador que haga lo mismo
+        traido = 0
+        for fragmento in self.otros:
+            traido += fragmento.sacar(faltante - traido, medicion)
+            if traido == faltante:
+                break
+        if traido:
+            self.propio.ingresar(traido, medicion)
+        if traido == faltante:
+            # Otro trabajador puede haber retirado del fragmento propio entretanto: no se reintenta
+            self.propio.retirar(cantidad, medicion)
+
+    def consultar_saldo(self, medicion):
+        # Sin cerrojos: no incluye lo que esté a medio traspasar entre fragmentos
+        return sum(fragmento.saldo.value for fragmento in self.cuenta.fragmentos)
+
+class CuentaFragmentada:
+    """Saldo repartido en un Fragmento por trabajador, cada uno con su propio cerrojo"""
+    def __init__(self, modulo, procesos, fragmentos):
+        self.fragmentos = [Fragmento(modulo.Lock(), procesos) for _ in range(fragmentos)]
+
+    def cliente(self, numero):
+        return ClienteFragmentado(self, numero)
+
+    def saldo_total(self):
+        return (sum(fragmento.saldo.value for fragmento in self.fragmentos),
+                sum(fragmento.retirado.value for fragmento in self.fragmentos))
+
+class CuentaCola:
+    """Un único escritor aplica ingresos y retiros recibidos por una cola; las consultas leen sin cerrojo"""
+    def __init__(self, cola, procesos):
+        self.saldo = crear_valor(procesos)
+        self.retirado = crear_valor(procesos)
+        self.cola = cola
+
+    def cliente(self, numero):
+        return self
+
+    def escritor(self):
+        """Bucle del escritor: aplica operaciones hasta recibir None"""
+        while True:
+            operacion = self.cola.get()
+            if operacion is None:
+                return
+            cantidad = operacion
+            if cantidad >= 0:
+                self.saldo.value += cantidad
+            elif self.saldo.value >= -cantidad:
+                self.saldo.value += cantidad
+                self.retirado.value -= cantidad
+
+    def encolar(self, operacion, medicion):
+        inicio = time.perf_counter()
+        self.cola.put(operacion)
+        medicion.espera += time.perf_counter() - inicio
+
+    def ingresar(self, cantidad, medicion):
+        self.encolar(cantidad, medicion)
+
+    def retirar(self, cantidad, medicion):
+        self.encolar(-cantidad, medicion)
+
+    def consultar_saldo(self, medicion):
+        return self.saldo.value
+
+    def saldo_total(self):
+        return self.saldo.value, self.retirado.value
+
+class Medicion:
+    """Resultado de un trabajador"""
+    def __init__(self):
+        self.operaciones = 0
+        self.espera = 0.0  # Segundos esperando un cerrojo o sitio en la cola
+        self.ingresado = 0
+
+def trabajar(cuenta, numero, duracion, consultas, barrera, resultados):
+    """Cuerpo de un hilo o proceso: operaciones al azar hasta agotar la duración"""
+    aleatorio = random.Random(numero)
+    cliente = cuenta.cliente(numero)
+    medicion = Medicion()
+    barrera.wait()
+    limite = time.perf_counter() + duracion
+    while time.perf_counter() < limite:
+        # Comprobar el reloj cada 64 operaciones para que no domine la medida
+        for _ in range(64):
+            eleccion = aleatorio.random()
+            if eleccion < consultas:
+                cliente.consultar_saldo(medicion)
+            elif eleccion < (1 + consultas) / 2:
+                cantidad = aleatorio.randint(100, 1000)
+                cliente.ingresar(cantidad, medicion)
+                medicion.ingresado += cantidad
+            else:
+                cliente.retirar(aleatorio.randint(50, 800), medicion)
+        medicion.operaciones += 64
+    resultados.put((medicion.operaciones, medicion.espera, medicion.ingresado))
+
+def crear_cuenta(diseno, procesos, trabajadores):
+    """Cuenta del diseño pedido con primitivas de hilos o de procesos"""
+    modulo = multiprocessing if procesos else threading
+    if diseno == "rlock":
+        return CuentaCerrojo(modulo.RLock(), procesos)
+    if diseno == "lock":
+        return CuentaCerrojo(modulo.Lock(), procesos)
+    if diseno == "fragmentado":
+        return CuentaFragmentada(modulo, procesos, trabajadores)
+    cola = multiprocessing.Queue(LIMITE_COLA) if procesos else queue.Queue(LIMITE_COLA)
+    return CuentaCola(cola, procesos)
+
+def medir(diseno, trabajadores, procesos, argumentos):
+    """(operaciones/s, espera media por operación en us) de un diseño con N hilos o procesos"""
+    cuenta = crear_cuenta(diseno, procesos, trabajadores)
+    if procesos:
+        crear, barrera, resultados = multiprocessing.Process, multiprocessing.Barrier(trabajadores), multiprocessing.Queue()
+    else:
+        crear, barrera, resultados = threading.Thread, threading.Barrier(trabajadores), queue.Queue()
+
+    escritor = None
+    if diseno == "cola":
+        escritor = crear(target=cuenta.escritor)
+        escritor.start()
+
+    hilos = [crear(target=trabajar, args=(cuenta, numero, argumentos.duracion, argumentos.consultas,
+                                           barrera, resultados))
+             for numero in range(trabajadores)]
+    for hilo in hilos:
+        hilo.start()
+    mediciones = [resultados.get() for _ in hilos]
+    for hilo in hilos:
+        hilo.join()
+    if escritor is not None:
+        cuenta.cola.put(None)
+        escritor.join()
+
+    operaciones = sum(m[0] for m in mediciones)
+    espera = sum(m[1] for m in mediciones)
+    ingresado = sum(m[2] for m in mediciones)
+    saldo, retirado = cuenta.saldo_total()
+    assert saldo == ingresado - retirado, f"{diseno}: saldo inconsistente"
+    return operaciones / argumentos.duracion, espera / operaciones * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, nargs="*", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--procesos", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--disenos", nargs="+", choices=["rlock", "lock", "fragmentado", "cola"],
+                        default=["rlock", "lock", "fragmentado", "cola"])
+    parser.add_argument("--consultas", type=float, default=0.1, help="Proporción de consultas de saldo")
+    parser.add_argument("--duracion", type=float, default=1.0, help="Segundos por medición")
+    argumentos = parser.parse_args()
+
+    print(f"{'modo':>9} {'N':>4} {'diseno':>12} {'op/s':>12} {'espera(us/op)':>14}")
+    for procesos, cantidades in ((False, argumentos.hilos), (True, argumentos.procesos)):
+        for trabajadores in cantidades:
+            for diseno in argumentos.disenos:
+                por_segundo, espera = medir(diseno, trabajadores, procesos, argumentos)
+                print(f"{'procesos' if procesos else 'hilos':>9} {trabajadores:>4} {diseno:>12} "
+                      f"{por_segundo:>12.0f} {espera:>14.2f}")
+
+if __name__ == "__main__":
+    main()
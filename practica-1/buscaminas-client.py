@@ -14,7 +14,12 @@ class BuscaminasCliente:
         self.puerto_servidor = 0
         self.juego_terminado = False
         self.dificultad = ""
-        self.buffer = ""  # Buffer para almacenar datos recibidos
+        # Buffer de recepción reutilizable: recv_into escribe en él y inicio/fin
+        # delimitan los bytes pendientes, así que extraer un mensaje no copia el resto
+        self.buffer = bytearray(4096)
+        self.vista = memoryview(self.buffer)
+        self.inicio = 0  # Primer byte sin consumir
+        self.fin = 0     # Final de los datos recibidos
         self.procesar_multiples_respuestas = False  # Flag para controlar el procesamiento de múltiples respuestas
 
     def conectar_servidor(self):
@@ -53,6 +58,11 @@ class BuscaminasCliente:
                 
                 print(f"Juego configurado con dificultad: {self.dificultad}")
                 print(f"Tablero de {self.filas}x{self.columnas}")
+                
+                # Pedir la cascada en un único mensaje y sólo las minas al perder si el servidor lo admite
+                capacidades = [c for c in ("casillas_libres", "minas") if c in mensaje.get("capacidades", [])]
+                if capacidades:
+                    self.enviar_mensaje({"tipo": "protocolo", "capacidades": capacidades})
                 return True
             else:
                 print("Error: No se recibió configuración inicial")
@@ -64,7 +74,7 @@ class BuscaminasCliente:
     def enviar_mensaje(self, mensaje):
         """Envía un mensaje al servidor en formato JSON"""
         try:
-            mensaje_json = json.dumps(mensaje)
+            mensaje_json = json.dumps(mensaje) + '\n'  # Añadir delimitador
             self.cliente_socket.sendall(mensaje_json.encode('utf-8'))
             return True
         except Exception as e:
@@ -74,31 +84,52 @@ class BuscaminasCliente:
     def recibir_mensaje(self):
         """Recibe un mensaje del servidor en formato JSON"""
         try:
-            # Si el buffer ya tiene un mensaje completo, extraerlo
-            if '\n' in self.buffer:
-                mensaje_json, self.buffer = self.buffer.split('\n', 1)
-                return json.loads(mensaje_json)
-            
-            # Si no hay mensaje completo, recibir más datos
-            while '\n' not in self.buffer:
-                datos = self.cliente_socket.recv(4096).decode('utf-8')
-                if not datos:
-                    raise Exception("Conexión cerrada por el servidor")
-                self.buffer += datos
+            # Devuelve un mensaje ya recibido o espera (recv_into) hasta completar uno
+            posicion = self.buffer.find(b'\n', self.inicio, self.fin)
+            while posicion < 0:
+                revisados = self.fin - self.inicio  # No volver a buscar en lo ya revisado
+                self.recibir_datos()
+                posicion = self.buffer.find(b'\n', self.inicio + revisados, self.fin)
             
-            # Extraer un mensaje completo
-            mensaje_json, self.buffer = self.buffer.split('\n', 1)
-            return json.loads(mensaje_json)
+            linea = bytes(self.vista[self.inicio:posicion])  # Sólo se copia el propio mensaje
+            self.inicio = posicion + 1
+            return json.loads(linea)
                 
         except json.JSONDecodeError as e:
             print(f"Error al decodificar JSON: {e}")
-            print(f"Datos recibidos: {self.buffer}")
-            self.buffer = ""  # Limpiar buffer en caso de error
+            print(f"Bytes pendientes en el buffer: {self.fin - self.inicio}")
+            self.inicio = self.fin = 0  # Limpiar buffer en caso de error
             raise
         except Exception as e:
             print(f"Error al recibir mensaje: {e}")
             raise
 
+    def recibir_datos(self):
+        """Lee del socket con recv_into en el espacio libre del buffer"""
+        pendientes = self.fin - self.inicio
+        if pendientes == 0:
+            self.inicio = self.fin = 0
+        if len(self.buffer) - self.fin < 1024:
+            if pendientes + 1024 > len(self.buffer):
+                # No cabe ni moviendo los pendientes al principio: crecer al doble
+                nuevo = bytearray(2 * (pendientes + 1024))
+                nuevo[:pendientes] = self.vista[self.inicio:self.fin]
+                self.buffer = nuevo
+                self.vista = memoryview(nuevo)
+            else:
+                # Mover los pendientes al principio: una copia por vuelta del buffer, no por mensaje
+                self.vista[:pendientes] = self.vista[self.inicio:self.fin]
+            self.inicio, self.fin = 0, pendientes
+        
+        leidos = self.cliente_socket.recv_into(self.vista[self.fin:])
+        if not leidos:
+            raise Exception("Conexión cerrada por el servidor")
+        self.fin += leidos
+
+    def mensaje_pendiente(self):
+        """Indica si el buffer ya tiene otro mensaje completo"""
+        return self.buffer.find(b'\n', self.inicio, self.fin) >= 0
+
     def imprimir_tablero(self):
         """Imprime el estado actual del tablero"""
         # Limpiar pantalla
@@ -211,15 +242,31 @@ class BuscaminasCliente:
                     
                     # Solo seguir procesando respuestas para la casilla actual y sus adyacentes
                     # Si hay más mensajes en el buffer, procesarlos
-                    if '\n' not in self.buffer:
+                    if not self.mensaje_pendiente():
+                        self.procesar_multiples_respuestas = False
+                    
+                elif mensaje["estado"] == "casillas_libres":
+                    # Toda la cascada llega en un solo mensaje: actualizar e imprimir una vez
+                    for fila, columna, valor in mensaje["casillas"]:
+                        self.tablero[fila][columna] = str(valor) if valor > 0 else ' '
+                    
+                    self.imprimir_tablero()
+                    
+                    # Si hay más mensajes en el buffer (p. ej. el de fin), procesarlos
+                    if not self.mensaje_pendiente():
                         self.procesar_multiples_respuestas = False
                     
                 elif mensaje["estado"] == "mina_pisada":
                     # El jugador ha perdido, actualizar tablero con todas las minas
-                    for i in range(self.filas):
-                        for j in range(self.columnas):
-                            if mensaje["tablero"][i][j] == '*':
-                                self.tablero[i][j] = '*'
+                    if "minas" in mensaje:
+                        # Con la capacidad "minas" sólo llegan sus coordenadas
+                        for i, j in mensaje["minas"]:
+                            self.tablero[i][j] = '*'
+                    else:
+                        for i in range(self.filas):
+                            for j in range(self.columnas):
+                                if mensaje["tablero"][i][j] == '*':
+                                    self.tablero[i][j] = '*'
                     
                     self.imprimir_tablero()
                     print(mensaje["mensaje"])
@@ -2,16 +2,28 @@ import socket
 import random
 import time
 import json
+import sys
+from collections import deque
 from datetime import datetime
 
+from buscaminas_metricas import MetricasServidor
+
+# Tamaño máximo de cada lado del tablero personalizado
+LIMITE_DIMENSION = 1000
+
+# Extensiones del protocolo que el cliente puede activar con un mensaje "protocolo".
+# "minas": al pisar una mina se envían sólo sus coordenadas y no el tablero visible
+CAPACIDADES_SERVIDOR = ("casillas_libres", "minas")
+
 class BuscaminasServidor:
-    def __init__(self):
+    def __init__(self, semilla=None):
         self.tablero = []
         self.tablero_visible = []  # Lo que el cliente puede ver
         self.filas = 0
         self.columnas = 0
         self.minas = 0
-        self.casillas_destapadas = 0
+        self.posiciones_minas = []  # [fila, columna] de cada mina, fijadas al generar el tablero
+        self.casillas_restantes = 0  # Casillas libres sin destapar: 0 = victoria
         self.tiempo_inicio = 0
         self.tiempo_fin = 0
         self.servidor_socket = None
@@ -20,6 +32,11 @@ class BuscaminasServidor:
         self.ip = ""
         self.puerto = 0
         self.juego_terminado = False
+        self.buffer = b""  # Bytes recibidos sin procesar: se decodifican por líneas completas
+        self.capacidades = set()  # Extensiones negociadas con el cliente
+        self.semilla = semilla  # Semilla fija para repetir el mismo tablero (None = aleatorio)
+        self.metricas = MetricasServidor()  # Latencias por etapa y mensajes por tipo
+        self.instante_recepcion = 0.0  # perf_counter() en que el mensaje en curso estaba en el buffer
 
     def configurar_servidor(self):
         """Configura los parámetros del servidor y la dificultad del juego"""
@@ -29,21 +46,55 @@ class BuscaminasServidor:
         print("\nSeleccione la dificultad:")
         print("1. Principiante (9x9 tablero con 10 minas)")
         print("2. Avanzado (16x16 tablero con 40 minas)")
-        opcion = input("Opción (1-2): ")
+        print(f"3. Personalizado (hasta {LIMITE_DIMENSION}x{LIMITE_DIMENSION})")
+        opcion = input("Opción (1-3): ")
         
         if opcion == "1":
             self.dificultad = "principiante"
             self.filas = 9
             self.columnas = 9
             self.minas = 10
+        elif opcion == "3":
+            self.dificultad = "personalizado"
+            self.filas, self.columnas, self.minas = self.pedir_dimensiones()
         else:
             self.dificultad = "avanzado"
             self.filas = 16
             self.columnas = 16
             self.minas = 40
             
+        self.semilla = self.pedir_semilla()
         print(f"Servidor configurado con dificultad: {self.dificultad}")
 
+    def pedir_semilla(self):
+        """Pide una semilla opcional para repetir el mismo tablero (vacío = aleatorio)"""
+        while True:
+            texto = input("Semilla del tablero (vacío = aleatorio): ").strip()
+            if not texto:
+                return None
+            try:
+                return int(texto)
+            except ValueError:
+                print("Entrada inválida. Ingrese un número.")
+
+    def pedir_dimensiones(self):
+        """Pide filas, columnas y minas hasta que sean válidas"""
+        while True:
+            try:
+                filas = int(input(f"Filas (1-{LIMITE_DIMENSION}): "))
+                columnas = int(input(f"Columnas (1-{LIMITE_DIMENSION}): "))
+                minas = int(input(f"Minas (0-{filas * columnas - 1}): "))
+            except ValueError:
+                print("Entrada inválida. Ingrese un número.")
+                continue
+            
+            if not (1 <= filas <= LIMITE_DIMENSION and 1 <= columnas <= LIMITE_DIMENSION):
+                print(f"Filas y columnas deben estar entre 1 y {LIMITE_DIMENSION}.")
+            elif not (0 <= minas < filas * columnas):
+                print("Debe quedar al menos una casilla sin mina.")
+            else:
+                return filas, columnas, minas
+
     def iniciar_servidor(self):
         """Inicia el servidor y espera la conexión de un cliente"""
         try:
@@ -66,7 +117,8 @@ class BuscaminasServidor:
                 "tipo": "configuracion", 
                 "dificultad": self.dificultad, 
                 "filas": self.filas, 
-                "columnas": self.columnas
+                "columnas": self.columnas,
+                "capacidades": list(CAPACIDADES_SERVIDOR)
             }
             self.enviar_mensaje(mensaje_inicial)
             
@@ -87,24 +139,27 @@ class BuscaminasServidor:
         self.tablero = [[0 for _ in range(self.columnas)] for _ in range(self.filas)]
         self.tablero_visible = [['□' for _ in range(self.columnas)] for _ in range(self.filas)]
         
-        # Colocar minas aleatoriamente
-        minas_colocadas = 0
-        while minas_colocadas < self.minas:
-            fila = random.randint(0, self.filas - 1)
-            col = random.randint(0, self.columnas - 1)
-            
-            if self.tablero[fila][col] != -1:  # -1 representa una mina
-                self.tablero[fila][col] = -1
-                minas_colocadas += 1
-                
-                # Actualizar números en casillas adyacentes
-                for i in range(max(0, fila-1), min(self.filas, fila+2)):
-                    for j in range(max(0, col-1), min(self.columnas, col+2)):
-                        if self.tablero[i][j] != -1:
-                            self.tablero[i][j] += 1
+        self.posiciones_minas = []
+        self.casillas_restantes = self.filas * self.columnas - self.minas
+        
+        # Colocar minas aleatoriamente: muestreo sin reemplazo, sin reintentos
+        aleatorio = random.Random(self.semilla)
+        for indice in aleatorio.sample(range(self.filas * self.columnas), self.minas):
+            fila, col = divmod(indice, self.columnas)
+            self.tablero[fila][col] = -1  # -1 representa una mina
+            self.posiciones_minas.append([fila, col])
+
+            # Actualizar números en casillas adyacentes
+            for i in range(max(0, fila-1), min(self.filas, fila+2)):
+                for j in range(max(0, col-1), min(self.columnas, col+2)):
+                    if self.tablero[i][j] != -1:
+                        self.tablero[i][j] += 1
         
         print("Tablero generado:")
-        self.imprimir_tablero()
+        if self.columnas <= 40:
+            self.imprimir_tablero()
+        else:
+            print(f"{self.filas}x{self.columnas} con {self.minas} minas (demasiado grande para imprimirlo)")
 
     def imprimir_tablero(self):
         """Imprime el tablero actual (para el servidor)"""
@@ -130,15 +185,48 @@ class BuscaminasServidor:
             print(f"Error al enviar mensaje: {e}")
             return False
 
+    def enviar_mensajes(self, mensajes):
+        """Envía varios mensajes JSON juntos con un único sendall"""
+        try:
+            datos = "".join(json.dumps(mensaje) + '\n' for mensaje in mensajes)
+            self.cliente_socket.sendall(datos.encode('utf-8'))
+            return True
+        except Exception as e:
+            print(f"Error al enviar mensajes: {e}")
+            return False
+
     def recibir_mensaje(self):
         """Recibe un mensaje del cliente en formato JSON"""
+        # Un mensaje que ya estaba en el buffer se cuenta desde ahora; si hace falta
+        # recv, desde el último recv, que es el que lo completa
+        self.instante_recepcion = time.perf_counter()
         try:
-            datos = self.cliente_socket.recv(1024)
-            if not datos:
-                raise Exception("Conexión cerrada por el cliente")
+            # Recibir datos hasta tener un mensaje completo en el buffer
+            while True:
+                # Saltar líneas vacías: p. ej. el '\n' de un mensaje que ya se leyó sin esperarlo
+                self.buffer = self.buffer.lstrip()
+                if b'\n' in self.buffer:
+                    # Extraer un mensaje completo; se decodifica la línea entera, así que
+                    # un carácter UTF-8 partido entre dos recv no se rompe
+                    mensaje_json, self.buffer = self.buffer.split(b'\n', 1)
+                    return json.loads(mensaje_json)
                 
-            mensaje = json.loads(datos.decode('utf-8'))
-            return mensaje
+                if self.buffer:
+                    # Clientes antiguos envían cada mensaje sin delimitador: sólo se
+                    # acepta si el buffer ya es un objeto JSON completo
+                    try:
+                        mensaje = json.loads(self.buffer)
+                    except ValueError:
+                        mensaje = None  # Mensaje (o carácter UTF-8) incompleto, seguir recibiendo
+                    if isinstance(mensaje, dict):
+                        self.buffer = b""
+                        return mensaje
+                
+                datos = self.cliente_socket.recv(1024)
+                if not datos:
+                    raise Exception("Conexión cerrada por el cliente")
+                self.instante_recepcion = time.perf_counter()
+                self.buffer += datos
         except json.JSONDecodeError as e:
             print(f"Error al decodificar JSON: {e}")
             raise
@@ -151,6 +239,7 @@ class BuscaminasServidor:
         while not self.juego_terminado:
             try:
                 mensaje = self.recibir_mensaje()
+                parseado = time.perf_counter()
                 
                 if mensaje["tipo"] == "coordenada":
                     fila = mensaje["fila"]
@@ -162,9 +251,17 @@ class BuscaminasServidor:
                     # Verificar si el juego ha terminado
                     self.verificar_estado_juego()
                     
+                elif mensaje["tipo"] == "protocolo":
+                    # Un cliente que nunca envía este mensaje recibe una respuesta por casilla
+                    self.capacidades = set(mensaje.get("capacidades", [])) & set(CAPACIDADES_SERVIDOR)
+                    
                 elif mensaje["tipo"] == "desconexion":
+                    self.metricas.contar_mensaje("desconexion")
                     print("Cliente desconectado")
                     break
+                
+                # Las respuestas se envían mientras se procesa: la etapa de manejo incluye el envío
+                self.metricas.registrar(mensaje["tipo"], self.instante_recepcion, parseado, time.perf_counter())
                     
             except Exception as e:
                 print(f"Error al procesar movimiento: {e}")
@@ -176,6 +273,7 @@ class BuscaminasServidor:
         if self.servidor_socket:
             self.servidor_socket.close()
         print("Conexión cerrada")
+        self.metricas.volcar(sys.stdout)
 
     def validar_movimiento(self, fila, columna):
         """Valida el movimiento del jugador y envía el resultado al cliente"""
@@ -194,23 +292,20 @@ class BuscaminasServidor:
             # El jugador ha perdido
             self.tablero_visible[fila][columna] = '*'
             
-            # Revelar todas las minas
-            for i in range(self.filas):
-                for j in range(self.columnas):
-                    if self.tablero[i][j] == -1:
-                        self.tablero_visible[i][j] = '*'
-            
-            # Crear una copia del tablero visible para enviar al cliente
-            tablero_para_cliente = []
-            for fila in self.tablero_visible:
-                tablero_para_cliente.append(fila.copy())
+            # Revelar todas las minas: sólo se recorren sus posiciones, no el tablero
+            for i, j in self.posiciones_minas:
+                self.tablero_visible[i][j] = '*'
             
             respuesta = {
                 "tipo": "control",
                 "estado": "mina_pisada",
-                "mensaje": "¡Has pisado una mina! Juego terminado.",
-                "tablero": tablero_para_cliente
+                "mensaje": "¡Has pisado una mina! Juego terminado."
             }
+            if "minas" in self.capacidades:
+                respuesta["minas"] = self.posiciones_minas
+            else:
+                # enviar_mensaje serializa al momento: no hace falta copiar el tablero
+                respuesta["tablero"] = self.tablero_visible
             self.enviar_mensaje(respuesta)
             
             self.juego_terminado = True
@@ -230,58 +325,63 @@ class BuscaminasServidor:
             return False
             
         else:
-            # No hay mina, revelar el número
-            valor = self.tablero[fila][columna]
-            self.tablero_visible[fila][columna] = str(valor) if valor > 0 else ' '
-            self.casillas_destapadas += 1
+            # No hay mina, revelar el número y, si es un 0, las casillas adyacentes
+            reveladas = self.revelar_casillas_adyacentes(fila, columna)
             
-            respuesta = {
-                "tipo": "control",
-                "estado": "casilla_libre",
-                "valor": valor,
-                "fila": fila,
-                "columna": columna
-            }
-            self.enviar_mensaje(respuesta)
-            
-            # Si es un 0, revelar las casillas adyacentes (función recursiva)
-            if valor == 0:
-                self.revelar_casillas_adyacentes(fila, columna)
+            if "casillas_libres" in self.capacidades:
+                # Toda la cascada en un único mensaje
+                respuesta = {
+                    "tipo": "control",
+                    "estado": "casillas_libres",
+                    "casillas": reveladas
+                }
+                self.enviar_mensaje(respuesta)
+            else:
+                # Un mensaje por casilla, pero todos en el mismo envío
+                self.enviar_mensajes({
+                    "tipo": "control",
+                    "estado": "casilla_libre",
+                    "valor": valor,
+                    "fila": i,
+                    "columna": j
+                } for i, j, valor in reveladas)
                 
             return True
 
     def revelar_casillas_adyacentes(self, fila, columna):
-        """Revela recursivamente las casillas adyacentes a una casilla con valor 0"""
-        for i in range(max(0, fila-1), min(self.filas, fila+2)):
-            for j in range(max(0, columna-1), min(self.columnas, columna+2)):
-                # Si la casilla ya está revelada o es la misma, continuar
-                if (i == fila and j == columna) or self.tablero_visible[i][j] != '□':
-                    continue
+        """Revela una casilla y, si es 0, sus adyacentes con un recorrido en anchura (sin recursión).
+        Devuelve la lista [fila, columna, valor] de las casillas reveladas."""
+        valor = self.tablero[fila][columna]
+        self.tablero_visible[fila][columna] = str(valor) if valor > 0 else ' '
+        reveladas = [[fila, columna, valor]]
+        
+        pendientes = deque()
+        if valor == 0:
+            pendientes.append((fila, columna))
+        
+        while pendientes:
+            f, c = pendientes.popleft()
+            for i in range(max(0, f-1), min(self.filas, f+2)):
+                for j in range(max(0, c-1), min(self.columnas, c+2)):
+                    # Si la casilla ya está revelada (incluida la propia), continuar
+                    if self.tablero_visible[i][j] != '□':
+                        continue
                     
-                # Revelar la casilla
-                valor = self.tablero[i][j]
-                if valor != -1:  # No revelar minas
+                    # Los vecinos de un 0 nunca son minas
+                    valor = self.tablero[i][j]
                     self.tablero_visible[i][j] = str(valor) if valor > 0 else ' '
-                    self.casillas_destapadas += 1
-                    
-                    # Notificar al cliente
-                    respuesta = {
-                        "tipo": "control",
-                        "estado": "casilla_libre",
-                        "valor": valor,
-                        "fila": i,
-                        "columna": j
-                    }
-                    self.enviar_mensaje(respuesta)
+                    reveladas.append([i, j, valor])
                     
-                    # Si es 0, continuar la recursión
+                    # Si es 0, seguir expandiendo la región
                     if valor == 0:
-                        self.revelar_casillas_adyacentes(i, j)
+                        pendientes.append((i, j))
+        
+        self.casillas_restantes -= len(reveladas)
+        return reveladas
 
     def verificar_estado_juego(self):
         """Verifica si el jugador ha ganado"""
-        casillas_totales = self.filas * self.columnas
-        if self.casillas_destapadas == casillas_totales - self.minas and not self.juego_terminado:
+        if self.casillas_restantes == 0 and not self.juego_terminado:
             self.juego_terminado = True
             self.tiempo_fin = time.time()
             duracion = round(self.tiempo_fin - self.tiempo_inicio)
@@ -300,5 +400,7 @@ class BuscaminasServidor:
 # Código principal para ejecutar el servidor
 if __name__ == "__main__":
     servidor = BuscaminasServidor()
+    # kill -USR1 <pid> muestra las métricas durante la partida
+    servidor.metricas.instalar_senal()
     servidor.configurar_servidor()
     servidor.iniciar_servidor()
\ No newline at end of file
@@ -0,0 +1,73 @@
+# Métricas del servidor de la práctica 1: latencia de las etapas del
+# procesado de cada mensaje y mensajes recibidos por tipo.
+
+import bisect
+import signal
+import sys
+
+# Límites superiores (segundos) de los cubos de latencia: de 1 µs a ~8 s,
+# duplicando en cada cubo. Un cubo extra recoge lo que supera el último.
+LIMITES_LATENCIA = tuple(1e-6 * 2 ** i for i in range(24))
+
+# Tipos de mensaje del cliente con contador propio; el resto cuenta como "otro"
+TIPOS_MENSAJE = ("coordenada", "protocolo", "desconexion", "otro")
+
+class Histograma:
+    """Histograma de cubos fijos: observar() sólo incrementa contadores ya reservados"""
+    def __init__(self):
+        self.cubos = [0] * (len(LIMITES_LATENCIA) + 1)
+        self.total = 0
+        self.suma = 0.0
+
+    def observar(self, valor):
+        """Añade una observación al cubo cuyo límite es el primero >= valor"""
+        self.cubos[bisect.bisect_left(LIMITES_LATENCIA, valor)] += 1
+        self.total += 1
+        self.suma += valor
+
+    def percentil(self, p):
+        """Límite superior del cubo que contiene el percentil p (0-100); infinito si se sale"""
+        objetivo = self.total * p / 100
+        acumulado = 0
+        for indice, cantidad in enumerate(self.cubos):
+            acumulado += cantidad
+            if acumulado >= objetivo and cantidad:
+                return LIMITES_LATENCIA[indice] if indice < len(LIMITES_LATENCIA) else float("inf")
+        return 0.0
+
+class MetricasServidor:
+    """Latencias con time.perf_counter() de dos etapas por mensaje:
+      - recepcion_parseo: desde que el mensaje está en el buffer hasta tenerlo decodificado,
+      - parseo_manejo:    hasta que se han enviado sus respuestas.
+    """
+    def __init__(self):
+        self.recepcion_parseo = Histograma()
+        self.parseo_manejo = Histograma()
+        self.mensajes = dict.fromkeys(TIPOS_MENSAJE, 0)
+
+    def contar_mensaje(self, tipo):
+        """Suma un mensaje al contador de su tipo"""
+        self.mensajes[tipo if tipo in self.mensajes else "otro"] += 1
+
+    def registrar(self, tipo, recibido, parseado, manejado):
+        """Cuenta un mensaje y anota sus dos etapas"""
+        self.contar_mensaje(tipo)
+        self.recepcion_parseo.observar(parseado - recibido)
+        self.parseo_manejo.observar(manejado - parseado)
+
+    def volcar(self, fichero=None):
+        """Escribe los contadores y los percentiles de cada etapa en microsegundos (por defecto en stderr)"""
+        fichero = fichero or sys.stderr
+        print("Mensajes: " + ", ".join(f"{tipo}={cantidad}" for tipo, cantidad in self.mensajes.items()),
+              file=fichero)
+        print(f"{'etapa':>17} {'total':>9} {'p50(us)':>9} {'p99(us)':>9}", file=fichero)
+        for nombre in ("recepcion_parseo", "parseo_manejo"):
+            histograma = getattr(self, nombre)
+            print(f"{nombre:>17} {histograma.total:>9} {histograma.percentil(50) * 1e6:>9.0f} "
+                  f"{histograma.percentil(99) * 1e6:>9.0f}", file=fichero, flush=True)
+
+    def instalar_senal(self):
+        """Vuelca las métricas al recibir SIGUSR1 (sólo POSIX)"""
+        senal = getattr(signal, "SIGUSR1", None)
+        if senal is not None:
+            signal.signal(senal, lambda numero, marco: self.volcar())
@@ -0,0 +1,128 @@
+"""Compara un registro compartido con un único RLock frente al RegistroFragmentado.
+
+Cada hilo repite durante --duracion segundos operaciones sobre --claves
+claves al azar (p. ej. partidas por id): con probabilidad --lecturas una
+lectura y si no un incremento. Se prueban dos modelos:
+  - rlock:       un diccionario y un threading.RLock para todo, como CuentaBancaria,
+  - fragmentado: RegistroFragmentado, un cerrojo de lectores/escritor por fragmento.
+
+--espera-us simula trabajo que suelta el GIL dentro de la sección crítica
+(E/S como el print de CuentaBancaria); con 0 sólo se mide el coste de los
+cerrojos. Al final se comprueba que no se ha perdido ningún incremento.
+
+Uso:
+    python benchmarks/benchmark-concurrencia.py --hilos 2 4 8 16 32 --espera-us 0 100
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_concurrencia import RegistroFragmentado
+
+class RegistroRLock:
+    """Línea base: todo el estado bajo un único RLock"""
+    def __init__(self, claves):
+        self.datos = dict.fromkeys(range(claves), 0)
+        self.lock = threading.RLock()
+
+    def leer(self, clave, trabajo):
+        with self.lock:
+            valor = self.datos[clave]
+            trabajo()
+            return valor
+
+    def incrementar(self, clave, trabajo):
+        with self.lock:
+            self.datos[clave] += 1
+            trabajo()
+
+    def total(self):
+        return sum(self.datos.values())
+
+class RegistroConFragmentos:
+    """RegistroFragmentado con el mismo trabajo dentro de la sección crítica"""
+    def __init__(self, claves, fragmentos):
+        self.registro = RegistroFragmentado(fragmentos)
+        for clave in range(claves):
+            self.registro.poner(clave, 0)
+
+    def leer(self, clave, trabajo):
+        datos, cerrojo = self.registro.fragmento(clave)
+        with cerrojo.lectura():
+            valor = datos[clave]
+            trabajo()
+            return valor
+
+    def incrementar(self, clave, trabajo):
+        datos, cerrojo = self.registro.fragmento(clave)
+        with cerrojo.escritura():
+            datos[clave] += 1
+            trabajo()
+
+    def total(self):
+        return sum(self.registro.valores())
+
+def medir(registro, hilos, espera_us, argumentos):
+    """(operaciones por segundo, incrementos hechos) con 'hilos' hilos a la vez"""
+    espera = espera_us / 1e6
+    trabajo = (lambda: time.sleep(espera)) if espera else (lambda: None)
+    operaciones = [0] * hilos
+    incrementos = [0] * hilos
+    barrera = threading.Barrier(hilos + 1)
+    limite = [0.0]
+
+    def trabajar(numero):
+        aleatorio = random.Random(numero)
+        barrera.wait()
+        hechas = escritas = 0
+        while time.perf_counter() < limite[0]:
+            clave = aleatorio.randrange(argumentos.claves)
+            if aleatorio.random() < argumentos.lecturas:
+                registro.leer(clave, trabajo)
+            else:
+                registro.incrementar(clave, trabajo)
+                escritas += 1
+            hechas += 1
+        operaciones[numero] = hechas
+        incrementos[numero] = escritas
+
+    trabajadores = [threading.Thread(target=trabajar, args=(n,)) for n in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    limite[0] = time.perf_counter() + argumentos.duracion
+    barrera.wait()
+    for trabajador in trabajadores:
+        trabajador.join()
+    return sum(operaciones) / argumentos.duracion, sum(incrementos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, nargs="+", default=[2, 4, 8, 16, 32])
+    parser.add_argument("--espera-us", type=float, nargs="+", default=[0, 100],
+                        help="Microsegundos de trabajo sin GIL dentro de la sección crítica")
+    parser.add_argument("--claves", type=int, default=1024)
+    parser.add_argument("--fragmentos", type=int, default=16)
+    parser.add_argument("--lecturas", type=float, default=0.9, help="Proporción de lecturas")
+    parser.add_argument("--duracion", type=float, default=0.5, help="Segundos por medición")
+    argumentos = parser.parse_args()
+
+    print(f"{'espera(us)':>10} {'hilos':>6} {'rlock(op/s)':>12} {'fragmentado(op/s)':>18} {'aceleracion':>11}")
+    for espera_us in argumentos.espera_us:
+        for hilos in argumentos.hilos:
+            resultados = []
+            for registro in (RegistroRLock(argumentos.claves),
+                             RegistroConFragmentos(argumentos.claves, argumentos.fragmentos)):
+                por_segundo, incrementos = medir(registro, hilos, espera_us, argumentos)
+                assert registro.total() == incrementos, "Se han perdido incrementos"
+                resultados.append(por_segundo)
+            rlock, fragmentado = resultados
+            print(f"{espera_us:>10.0f} {hilos:>6} {rlock:>12.0f} {fragmentado:>18.0f} {fragmentado / rlock:>10.2f}x")
+
+if __name__ == "__main__":
+    main()
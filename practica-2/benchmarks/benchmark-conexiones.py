@@ -0,0 +1,137 @@
+"""Mide cómo escala un servidor de Buscaminas con el número de conexiones inactivas.
+
+Para cada cantidad N arranca el servidor en un subproceso, abre N conexiones que
+sólo leen la configuración inicial y se quedan quietas, y mide:
+  - tiempo en establecer las N conexiones,
+  - memoria residente del servidor (VmRSS, sólo Linux),
+  - latencia de ida y vuelta de un cliente activo mientras las N siguen abiertas.
+
+Uso:
+    python benchmarks/benchmark-conexiones.py --servidor asyncio --conexiones 1000 5000 10000
+"""
+import asyncio
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_motor import ampliar_limite_descriptores
+
+SERVIDORES = {
+    "asyncio": "buscaminas_servidor_asyncio.py",
+    "sesiones": "buscaminas_servidor_sesiones.py",
+}
+
+def puerto_libre():
+    """Pide al sistema un puerto TCP libre"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def memoria_residente_kb(pid):
+    """Memoria residente de un proceso en KiB según /proc (None fuera de Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as estado:
+            for linea in estado:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1])
+    except OSError:
+        return None
+    return None
+
+def arrancar_servidor(tipo, puerto):
+    """Lanza el servidor en un subproceso y espera a que acepte conexiones"""
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(DIRECTORIO_PRACTICA, SERVIDORES[tipo]),
+         "--ip", "127.0.0.1", "--puerto", str(puerto)],
+        cwd=DIRECTORIO_PRACTICA, stdout=subprocess.DEVNULL)
+    limite = time.monotonic() + 10
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=0.5).close()
+            return proceso
+        except OSError:
+            time.sleep(0.05)
+    proceso.kill()
+    raise RuntimeError("El servidor no arrancó a tiempo")
+
+async def abrir_conexion_inactiva(puerto, semaforo):
+    """Abre una conexión y lee la configuración inicial"""
+    async with semaforo:
+        lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+        await lector.readline()
+        return escritor
+
+async def medir_latencia(puerto, repeticiones):
+    """Latencias (ms) de colocar/retirar una bandera con un cliente activo"""
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    await lector.readline()
+    latencias = []
+    for i in range(repeticiones):
+        accion = "colocar" if i % 2 == 0 else "retirar"
+        inicio = time.perf_counter()
+        escritor.write(f'{{"tipo": "bandera", "accion": "{accion}", "fila": 0, "columna": 0}}\n'.encode())
+        await escritor.drain()
+        await lector.readline()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    escritor.close()
+    return latencias
+
+async def medir(puerto, conexiones, repeticiones):
+    """Abre las conexiones inactivas y mide tiempos y latencias"""
+    semaforo = asyncio.Semaphore(500)  # Evita desbordar la cola de accept
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(
+        *(abrir_conexion_inactiva(puerto, semaforo) for _ in range(conexiones)),
+        return_exceptions=True)
+    tiempo_conexion = time.perf_counter() - inicio
+
+    escritores = [r for r in resultados if not isinstance(r, BaseException)]
+    fallidas = len(resultados) - len(escritores)
+    latencias = await medir_latencia(puerto, repeticiones)
+
+    for escritor in escritores:
+        escritor.close()
+    return tiempo_conexion, fallidas, latencias
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servidor", choices=sorted(SERVIDORES), default="asyncio")
+    parser.add_argument("--conexiones", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeticiones", type=int, default=200, help="Viajes de ida y vuelta por medición")
+    argumentos = parser.parse_args()
+
+    limite = ampliar_limite_descriptores()
+    print(f"Servidor: {argumentos.servidor} | límite de descriptores: {limite}")
+    print(f"{'conexiones':>10} {'fallidas':>8} {'t_conexion(s)':>13} {'RSS(MiB)':>9} "
+          f"{'KiB/conexion':>12} {'p50(ms)':>8} {'p99(ms)':>8}")
+
+    for conexiones in argumentos.conexiones:
+        puerto = puerto_libre()
+        proceso = arrancar_servidor(argumentos.servidor, puerto)
+        try:
+            rss_base = memoria_residente_kb(proceso.pid)
+            tiempo, fallidas, latencias = asyncio.run(medir(puerto, conexiones, argumentos.repeticiones))
+            rss = memoria_residente_kb(proceso.pid)
+        finally:
+            proceso.terminate()
+            proceso.wait()
+
+        latencias.sort()
+        p50 = statistics.median(latencias)
+        p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+        if rss is not None and rss_base is not None:
+            rss_texto = f"{rss / 1024:9.1f}"
+            por_conexion = f"{(rss - rss_base) / max(1, conexiones - fallidas):12.1f}"
+        else:
+            rss_texto, por_conexion = f"{'-':>9}", f"{'-':>12}"
+        print(f"{conexiones:>10} {fallidas:>8} {tiempo:>13.2f} {rss_texto} {por_conexion} {p50:>8.3f} {p99:>8.3f}")
+
+if __name__ == "__main__":
+    main()
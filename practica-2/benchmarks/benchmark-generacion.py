@@ -0,0 +1,98 @@
+"""Mide el tiempo de generar un tablero según su tamaño y su densidad de minas.
+
+Compara dos algoritmos:
+  - rechazo: sortea casillas hasta encontrar una libre y después recorre el
+    tablero entero contando minas vecinas (el algoritmo anterior, con listas),
+  - muestreo: PartidaBuscaminas.generar_tablero, muestreo sin reemplazo del
+    conjunto menor (minas o casillas libres) y recuento sólo alrededor de él.
+
+Con densidades altas el rechazo repite muchos sorteos; el muestreo no.
+
+Uso:
+    python benchmarks/benchmark-generacion.py --tamanos 9 100 1000 --densidades 0.15 0.5 0.9
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_motor import PartidaBuscaminas
+from buscaminas_tablero import MINA
+
+def generar_por_rechazo(filas, columnas, minas, semilla):
+    """Algoritmo anterior: sorteos con rechazo y recuento completo de vecinos"""
+    aleatorio = random.Random(semilla)
+    total = filas * columnas
+    tablero = [0] * total
+
+    minas_colocadas = 0
+    while minas_colocadas < minas:
+        indice = aleatorio.randrange(total)
+        if tablero[indice] != '*':
+            tablero[indice] = '*'
+            minas_colocadas += 1
+
+    for fila in range(filas):
+        for columna in range(columnas):
+            indice = fila * columnas + columna
+            if tablero[indice] == '*':
+                continue
+            cuenta = 0
+            for i in range(max(0, fila - 1), min(filas, fila + 2)):
+                for j in range(max(0, columna - 1), min(columnas, columna + 2)):
+                    if tablero[i * columnas + j] == '*':
+                        cuenta += 1
+            tablero[indice] = cuenta
+    return tablero
+
+def generar_por_muestreo(filas, columnas, minas, semilla):
+    """Algoritmo actual del motor"""
+    partida = PartidaBuscaminas(filas, columnas, minas, semilla=semilla)
+    partida.generar_tablero()
+    return partida.tablero.celdas
+
+ALGORITMOS = {
+    "rechazo": generar_por_rechazo,
+    "muestreo": generar_por_muestreo,
+}
+
+def medir(algoritmo, filas, columnas, minas, repeticiones):
+    """Mediana en milisegundos de generar el tablero 'repeticiones' veces"""
+    tiempos = []
+    for semilla in range(repeticiones):
+        inicio = time.perf_counter()
+        algoritmo(filas, columnas, minas, semilla)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[9, 16, 100, 500, 1000],
+                        help="Lados de tableros cuadrados")
+    parser.add_argument("--densidades", type=float, nargs="+", default=[0.15, 0.5, 0.9])
+    parser.add_argument("--algoritmos", choices=sorted(ALGORITMOS), nargs="+", default=["rechazo", "muestreo"])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    argumentos = parser.parse_args()
+
+    # Comprobar que ambos algoritmos producen tableros coherentes antes de medir
+    referencia = generar_por_rechazo(30, 30, 200, 0)
+    muestra = generar_por_muestreo(30, 30, 200, 0)
+    assert referencia.count('*') == muestra.count(MINA) == 200
+
+    print(f"{'tablero':>11} {'densidad':>8} {'minas':>8} " +
+          " ".join(f"{nombre + '(ms)':>13}" for nombre in argumentos.algoritmos))
+    for lado in argumentos.tamanos:
+        for densidad in argumentos.densidades:
+            minas = min(lado * lado - 1, int(lado * lado * densidad))
+            tiempos = [medir(ALGORITMOS[nombre], lado, lado, minas, argumentos.repeticiones)
+                       for nombre in argumentos.algoritmos]
+            print(f"{f'{lado}x{lado}':>11} {densidad:>8.2f} {minas:>8} " +
+                  " ".join(f"{t:>13.2f}" for t in tiempos))
+
+if __name__ == "__main__":
+    main()
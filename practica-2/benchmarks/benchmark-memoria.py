@@ -0,0 +1,60 @@
+"""Mide la memoria que ocupa una partida según el tamaño del tablero.
+
+Compara la representación anterior (tres listas planas: valores, casillas
+visibles y banderas) con el TableroCompacto de un byte por casilla que usa
+PartidaBuscaminas. La memoria se mide con tracemalloc creando varias
+partidas a la vez y dividiendo entre el número de partidas.
+
+Uso:
+    python benchmarks/benchmark-memoria.py --tamanos 9 16 100 1000 --partidas 20
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_motor import PartidaBuscaminas
+
+def crear_listas(filas, columnas, minas, semilla):
+    """Representación anterior: una lista por valor, por casilla visible y por bandera"""
+    partida = PartidaBuscaminas(filas, columnas, minas, semilla=semilla)
+    partida.generar_tablero()
+    total = filas * columnas
+    tablero = ['*' if partida.tablero.es_mina(i) else partida.tablero.valor(i) for i in range(total)]
+    return tablero, ['□'] * total, [False] * total
+
+def crear_compacto(filas, columnas, minas, semilla):
+    """Representación actual: PartidaBuscaminas con TableroCompacto"""
+    partida = PartidaBuscaminas(filas, columnas, minas, semilla=semilla)
+    partida.generar_tablero()
+    return partida
+
+def medir(crear, lado, partidas):
+    """Bytes por partida que siguen reservados con 'partidas' partidas vivas"""
+    minas = max(1, lado * lado * 40 // 256)
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    vivas = [crear(lado, lado, minas, semilla) for semilla in range(partidas)]
+    ocupado = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+    del vivas
+    return ocupado / partidas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[9, 16, 100, 1000],
+                        help="Lados de tableros cuadrados")
+    parser.add_argument("--partidas", type=int, default=10, help="Partidas vivas a la vez por medición")
+    argumentos = parser.parse_args()
+
+    print(f"{'tablero':>11} {'listas(KiB)':>12} {'compacto(KiB)':>14} {'reduccion':>10}")
+    for lado in argumentos.tamanos:
+        listas = medir(crear_listas, lado, argumentos.partidas)
+        compacto = medir(crear_compacto, lado, argumentos.partidas)
+        print(f"{f'{lado}x{lado}':>11} {listas / 1024:>12.1f} {compacto / 1024:>14.1f} {listas / compacto:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
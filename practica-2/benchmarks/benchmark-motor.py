@@ -0,0 +1,182 @@
+"""Batería de benchmarks de los caminos críticos del motor, sin red ni Pygame.
+
+Para cada tamaño de tablero y densidad de minas mide (mediana de varias
+repeticiones):
+  - generar_tablero:        sorteo de minas y recuento de vecinos,
+  - destapar_numero:        destapar una casilla con número (sin cascada),
+  - revelar_region:         destapar un 0 y toda su región (se indica el tamaño),
+  - procesar_coordenada:    procesar_mensaje de una coordenada con casillas_libres,
+  - procesar_bandera:       procesar_mensaje de colocar y retirar una bandera,
+  - pisar_mina_tablero:     perder enviando el tablero visible completo,
+  - pisar_mina_minas:       perder enviando sólo las coordenadas de las minas,
+  - codificar/decodificar:  la respuesta de la cascada en JSON y en binario.
+
+Los resultados se guardan en un fichero JSON (--salida) para comparar
+versiones; con --comparar se muestra la relación con un fichero anterior
+(>1 = más lento que antes).
+
+Uso:
+    python benchmarks/benchmark-motor.py --tamanos 9 16 100 1000 --salida resultados-motor.json
+    python benchmarks/benchmark-motor.py --comparar resultados-motor.json --salida nuevos.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_motor import PartidaBuscaminas
+from buscaminas_protocolo import LectorTramas, codificar
+from buscaminas_tablero import numpy
+
+def medir(operacion, repeticiones, preparar=None):
+    """Mediana y mínimo en microsegundos de operacion(); preparar() se ejecuta fuera del tiempo medido"""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        operacion()
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return statistics.median(tiempos), min(tiempos)
+
+def crear_partida(lado, densidad, semilla):
+    """Partida lado x lado ya generada, con casillas_libres negociado"""
+    minas = min(lado * lado - 1, max(1, int(lado * lado * densidad)))
+    partida = PartidaBuscaminas(lado, lado, minas, semilla=semilla)
+    partida.generar_tablero()
+    partida.procesar_mensaje({"tipo": "protocolo", "capacidades": ["casillas_libres"]})
+    return partida
+
+def buscar_casilla(partida, valores, aleatorio):
+    """(fila, columna) de una casilla libre cuyo valor esté en 'valores', empezando en un punto al azar"""
+    total = partida.filas * partida.columnas
+    inicio = aleatorio.randrange(total)
+    for desplazamiento in range(total):
+        indice = (inicio + desplazamiento) % total
+        if not partida.tablero.es_mina(indice) and partida.tablero.valor(indice) in valores:
+            return divmod(indice, partida.columnas)
+    return None
+
+def medir_tablero(lado, densidad, repeticiones, semilla):
+    """Lista de resultados de todos los casos para un tamaño y una densidad"""
+    aleatorio = random.Random(semilla)
+    partida = crear_partida(lado, densidad, semilla)
+    original = bytes(partida.tablero.celdas)
+
+    def restaurar():
+        """Deja la partida como recién generada (fuera del tiempo medido)"""
+        partida.tablero.celdas[:] = original
+        partida.casillas_restantes = partida.filas * partida.columnas - partida.minas
+        partida.juego_terminado = False
+
+    resultados = []
+
+    def anotar(caso, tiempos, **extra):
+        mediana, minimo = tiempos
+        resultados.append({"caso": caso, "lado": lado, "densidad": densidad, "minas": partida.minas,
+                           "mediana_us": round(mediana, 3), "minimo_us": round(minimo, 3), **extra})
+
+    anotar("generar_tablero", medir(partida.generar_tablero, repeticiones))
+    restaurar()
+
+    numero = buscar_casilla(partida, range(1, 9), aleatorio)
+    if numero is not None:
+        anotar("destapar_numero", medir(lambda: partida.destapar(*numero), repeticiones, restaurar))
+
+    cero = buscar_casilla(partida, (0,), aleatorio)
+    cascada = None
+    if cero is not None:
+        restaurar()
+        cascada = partida.destapar(*cero)[0]
+        anotar("revelar_region", medir(lambda: partida.revelar_region(*cero), repeticiones, restaurar),
+               casillas=len(cascada["casillas"]))
+
+    libre = numero or cero
+    if libre is not None:
+        coordenada = {"tipo": "coordenada", "fila": libre[0], "columna": libre[1]}
+        anotar("procesar_coordenada", medir(lambda: partida.procesar_mensaje(coordenada), repeticiones, restaurar))
+
+    posiciones = partida.tablero.buscar_minas()
+    if posiciones:
+        mina = divmod(posiciones[0], partida.columnas)
+        for capacidades, caso in ((["casillas_libres"], "pisar_mina_tablero"),
+                                  (["casillas_libres", "minas"], "pisar_mina_minas")):
+            partida.procesar_mensaje({"tipo": "protocolo", "capacidades": capacidades})
+            anotar(caso, medir(lambda: partida.destapar(*mina), repeticiones, restaurar))
+        partida.procesar_mensaje({"tipo": "protocolo", "capacidades": ["casillas_libres"]})
+
+    restaurar()
+    fila, columna = divmod(aleatorio.randrange(lado * lado), lado)
+    colocar = {"tipo": "bandera", "accion": "colocar", "fila": fila, "columna": columna}
+    retirar = {"tipo": "bandera", "accion": "retirar", "fila": fila, "columna": columna}
+    anotar("procesar_bandera", medir(lambda: (partida.procesar_mensaje(colocar), partida.procesar_mensaje(retirar)),
+                                     repeticiones))
+
+    if cascada is not None:
+        for binario in (False, True):
+            protocolo = "binario" if binario else "json"
+            datos = codificar(cascada, binario)
+            lector = LectorTramas()
+
+            def decodificar():
+                lector.agregar(datos)
+                return lector.extraer(binario)
+
+            anotar(f"codificar_{protocolo}", medir(lambda: codificar(cascada, binario), repeticiones),
+                   bytes=len(datos), casillas=len(cascada["casillas"]))
+            anotar(f"decodificar_{protocolo}", medir(decodificar, repeticiones),
+                   bytes=len(datos), casillas=len(cascada["casillas"]))
+    return resultados
+
+def cargar_anteriores(ruta):
+    """Medianas de un fichero de resultados anterior indexadas por (caso, lado, densidad)"""
+    with open(ruta, encoding="utf-8") as fichero:
+        datos = json.load(fichero)
+    return {(r["caso"], r["lado"], r["densidad"]): r["mediana_us"] for r in datos["resultados"]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[9, 16, 100, 1000],
+                        help="Lados de tableros cuadrados")
+    parser.add_argument("--densidades", type=float, nargs="+", default=[0.05, 0.15, 0.3])
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default="resultados-motor.json", help="Fichero JSON de resultados")
+    parser.add_argument("--comparar", help="Fichero de resultados anterior con el que comparar")
+    argumentos = parser.parse_args()
+
+    anteriores = cargar_anteriores(argumentos.comparar) if argumentos.comparar else {}
+
+    resultados = []
+    print(f"{'caso':>22} {'tablero':>11} {'densidad':>9} {'mediana(us)':>12} {'minimo(us)':>11} {'vs anterior':>11}")
+    for lado in argumentos.tamanos:
+        for densidad in argumentos.densidades:
+            for resultado in medir_tablero(lado, densidad, argumentos.repeticiones, argumentos.semilla):
+                resultados.append(resultado)
+                anterior = anteriores.get((resultado["caso"], lado, densidad))
+                relacion = f"{resultado['mediana_us'] / anterior:.2f}x" if anterior else "-"
+                print(f"{resultado['caso']:>22} {f'{lado}x{lado}':>11} {densidad:>9.2f} "
+                      f"{resultado['mediana_us']:>12.1f} {resultado['minimo_us']:>11.1f} {relacion:>11}")
+
+    entorno = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy": numpy.__version__ if numpy is not None else None,
+        "repeticiones": argumentos.repeticiones,
+        "semilla": argumentos.semilla,
+    }
+    with open(argumentos.salida, "w", encoding="utf-8") as fichero:
+        json.dump({"entorno": entorno, "resultados": resultados}, fichero, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {argumentos.salida}")
+
+if __name__ == "__main__":
+    main()
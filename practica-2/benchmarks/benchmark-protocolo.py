@@ -0,0 +1,76 @@
+"""Compara el protocolo de líneas JSON con las tramas binarias de buscaminas_protocolo.
+
+Para cada tipo de mensaje mide cuántos mensajes por segundo se codifican y se
+decodifican (incluido el enmarcado con LectorTramas) y cuántos bytes ocupan
+en la red con cada protocolo.
+
+Uso:
+    python benchmarks/benchmark-protocolo.py --duracion 0.5 --lado 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_protocolo import LectorTramas, codificar
+
+def mensajes_de_prueba(lado):
+    """Mensajes representativos de una partida en un tablero lado x lado"""
+    aleatorio = random.Random(0)
+    cascada = [[i // lado, i % lado, aleatorio.randint(0, 3)] for i in range(lado * lado // 4)]
+    tablero = [[aleatorio.choice(['□', '□', '*', 0, 1, 2]) for _ in range(lado)] for _ in range(lado)]
+    return {
+        "coordenada": {"tipo": "coordenada", "fila": 3, "columna": 7},
+        "bandera": {"tipo": "bandera", "accion": "colocar", "fila": 3, "columna": 7},
+        "casilla_libre": {"tipo": "control", "estado": "casilla_libre", "valor": 2, "fila": 3, "columna": 7},
+        f"casillas_libres({len(cascada)})": {"tipo": "control", "estado": "casillas_libres", "casillas": cascada},
+        f"mina_pisada({lado}x{lado})": {"tipo": "control", "estado": "mina_pisada",
+                                        "mensaje": "¡BOOM! Has perdido.", "tablero": tablero},
+        "fin (JSON en ambos)": {"tipo": "fin", "resultado": "victoria", "duracion": 42},
+    }
+
+def por_segundo(funcion, duracion):
+    """Veces por segundo que se puede llamar a funcion() durante 'duracion' segundos"""
+    veces = 0
+    inicio = time.perf_counter()
+    limite = inicio + duracion
+    while True:
+        funcion()
+        veces += 1
+        ahora = time.perf_counter()
+        if ahora >= limite:
+            return veces / (ahora - inicio)
+
+def medir(mensaje, binario, duracion):
+    """(bytes, codificaciones/s, decodificaciones/s) de un mensaje con un protocolo"""
+    datos = codificar(mensaje, binario)
+    lector = LectorTramas()
+
+    def decodificar():
+        lector.agregar(datos)
+        return lector.extraer(binario)
+
+    assert decodificar() == mensaje, "El mensaje no sobrevive a la ida y vuelta"
+    codificados = por_segundo(lambda: codificar(mensaje, binario), duracion)
+    decodificados = por_segundo(decodificar, duracion)
+    return len(datos), codificados, decodificados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duracion", type=float, default=0.5, help="Segundos por medición")
+    parser.add_argument("--lado", type=int, default=100, help="Lado del tablero de las cascadas e instantáneas")
+    argumentos = parser.parse_args()
+
+    print(f"{'mensaje':>24} {'protocolo':>9} {'bytes':>9} {'codif/s':>11} {'decod/s':>11}")
+    for nombre, mensaje in mensajes_de_prueba(argumentos.lado).items():
+        for binario in (False, True):
+            tamano, codificados, decodificados = medir(mensaje, binario, argumentos.duracion)
+            print(f"{nombre:>24} {'binario' if binario else 'json':>9} {tamano:>9} "
+                  f"{codificados:>11.0f} {decodificados:>11.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compara el recuento de minas vecinas en Python puro y con NumPy.
+
+Para cada tamaño se sortean las minas una vez y se mide sólo el recuento:
+  - python: suma incremental alrededor de cada mina (contar_vecinos_python),
+  - numpy:  suma de 9 cortes desplazados de la máscara de minas (contar_vecinos_numpy).
+Ambos caminos deben producir exactamente el mismo tablero.
+
+Los tamaños pueden superar el límite de las partidas (1000x1000) porque
+aquí se usa directamente TableroCompacto, sin PartidaBuscaminas.
+
+Uso:
+    python benchmarks/benchmark-vecinos.py --tamanos 9 100 1000 4000 --densidad 0.15
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_tablero import TableroCompacto, contar_vecinos_numpy, contar_vecinos_python, numpy
+
+def medir(contar, lado, posiciones, repeticiones):
+    """Mediana en milisegundos del recuento y el último tablero obtenido"""
+    tiempos = []
+    for _ in range(repeticiones):
+        tablero = TableroCompacto(lado, lado)
+        inicio = time.perf_counter()
+        contar(tablero, posiciones)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), tablero
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[9, 16, 100, 500, 1000, 2000, 4000],
+                        help="Lados de tableros cuadrados")
+    parser.add_argument("--densidad", type=float, default=0.15)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=0)
+    argumentos = parser.parse_args()
+
+    if numpy is None:
+        print("NumPy no está instalado: sólo se mide el camino en Python puro")
+
+    print(f"{'tablero':>11} {'minas':>9} {'python(ms)':>11} {'numpy(ms)':>10} {'aceleracion':>11}")
+    for lado in argumentos.tamanos:
+        total = lado * lado
+        minas = min(total // 2, int(total * argumentos.densidad))
+        posiciones = random.Random(argumentos.semilla).sample(range(total), minas)
+
+        tiempo_python, tablero_python = medir(contar_vecinos_python, lado, posiciones, argumentos.repeticiones)
+        if numpy is None:
+            print(f"{f'{lado}x{lado}':>11} {minas:>9} {tiempo_python:>11.2f} {'-':>10} {'-':>11}")
+            continue
+
+        tiempo_numpy, tablero_numpy = medir(contar_vecinos_numpy, lado, posiciones, argumentos.repeticiones)
+        assert tablero_python.celdas == tablero_numpy.celdas, "Los dos caminos no coinciden"
+        print(f"{f'{lado}x{lado}':>11} {minas:>9} {tiempo_python:>11.2f} {tiempo_numpy:>10.2f} "
+              f"{tiempo_python / tiempo_numpy:>10.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Generador de carga: simula muchos jugadores concurrentes contra un servidor de Buscaminas.
+
+Abre N conexiones con asyncio y en cada una juega partidas sin interfaz, con
+el mismo protocolo que los clientes (configuracion, protocolo, coordenada,
+bandera, fin). Al terminar una partida vuelve a conectarse para empezar otra
+hasta agotar la duración. Cada jugador puede jugar al azar o con un
+resolvedor sencillo, a un ritmo fijo de jugadas por segundo.
+
+Al final informa de jugadas por segundo, latencia de ida y vuelta (p50, p99,
+máximo), partidas ganadas y perdidas y conexiones fallidas.
+
+Uso:
+    python benchmarks/generador-carga.py --puerto 12345 --jugadores 1000 --ritmo 2 --duracion 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+DIRECTORIO_PRACTICA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_PRACTICA)
+
+from buscaminas_motor import ampliar_limite_descriptores
+from buscaminas_protocolo import CABECERA, codificar, codificar_json, decodificar_binario
+
+class Estadisticas:
+    """Contadores compartidos por todos los jugadores"""
+    def __init__(self):
+        self.jugadas = 0
+        self.latencias = []  # Milisegundos por jugada
+        self.victorias = 0
+        self.derrotas = 0
+        self.conexiones = 0
+        self.conexiones_fallidas = 0
+
+    def percentil(self, p):
+        """Percentil p (0-100) de las latencias registradas"""
+        if not self.latencias:
+            return 0.0
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+class Jugador:
+    """Estado local de una partida y elección de la siguiente jugada"""
+    def __init__(self, filas, columnas, minas, estrategia, aleatorio):
+        self.filas = filas
+        self.columnas = columnas
+        self.minas = minas
+        self.estrategia = estrategia
+        self.aleatorio = aleatorio
+        self.visible = {}  # (fila, columna) -> valor de las casillas destapadas
+        self.banderas = set()
+        self.tapadas = [(i, j) for i in range(filas) for j in range(columnas)]
+        self.seguras = set()  # Casillas deducidas como libres (resolvedor)
+        self.minas_deducidas = set()
+        self.por_revisar = set()  # Casillas con número cuyo entorno ha cambiado
+
+    def vecinos(self, fila, columna):
+        """Casillas adyacentes dentro del tablero"""
+        for i in range(max(0, fila - 1), min(self.filas, fila + 2)):
+            for j in range(max(0, columna - 1), min(self.columnas, columna + 2)):
+                if (i, j) != (fila, columna):
+                    yield i, j
+
+    def destapar(self, casillas):
+        """Apunta las casillas destapadas recibidas del servidor"""
+        for fila, columna, valor in casillas:
+            self.visible[(fila, columna)] = valor
+            self.banderas.discard((fila, columna))
+            self.seguras.discard((fila, columna))
+            if self.estrategia == "resolvedor":
+                self.por_revisar.add((fila, columna))
+                self.por_revisar.update(c for c in self.vecinos(fila, columna) if c in self.visible)
+
+    def deducir(self):
+        """Reglas básicas: si el número ya está cubierto por minas, el resto es seguro; si faltan
+        tantas minas como casillas tapadas, todas son minas"""
+        while self.por_revisar:
+            casilla = self.por_revisar.pop()
+            valor = self.visible[casilla]
+            tapadas = [c for c in self.vecinos(*casilla) if c not in self.visible]
+            conocidas = [c for c in tapadas if c in self.minas_deducidas]
+            if len(conocidas) == valor:
+                self.seguras.update(c for c in tapadas if c not in self.minas_deducidas)
+            elif len(tapadas) == valor:
+                for c in tapadas:
+                    if c not in self.minas_deducidas:
+                        self.minas_deducidas.add(c)
+                        self.por_revisar.update(v for v in self.vecinos(*c) if v in self.visible)
+
+    def siguiente_jugada(self):
+        """Mensaje de la próxima jugada: una coordenada o una bandera"""
+        if self.estrategia == "resolvedor":
+            self.deducir()
+            for mina in self.minas_deducidas:
+                if mina not in self.banderas and mina not in self.visible:
+                    return {"tipo": "bandera", "accion": "colocar", "fila": mina[0], "columna": mina[1]}
+            while self.seguras:
+                fila, columna = self.seguras.pop()
+                if (fila, columna) not in self.visible:
+                    return {"tipo": "coordenada", "fila": fila, "columna": columna}
+        elif self.aleatorio.random() < 0.1:
+            # Al azar, una de cada diez jugadas alterna una bandera
+            fila, columna = self.casilla_tapada()
+            accion = "retirar" if (fila, columna) in self.banderas else "colocar"
+            return {"tipo": "bandera", "accion": accion, "fila": fila, "columna": columna}
+
+        fila, columna = self.casilla_tapada(evitar=self.banderas | self.minas_deducidas)
+        return {"tipo": "coordenada", "fila": fila, "columna": columna}
+
+    def casilla_tapada(self, evitar=()):
+        """Casilla tapada al azar (compactando la lista de candidatas sobre la marcha)"""
+        while True:
+            indice = self.aleatorio.randrange(len(self.tapadas))
+            casilla = self.tapadas[indice]
+            if casilla in self.visible:
+                self.tapadas[indice] = self.tapadas[-1]
+                self.tapadas.pop()
+                continue
+            if casilla in evitar and len(evitar) < len(self.tapadas):
+                continue
+            return casilla
+
+async def leer_mensaje(lector, binario):
+    """Lee un mensaje del servidor en el protocolo negociado"""
+    if binario:
+        tipo, longitud = CABECERA.unpack(await lector.readexactly(CABECERA.size))
+        return decodificar_binario(tipo, await lector.readexactly(longitud))
+    linea = await lector.readline()
+    if not linea:
+        raise ConnectionError("Conexión cerrada por el servidor")
+    return json.loads(linea)
+
+async def jugar_partida(argumentos, estadisticas, semaforo, aleatorio, limite):
+    """Juega una partida completa en una conexión nueva; False si la conexión falla"""
+    try:
+        # Limitar las conexiones en curso para no desbordar la cola de accept del servidor
+        async with semaforo:
+            lector, escritor = await asyncio.open_connection(argumentos.ip, argumentos.puerto, limit=2 ** 24)
+    except OSError:
+        estadisticas.conexiones_fallidas += 1
+        return False
+    estadisticas.conexiones += 1
+
+    try:
+        configuracion = json.loads(await lector.readline())
+        capacidades = [c for c in ("casillas_libres", "binario", "minas")
+                       if c in configuracion.get("capacidades", [])]
+        if not argumentos.binario and "binario" in capacidades:
+            capacidades.remove("binario")
+        if "casillas_libres" not in capacidades:
+            raise ConnectionError("El servidor no admite casillas_libres")
+        escritor.write(codificar_json({"tipo": "protocolo", "capacidades": capacidades}))
+        binario = "binario" in capacidades
+
+        jugador = Jugador(configuracion["filas"], configuracion["columnas"], configuracion["minas"],
+                          argumentos.estrategia, aleatorio)
+        libres = jugador.filas * jugador.columnas - jugador.minas
+        pausa = 1 / argumentos.ritmo if argumentos.ritmo > 0 else 0
+
+        while time.monotonic() < limite:
+            jugada = jugador.siguiente_jugada()
+            inicio = time.perf_counter()
+            escritor.write(codificar(jugada, binario))
+            await escritor.drain()
+            respuesta = await leer_mensaje(lector, binario)
+            estadisticas.latencias.append((time.perf_counter() - inicio) * 1000)
+            estadisticas.jugadas += 1
+
+            estado = respuesta.get("estado")
+            if estado == "casillas_libres":
+                jugador.destapar(respuesta["casillas"])
+            elif estado == "bandera_colocada":
+                jugador.banderas.add((respuesta["fila"], respuesta["columna"]))
+            elif estado == "bandera_retirada":
+                jugador.banderas.discard((respuesta["fila"], respuesta["columna"]))
+
+            if estado == "mina_pisada" or len(jugador.visible) == libres:
+                fin = await leer_mensaje(lector, binario)
+                if fin.get("resultado") == "victoria":
+                    estadisticas.victorias += 1
+                else:
+                    estadisticas.derrotas += 1
+                break
+
+            if pausa:
+                await asyncio.sleep(pausa)
+        return True
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        estadisticas.conexiones_fallidas += 1
+        return False
+    finally:
+        escritor.close()
+
+async def simular_jugador(argumentos, estadisticas, semaforo, numero, limite):
+    """Un jugador: partidas seguidas hasta el límite de tiempo"""
+    aleatorio = random.Random(argumentos.semilla + numero)
+    await asyncio.sleep(aleatorio.random() * argumentos.arranque)  # Repartir las primeras conexiones
+    while time.monotonic() < limite:
+        if not await jugar_partida(argumentos, estadisticas, semaforo, aleatorio, limite):
+            await asyncio.sleep(0.5)  # Esperar antes de reintentar una conexión fallida
+
+async def generar_carga(argumentos):
+    """Lanza todos los jugadores y espera a que termine la duración"""
+    estadisticas = Estadisticas()
+    semaforo = asyncio.Semaphore(500)
+    inicio = time.monotonic()
+    limite = inicio + argumentos.duracion
+    await asyncio.gather(*(simular_jugador(argumentos, estadisticas, semaforo, n, limite)
+                           for n in range(argumentos.jugadores)))
+    return estadisticas, time.monotonic() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ip", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=12345)
+    parser.add_argument("--jugadores", type=int, default=100, help="Conexiones concurrentes")
+    parser.add_argument("--ritmo", type=float, default=1.0, help="Jugadas por segundo de cada jugador (0 = sin pausa)")
+    parser.add_argument("--duracion", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--arranque", type=float, default=1.0, help="Segundos para repartir las primeras conexiones")
+    parser.add_argument("--estrategia", choices=["azar", "resolvedor"], default="resolvedor")
+    parser.add_argument("--binario", action="store_true", help="Negociar el protocolo binario si el servidor lo admite")
+    parser.add_argument("--semilla", type=int, default=0)
+    argumentos = parser.parse_args()
+
+    ampliar_limite_descriptores()
+    estadisticas, transcurrido = asyncio.run(generar_carga(argumentos))
+
+    print(f"Jugadores: {argumentos.jugadores} | ritmo: {argumentos.ritmo}/s | estrategia: {argumentos.estrategia} "
+          f"| protocolo: {'binario' if argumentos.binario else 'json'}")
+    print(f"Jugadas: {estadisticas.jugadas} ({estadisticas.jugadas / transcurrido:.1f} jugadas/s)")
+    print(f"Latencia (ms): p50 {estadisticas.percentil(50):.3f} | p99 {estadisticas.percentil(99):.3f} "
+          f"| máx {max(estadisticas.latencias, default=0):.3f}")
+    print(f"Partidas: {estadisticas.victorias} ganadas, {estadisticas.derrotas} perdidas")
+    print(f"Conexiones: {estadisticas.conexiones} abiertas, {estadisticas.conexiones_fallidas} fallidas")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
 import socket
-import json
 import os
 import sys
 import time
 import pygame
 import selectors  # Importamos el módulo selectors en lugar de threading
+import threading  # Sólo para el hilo que despierta a Pygame cuando llegan datos
+from collections import deque
+
+from buscaminas_protocolo import LectorTramas, codificar
+from buscaminas_vista import CELDA_MINIMA, LADO_TABLERO, PENDIENTE, VistaTablero, calcular_tamano_celda
+
+# Evento de Pygame que indica que el socket tiene datos que leer
+EVENTO_RED = pygame.USEREVENT
+
+# Máximo que el bucle principal duerme sin eventos (ms) y que el despertador espera en select (s)
+ESPERA_MAXIMA = 1000
+ESPERA_SELECTOR = 0.5
+
+# Casillas que como mucho se prevén por jugada en el modo optimista
+LIMITE_ESPECULACION = 256
 
 class BuscaminasClientePygame:
     def __init__(self):
@@ -17,7 +31,8 @@ class BuscaminasClientePygame:
         self.puerto_servidor = 0
         self.juego_terminado = False
         self.dificultad = ""
-        self.buffer = ""  # Buffer para almacenar datos recibidos
+        self.lector = LectorTramas()  # Buffer de recepción con enmarcado sin copias
+        self.binario = False  # True tras negociar las tramas binarias con el servidor
         self.procesar_multiples_respuestas = False  # Flag para controlar el procesamiento de múltiples respuestas
         
         # Variables de Pygame
@@ -27,6 +42,7 @@ class BuscaminasClientePygame:
         self.pantalla = None
         self.fuente = None
         self.fuente_grande = None
+        self.vista = None  # VistaTablero: repinta sólo las casillas que cambian
         
         # Colores
         self.colores = {
@@ -60,15 +76,31 @@ class BuscaminasClientePygame:
         
         # Selector para E/S no bloqueante (reemplaza threads)
         self.selector = selectors.DefaultSelector()
+        
+        # Despertador: espera en el selector y avisa al bucle de Pygame con un EVENTO_RED;
+        # no vuelve a esperar hasta que el bucle ha leído los datos (red_atendida)
+        self.thread_despertador = None
+        self.red_atendida = threading.Event()
+
+        # Modo optimista: al hacer clic se dibuja enseguida lo que ya se deduce de los
+        # números visibles y la respuesta del servidor lo confirma o lo corrige
+        self.optimista = True
+        self.jugadas_pendientes = deque()  # ((fila, columna), previsión) enviadas y sin respuesta
+        self.especuladas = {}  # (fila, columna) -> valor previsto, o None si sólo está pendiente
+        self.cache_minas = {}  # Resultados de mina_deducida durante una especulación
 
     def inicializar_pygame(self):
         """Inicializa Pygame y configura la pantalla"""
+        # Reducir las celdas para que los tableros grandes quepan en pantalla
+        self.tamano_celda = calcular_tamano_celda(self.filas, self.columnas)
         self.ancho_pantalla = self.columnas * self.tamano_celda + 20
         self.alto_pantalla = self.filas * self.tamano_celda + 100  # Espacio extra para mensajes
         self.pantalla = pygame.display.set_mode((self.ancho_pantalla, self.alto_pantalla))
         pygame.display.set_caption(f"Buscaminas Cliente - {self.dificultad}")
         self.fuente = pygame.font.SysFont("Arial", 18)
-        self.fuente_grande = pygame.font.SysFont("Arial", 24, bold=True)
+        self.fuente_grande = pygame.font.SysFont("Arial", max(6, self.tamano_celda * 3 // 5), bold=True)
+        self.vista = VistaTablero(self.pantalla, self.filas, self.columnas, self.tamano_celda,
+                                  self.colores, self.fuente, self.fuente_grande)
 
     def configurar_conexion(self):
         """Configura la conexión al servidor utilizando Pygame"""
@@ -204,24 +236,20 @@ class BuscaminasClientePygame:
             # Establecer un timeout para evitar bloqueo infinito
             self.cliente_socket.settimeout(5.0)
             
-            # Recibir datos hasta encontrar un carácter de nueva línea
-            buffer = ""
-            while '\n' not in buffer:
-                chunk = self.cliente_socket.recv(4096).decode('utf-8')
-                if not chunk:
-                    raise Exception("Conexión cerrada por el servidor")
-                buffer += chunk
+            # Recibir datos hasta tener la primera línea JSON completa (el resto queda en el buffer)
+            self.lector = LectorTramas()
+            mensaje = self.lector.leer_mensaje(self.cliente_socket)
             
             # Restaurar el comportamiento de bloqueo para luego cambiarlo a no bloqueante
             self.cliente_socket.settimeout(None)
             
-            # Extraer el mensaje completo y guardar el resto en el buffer
-            mensaje_json, resto = buffer.split('\n', 1)
-            self.buffer = resto
-            
-            mensaje = json.loads(mensaje_json)
-            
             if mensaje["tipo"] == "configuracion":
+                # Un tablero que no cabe en la ventana ni con las casillas más pequeñas no se puede jugar aquí
+                if not calcular_tamano_celda(mensaje["filas"], mensaje["columnas"]):
+                    self.mensaje_estado = (f"Tablero de {mensaje['filas']}x{mensaje['columnas']} demasiado grande "
+                                           f"para mostrarlo (máximo {LADO_TABLERO // CELDA_MINIMA} casillas por lado)")
+                    return False
+                
                 self.dificultad = mensaje["dificultad"]
                 self.filas = mensaje["filas"]
                 self.columnas = mensaje["columnas"]
@@ -236,6 +264,14 @@ class BuscaminasClientePygame:
                 self.inicializar_pygame()
                 
                 self.mensaje_estado = f"Juego configurado con dificultad: {self.dificultad}"
+                
+                # Pedir la cascada en un único mensaje, tramas binarias y sólo las minas al perder
+                capacidades = [c for c in ("casillas_libres", "binario", "minas")
+                               if c in mensaje.get("capacidades", [])]
+                if capacidades:
+                    self.enviar_mensaje({"tipo": "protocolo", "capacidades": capacidades})
+                    # A partir de aquí el servidor responde con el protocolo negociado
+                    self.binario = "binario" in capacidades
                 return True
             else:
                 self.mensaje_estado = "Error: No se recibió configuración inicial"
@@ -248,10 +284,9 @@ class BuscaminasClientePygame:
             return False
 
     def enviar_mensaje(self, mensaje):
-        """Envía un mensaje al servidor en formato JSON"""
+        """Envía un mensaje al servidor con el protocolo negociado (JSON por defecto)"""
         try:
-            mensaje_json = json.dumps(mensaje)
-            self.cliente_socket.sendall((mensaje_json + '\n').encode('utf-8'))
+            self.cliente_socket.sendall(codificar(mensaje, self.binario))
             return True
         except Exception as e:
             self.mensaje_estado = f"Error al enviar mensaje: {e}"
@@ -261,28 +296,24 @@ class BuscaminasClientePygame:
     def procesar_mensaje(self, sock, mask):
         """Procesa mensajes entrantes del servidor cuando están disponibles"""
         try:
-            # Leer datos disponibles
-            datos = sock.recv(4096).decode('utf-8')
-            if not datos:
+            # Leer datos disponibles directamente en el buffer
+            if not self.lector.recibir(sock):
                 # Si no hay datos, el servidor cerró la conexión
                 self.mensaje_estado = "Conexión cerrada por el servidor"
                 self.selector.unregister(sock)
                 sock.close()
                 return
             
-            # Añadir datos al buffer
-            self.buffer += datos
-            
             # Procesar todos los mensajes completos en el buffer
-            while '\n' in self.buffer:
-                # Extraer un mensaje completo
-                mensaje_json, self.buffer = self.buffer.split('\n', 1)
-                
+            while True:
                 try:
-                    mensaje = json.loads(mensaje_json)
-                    self.manejar_mensaje(mensaje)
-                except json.JSONDecodeError as e:
-                    self.mensaje_estado = f"Error al decodificar JSON: {e}"
+                    mensaje = self.lector.extraer(self.binario)
+                except ValueError as e:
+                    self.mensaje_estado = f"Error al decodificar mensaje: {e}"
+                    continue
+                if mensaje is None:
+                    break
+                self.manejar_mensaje(mensaje)
                     
         except Exception as e:
             self.mensaje_estado = f"Error al recibir datos: {e}"
@@ -297,25 +328,24 @@ class BuscaminasClientePygame:
                 
             elif mensaje["estado"] == "casilla_libre":
                 # Actualizar casilla en el tablero local
-                valor = mensaje["valor"]
-                fila = mensaje["fila"]
-                columna = mensaje["columna"]
-                
-                # Asegurarse de que no hay una bandera en esa posición
-                self.banderas[fila][columna] = False
+                self.destapar_casilla(mensaje["fila"], mensaje["columna"], mensaje["valor"])
                 
-                # Actualizar la casilla en el tablero local
-                if valor == 0:
-                    self.tablero[fila][columna] = ' '
-                else:
-                    self.tablero[fila][columna] = str(valor)
+            elif mensaje["estado"] == "casillas_libres":
+                # Toda la cascada de una jugada llega en un solo mensaje
+                for fila, columna, valor in mensaje["casillas"]:
+                    self.destapar_casilla(fila, columna, valor)
                     
             elif mensaje["estado"] == "mina_pisada":
                 # El jugador ha perdido, actualizar tablero con todas las minas
-                for i in range(self.filas):
-                    for j in range(self.columnas):
-                        if mensaje["tablero"][i][j] == '*':
-                            self.tablero[i][j] = '*'
+                if "minas" in mensaje:
+                    # Con la capacidad "minas" sólo llegan sus coordenadas
+                    for i, j in mensaje["minas"]:
+                        self.tablero[i][j] = '*'
+                else:
+                    for i in range(self.filas):
+                        for j in range(self.columnas):
+                            if mensaje["tablero"][i][j] == '*':
+                                self.tablero[i][j] = '*'
                 
                 self.mensaje_estado = mensaje["mensaje"]
                 
@@ -345,6 +375,144 @@ class BuscaminasClientePygame:
                 self.mensaje_estado = "¡BOOM! Has perdido."
             
             self.mensaje_estado += f" Duración: {mensaje['duracion']} segundos"
+        
+        # Repintar en el siguiente frame sólo las casillas que ha cambiado el mensaje
+        self.vista.marcar_respuestas((mensaje,))
+        self.reconciliar(mensaje)
+
+    def reconciliar(self, mensaje):
+        """Da por resueltas las jugadas optimistas a las que responde un mensaje.
+
+        El servidor responde a las jugadas en orden: casillas_libres o
+        casilla_ocupada resuelven la más antigua y un casilla_libre la resuelve
+        si es su casilla (la primera de la cascada); al pisar una mina o
+        terminar se resuelven todas. Lo previsto que el servidor no haya
+        destapado se vuelve a dibujar tapado.
+        """
+        if not self.jugadas_pendientes:
+            return
+        estado = mensaje.get("estado")
+        if mensaje["tipo"] == "fin" or estado == "mina_pisada":
+            resueltas = len(self.jugadas_pendientes)
+        elif estado in ("casillas_libres", "casilla_ocupada"):
+            resueltas = 1
+        elif estado == "casilla_libre" and self.jugadas_pendientes[0][0] == (mensaje["fila"], mensaje["columna"]):
+            resueltas = 1
+        else:
+            return
+
+        for _ in range(resueltas):
+            _, prevision = self.jugadas_pendientes.popleft()
+            for fila, columna in prevision:
+                self.vista.marcar(fila, columna)
+        # Rehacer las previsiones con las jugadas que siguen sin respuesta
+        self.especuladas = {}
+        for _, prevision in self.jugadas_pendientes:
+            self.especuladas.update(prevision)
+
+    def contenido_visible(self, fila, columna):
+        """Lo que se dibuja en una casilla: lo confirmado por el servidor o, si falta, lo previsto"""
+        contenido = self.tablero[fila][columna]
+        if contenido != '□' or (fila, columna) not in self.especuladas:
+            return contenido
+        valor = self.especuladas[(fila, columna)]
+        if valor is None:
+            return PENDIENTE
+        return ' ' if valor == 0 else str(valor)
+
+    def vecinas(self, fila, columna):
+        """Coordenadas de las casillas adyacentes dentro del tablero"""
+        return [(i, j)
+                for i in range(max(fila - 1, 0), min(fila + 2, self.filas))
+                for j in range(max(columna - 1, 0), min(columna + 2, self.columnas))
+                if (i, j) != (fila, columna)]
+
+    def valor_visible(self, fila, columna):
+        """Minas vecinas de una casilla destapada, o None si está tapada o es una mina"""
+        contenido = self.tablero[fila][columna]
+        if contenido in ('□', '*'):
+            return None
+        return 0 if contenido == ' ' else int(contenido)
+
+    def mina_deducida(self, fila, columna):
+        """True si algún número vecino tiene tantas casillas tapadas alrededor como minas"""
+        casilla = (fila, columna)
+        if casilla not in self.cache_minas:
+            self.cache_minas[casilla] = False
+            for i, j in self.vecinas(fila, columna):
+                valor = self.valor_visible(i, j)
+                if valor and valor == sum(1 for a, b in self.vecinas(i, j) if self.tablero[a][b] == '□'):
+                    self.cache_minas[casilla] = True
+                    break
+        return self.cache_minas[casilla]
+
+    def libre_deducida(self, fila, columna):
+        """True si la casilla está destapada o los números visibles prueban que no es una mina"""
+        if self.tablero[fila][columna] != '□':
+            return True
+        if self.mina_deducida(fila, columna):
+            return False
+        for i, j in self.vecinas(fila, columna):
+            valor = self.valor_visible(i, j)
+            if valor is None:
+                continue
+            # Un número con todas sus minas ya deducidas deja libres al resto de sus vecinas tapadas
+            minas = sum(1 for a, b in self.vecinas(i, j) if self.tablero[a][b] == '□' and self.mina_deducida(a, b))
+            if minas == valor:
+                return True
+        return False
+
+    def prever_valor(self, fila, columna, seguras):
+        """Valor de una casilla que no es mina, o None si no se deduce de lo visible"""
+        minas = 0
+        for vecina in self.vecinas(fila, columna):
+            if vecina in seguras or self.libre_deducida(*vecina):
+                continue
+            if not self.mina_deducida(*vecina):
+                return None
+            minas += 1
+        return minas
+
+    def especular(self, fila, columna):
+        """Previsión de lo que destapará una jugada: {(fila, columna): valor, o None si no se sabe}.
+
+        Sólo usa los números ya visibles, así que el cliente nunca necesita
+        saber dónde están las minas. Si no se puede probar que la casilla está
+        libre sólo queda pendiente; si lo está y todas sus vecinas están
+        clasificadas se prevé su valor y, con un 0, la cascada igual que el
+        servidor: las vecinas de un 0 nunca son minas.
+        """
+        self.cache_minas = {}  # El tablero no cambia durante la especulación
+        if not self.libre_deducida(fila, columna):
+            return {(fila, columna): None}
+
+        prevision = {}
+        seguras = {(fila, columna)}
+        frontera = deque([(fila, columna)])
+        while frontera and len(prevision) < LIMITE_ESPECULACION:
+            casilla = frontera.popleft()
+            valor = self.prever_valor(*casilla, seguras)
+            prevision[casilla] = valor
+            if valor == 0:
+                for vecina in self.vecinas(*casilla):
+                    if vecina not in seguras and self.tablero[vecina[0]][vecina[1]] == '□':
+                        seguras.add(vecina)
+                        frontera.append(vecina)
+        # Las que se salen del límite se destaparán igualmente: quedan pendientes
+        for casilla in seguras:
+            prevision.setdefault(casilla, None)
+        return prevision
+
+    def destapar_casilla(self, fila, columna, valor):
+        """Marca una casilla como destapada en el tablero local"""
+        # Asegurarse de que no hay una bandera en esa posición
+        self.banderas[fila][columna] = False
+        
+        # Actualizar la casilla en el tablero local
+        if valor == 0:
+            self.tablero[fila][columna] = ' '
+        else:
+            self.tablero[fila][columna] = str(valor)
 
     def enviar_coordenada(self, fila, columna):
         """Envía una coordenada al servidor"""
@@ -363,6 +531,11 @@ class BuscaminasClientePygame:
             self.mensaje_estado = "No puedes destapar una casilla con bandera."
             return False
         
+        # Validar que no se esté esperando ya la respuesta de esa casilla
+        if (fila, columna) in self.especuladas:
+            self.mensaje_estado = "Esperando la respuesta del servidor para esta casilla."
+            return False
+        
         # Enviar coordenadas al servidor
         coordenada = {
             "tipo": "coordenada",
@@ -370,7 +543,17 @@ class BuscaminasClientePygame:
             "columna": columna
         }
         
-        return self.enviar_mensaje(coordenada)
+        if not self.enviar_mensaje(coordenada):
+            return False
+        
+        # Modo optimista: dibujar ya lo previsto sin esperar la ida y vuelta
+        if self.optimista:
+            prevision = self.especular(fila, columna)
+            self.jugadas_pendientes.append(((fila, columna), prevision))
+            self.especuladas.update(prevision)
+            for casilla in prevision:
+                self.vista.marcar(*casilla)
+        return True
 
     def alternar_bandera(self, fila, columna):
         """Alterna la colocación/retirada de una bandera"""
@@ -384,6 +567,11 @@ class BuscaminasClientePygame:
             self.mensaje_estado = "No puedes poner una bandera en una casilla destapada."
             return False
         
+        # Validar que no se esté esperando la respuesta de esa casilla
+        if (fila, columna) in self.especuladas:
+            self.mensaje_estado = "Esperando la respuesta del servidor para esta casilla."
+            return False
+        
         # Crear mensaje según el estado actual de la bandera
         if not self.banderas[fila][columna]:
             # Colocar bandera
@@ -417,20 +605,30 @@ class BuscaminasClientePygame:
                     pygame.quit()
                     return
             
-            # Bucle principal del juego
-            reloj = pygame.time.Clock()
+            # Bucle principal del juego: duerme hasta que hay un evento de Pygame,
+            # llegan datos del servidor o cambia algo que se muestra con el reloj
             ejecutando = True
             
             instrucciones_mostradas = True
+            instrucciones_dibujadas = False
             tiempo_instrucciones = pygame.time.get_ticks()
+            self.iniciar_despertador()
             
             while ejecutando:
+                espera = self.milisegundos_hasta_cambio(
+                    tiempo_instrucciones + 5000 - pygame.time.get_ticks() if instrucciones_mostradas else None)
+                eventos = [pygame.event.wait(espera)] + pygame.event.get()
+                
                 # Procesar eventos de Pygame
-                for evento in pygame.event.get():
+                for evento in eventos:
                     if evento.type == pygame.QUIT:
                         ejecutando = False
                         break
                     
+                    # Datos del servidor: leerlos ahora, en el hilo de Pygame
+                    elif evento.type == EVENTO_RED:
+                        self.atender_red()
+                    
                     # Procesar clicks solo si el juego está en curso
                     elif not self.juego_terminado and self.cliente_socket:
                         if evento.type == pygame.MOUSEBUTTONDOWN:
@@ -453,115 +651,105 @@ class BuscaminasClientePygame:
                                     elif evento.button == 3:
                                         self.alternar_bandera(fila, col)
                 
-                # Verificar mensajes del servidor solo si hay conexión activa
-                if self.cliente_socket:
-                    try:
-                        # Intentar procesar eventos del selector con manejo de errores
-                        eventos = self.selector.select(0)  # Timeout de 0 para que no bloquee
-                        for key, mask in eventos:
-                            callback = key.data
-                            callback(key.fileobj, mask)
-                    except (OSError, ValueError, Exception) as e:
-                        # Manejar cualquier error con el socket o selector
-                        self.mensaje_estado = f"Error de conexión: {str(e)}"
-                        self.desconectar()  # Desconectar limpiamente
-                
-                # Actualizar pantalla
-                self.pantalla.fill(self.colores["fondo"])
+                # Actualizar pantalla: sólo lo que ha cambiado desde el frame anterior
+                rectangulos = []
                 
                 # Mostrar instrucciones por 5 segundos al inicio
                 if instrucciones_mostradas and pygame.time.get_ticks() - tiempo_instrucciones < 5000:
-                    texto_instrucciones = [
-                        "¡Bienvenido a Buscaminas!",
-                        "Instrucciones:",
-                        "- Botón izquierdo: Destapar casilla",
-                        "- Botón derecho: Colocar/quitar bandera",
-                        "- Evita las minas",
-                        "- Los números indican minas adyacentes"
-                    ]
-                    
-                    for i, linea in enumerate(texto_instrucciones):
-                        texto = self.fuente.render(linea, True, (0, 0, 0))
-                        self.pantalla.blit(texto, (self.ancho_pantalla // 2 - texto.get_width() // 2, 
-                                                20 + i * 20))
+                    if not instrucciones_dibujadas:
+                        rectangulos.append(self.vista.borrar())
+                        texto_instrucciones = [
+                            "¡Bienvenido a Buscaminas!",
+                            "Instrucciones:",
+                            "- Botón izquierdo: Destapar casilla",
+                            "- Botón derecho: Colocar/quitar bandera",
+                            "- Evita las minas",
+                            "- Los números indican minas adyacentes"
+                        ]
+                        
+                        for i, linea in enumerate(texto_instrucciones):
+                            texto = self.fuente.render(linea, True, (0, 0, 0))
+                            self.pantalla.blit(texto, (self.ancho_pantalla // 2 - texto.get_width() // 2, 
+                                                    20 + i * 20))
+                        instrucciones_dibujadas = True
                 else:
+                    # Al quitar las instrucciones la vista repinta el tablero entero una vez
                     instrucciones_mostradas = False
-                    
-                    # Dibujar tablero
-                    for fila in range(self.filas):
-                        for col in range(self.columnas):
-                            x = col * self.tamano_celda + 10
-                            y = fila * self.tamano_celda + 10
-                            
-                            # Dibujar celda según estado
-                            if self.tablero[fila][col] == '□':
-                                pygame.draw.rect(self.pantalla, self.colores["celda"], 
-                                                (x, y, self.tamano_celda, self.tamano_celda))
-                                
-                                # Dibujar bandera si existe
-                                if self.banderas[fila][col]:
-                                    # Dibujar un triángulo rojo como bandera
-                                    puntos = [
-                                        (x + self.tamano_celda // 2, y + self.tamano_celda // 4),
-                                        (x + self.tamano_celda * 3 // 4, y + self.tamano_celda // 2),
-                                        (x + self.tamano_celda // 2, y + self.tamano_celda * 3 // 4)
-                                    ]
-                                    pygame.draw.polygon(self.pantalla, self.colores["bandera"], puntos)
-                                    
-                                    # Mástil de la bandera
-                                    pygame.draw.line(self.pantalla, (0, 0, 0), 
-                                                (x + self.tamano_celda // 2, y + self.tamano_celda // 4),
-                                                (x + self.tamano_celda // 2, y + self.tamano_celda * 3 // 4),
-                                                2)
-                            else:
-                                pygame.draw.rect(self.pantalla, self.colores["celda_visible"], 
-                                                (x, y, self.tamano_celda, self.tamano_celda))
-                                
-                                # Dibujar contenido
-                                if self.tablero[fila][col] == '*':
-                                    # Mina
-                                    pygame.draw.circle(self.pantalla, self.colores["mina"], 
-                                                    (x + self.tamano_celda // 2, y + self.tamano_celda // 2), 
-                                                    self.tamano_celda // 3)
-                                elif self.tablero[fila][col] != ' ':
-                                    # Número
-                                    valor = int(self.tablero[fila][col])
-                                    texto = self.fuente_grande.render(str(valor), True, 
-                                                                self.colores["texto"][valor])
-                                    self.pantalla.blit(texto, 
-                                                    (x + self.tamano_celda // 2 - texto.get_width() // 2, 
-                                                    y + self.tamano_celda // 2 - texto.get_height() // 2))
-                            
-                            # Dibujar borde
-                            pygame.draw.rect(self.pantalla, self.colores["grid"], 
-                                            (x, y, self.tamano_celda, self.tamano_celda), 1)
+                    rectangulos.extend(self.vista.repintar(self.contenido_visible,
+                                                           lambda fila, col: self.banderas[fila][col]))
                 
                 # Mostrar estado
-                texto_estado = self.fuente.render(self.mensaje_estado, True, (0, 0, 0))
-                self.pantalla.blit(texto_estado, (10, self.alto_pantalla - 80))
+                rectangulos.append(self.vista.dibujar_texto("estado", self.mensaje_estado,
+                                                            (10, self.alto_pantalla - 80)))
                 
                 # Mostrar contador de banderas
                 if self.minas > 0:  # Asumiendo que el servidor envía el número de minas
-                    texto_banderas = self.fuente.render(f"Banderas: {self.banderas_colocadas}", True, (0, 0, 0))
-                    self.pantalla.blit(texto_banderas, (10, self.alto_pantalla - 55))
+                    rectangulos.append(self.vista.dibujar_texto("banderas", f"Banderas: {self.banderas_colocadas}",
+                                                                (10, self.alto_pantalla - 55)))
                 
                 # Mostrar tiempo de juego
                 if self.tiempo_inicio > 0 and not self.juego_terminado:
                     self.tiempo_transcurrido = int(time.time() - self.tiempo_inicio)
-                    texto_tiempo = self.fuente.render(f"Tiempo: {self.tiempo_transcurrido} segundos", True, (0, 0, 0))
-                    self.pantalla.blit(texto_tiempo, (10, self.alto_pantalla - 30))
+                    texto_tiempo = f"Tiempo: {self.tiempo_transcurrido} segundos"
                 elif self.juego_terminado:
-                    texto_tiempo = self.fuente.render(f"Tiempo final: {self.duracion_final} segundos", True, (0, 0, 0))
-                    self.pantalla.blit(texto_tiempo, (10, self.alto_pantalla - 30))
+                    texto_tiempo = f"Tiempo final: {self.duracion_final} segundos"
+                else:
+                    texto_tiempo = ""
+                rectangulos.append(self.vista.dibujar_texto("tiempo", texto_tiempo, (10, self.alto_pantalla - 30)))
                 
-                # Actualizar pantalla
-                pygame.display.flip()
-                reloj.tick(30)
+                # Sin cambios no se toca la pantalla
+                rectangulos = [rect for rect in rectangulos if rect is not None]
+                if rectangulos:
+                    pygame.display.update(rectangulos)
             
             # Desconectar limpiamente antes de salir
             self.desconectar()
             pygame.quit()
 
+    def milisegundos_hasta_cambio(self, hasta_instrucciones=None):
+        """Cuánto puede dormir el bucle: hasta el siguiente segundo del cronómetro o el fin de las instrucciones"""
+        espera = ESPERA_MAXIMA
+        if hasta_instrucciones is not None:
+            espera = min(espera, hasta_instrucciones)
+        if self.tiempo_inicio > 0 and not self.juego_terminado:
+            transcurrido = time.time() - self.tiempo_inicio
+            espera = min(espera, int((1 - transcurrido % 1) * 1000) + 1)
+        # pygame.event.wait(0) esperaría sin límite
+        return max(1, espera)
+
+    def iniciar_despertador(self):
+        """Arranca el hilo que despierta al bucle de Pygame cuando el socket tiene datos"""
+        self.red_atendida.set()
+        self.thread_despertador = threading.Thread(target=self.despertar_con_red, daemon=True)
+        self.thread_despertador.start()
+
+    def despertar_con_red(self):
+        """Hilo despertador: sólo espera en el selector; la lectura la hace el hilo de Pygame"""
+        while self.cliente_socket is not None and self.selector.get_map():
+            self.red_atendida.wait()
+            try:
+                listos = self.selector.select(ESPERA_SELECTOR)
+            except (OSError, ValueError):
+                return  # Selector o socket cerrados al desconectar
+            if listos:
+                self.red_atendida.clear()
+                pygame.event.post(pygame.event.Event(EVENTO_RED))
+
+    def atender_red(self):
+        """Procesa los datos pendientes del servidor y deja que el despertador vuelva a esperar"""
+        if self.cliente_socket:
+            try:
+                # Intentar procesar eventos del selector con manejo de errores
+                eventos = self.selector.select(0)  # Timeout de 0 para que no bloquee
+                for key, mask in eventos:
+                    callback = key.data
+                    callback(key.fileobj, mask)
+            except (OSError, ValueError, Exception) as e:
+                # Manejar cualquier error con el socket o selector
+                self.mensaje_estado = f"Error de conexión: {str(e)}"
+                self.desconectar()  # Desconectar limpiamente
+        self.red_atendida.set()
+
     def desconectar(self):
         """Cierra la conexión con el servidor"""
         if self.cliente_socket:
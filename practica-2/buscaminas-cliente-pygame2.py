@@ -6,6 +6,9 @@ import time
 import pygame
 import threading
 
+from buscaminas_protocolo import LectorTramas
+from buscaminas_vista import CELDA_MINIMA, LADO_TABLERO, VistaTablero, calcular_tamano_celda
+
 class BuscaminasClientePygame:
     def __init__(self):
         self.tablero = []
@@ -17,7 +20,7 @@ class BuscaminasClientePygame:
         self.puerto_servidor = 0
         self.juego_terminado = False
         self.dificultad = ""
-        self.buffer = ""  # Buffer para almacenar datos recibidos
+        self.lector = LectorTramas()  # Buffer de recepción con enmarcado sin copias
         self.procesar_multiples_respuestas = False  # Flag para controlar el procesamiento de múltiples respuestas
         
         # Variables de Pygame
@@ -27,6 +30,7 @@ class BuscaminasClientePygame:
         self.pantalla = None
         self.fuente = None
         self.fuente_grande = None
+        self.vista = None  # VistaTablero: repinta sólo las casillas que cambian
         
         # Colores
         self.colores = {
@@ -61,12 +65,16 @@ class BuscaminasClientePygame:
 
     def inicializar_pygame(self):
         """Inicializa Pygame y configura la pantalla"""
+        # Reducir las celdas para que los tableros grandes quepan en pantalla
+        self.tamano_celda = calcular_tamano_celda(self.filas, self.columnas)
         self.ancho_pantalla = self.columnas * self.tamano_celda + 20
         self.alto_pantalla = self.filas * self.tamano_celda + 100  # Espacio extra para mensajes
         self.pantalla = pygame.display.set_mode((self.ancho_pantalla, self.alto_pantalla))
         pygame.display.set_caption(f"Buscaminas Cliente - {self.dificultad}")
         self.fuente = pygame.font.SysFont("Arial", 18)
-        self.fuente_grande = pygame.font.SysFont("Arial", 24, bold=True)
+        self.fuente_grande = pygame.font.SysFont("Arial", max(6, self.tamano_celda * 3 // 5), bold=True)
+        self.vista = VistaTablero(self.pantalla, self.filas, self.columnas, self.tamano_celda,
+                                  self.colores, self.fuente, self.fuente_grande)
 
     def configurar_conexion(self):
         """Configura la conexión al servidor utilizando Pygame"""
@@ -200,24 +208,20 @@ class BuscaminasClientePygame:
             # Establecer un timeout para evitar bloqueo infinito
             self.cliente_socket.settimeout(5.0)
             
-            # Recibir datos hasta encontrar un carácter de nueva línea
-            buffer = ""
-            while '\n' not in buffer:
-                chunk = self.cliente_socket.recv(4096).decode('utf-8')
-                if not chunk:
-                    raise Exception("Conexión cerrada por el servidor")
-                buffer += chunk
+            # Recibir datos hasta tener la primera línea completa (el resto queda en el buffer)
+            self.lector = LectorTramas()
+            mensaje = self.lector.leer_mensaje(self.cliente_socket)
             
             # Restaurar el comportamiento de bloqueo
             self.cliente_socket.settimeout(None)
             
-            # Extraer el mensaje completo y guardar el resto en el buffer
-            mensaje_json, resto = buffer.split('\n', 1)
-            self.buffer = resto
-            
-            mensaje = json.loads(mensaje_json)
-            
             if mensaje["tipo"] == "configuracion":
+                # Un tablero que no cabe en la ventana ni con las casillas más pequeñas no se puede jugar aquí
+                if not calcular_tamano_celda(mensaje["filas"], mensaje["columnas"]):
+                    self.mensaje_estado = (f"Tablero de {mensaje['filas']}x{mensaje['columnas']} demasiado grande "
+                                           f"para mostrarlo (máximo {LADO_TABLERO // CELDA_MINIMA} casillas por lado)")
+                    return False
+                
                 self.dificultad = mensaje["dificultad"]
                 self.filas = mensaje["filas"]
                 self.columnas = mensaje["columnas"]
@@ -232,6 +236,11 @@ class BuscaminasClientePygame:
                 self.inicializar_pygame()
                 
                 self.mensaje_estado = f"Juego configurado con dificultad: {self.dificultad}"
+                
+                # Pedir la cascada en un único mensaje y sólo las minas al perder si el servidor lo admite
+                capacidades = [c for c in ("casillas_libres", "minas") if c in mensaje.get("capacidades", [])]
+                if capacidades:
+                    self.enviar_mensaje({"tipo": "protocolo", "capacidades": capacidades})
                 return True
             else:
                 self.mensaje_estado = "Error: No se recibió configuración inicial"
@@ -247,7 +256,7 @@ class BuscaminasClientePygame:
         """Envía un mensaje al servidor en formato JSON"""
         try:
             mensaje_json = json.dumps(mensaje)
-            self.cliente_socket.sendall(mensaje_json.encode('utf-8'))
+            self.cliente_socket.sendall((mensaje_json + '\n').encode('utf-8'))
             return True
         except Exception as e:
             self.mensaje_estado = f"Error al enviar mensaje: {e}"
@@ -256,30 +265,12 @@ class BuscaminasClientePygame:
     def recibir_mensaje(self):
         """Recibe un mensaje del servidor en formato JSON"""
         try:
-            # Si el buffer ya tiene un mensaje completo, extraerlo
-            if '\n' in self.buffer:
-                mensaje_json, self.buffer = self.buffer.split('\n', 1)
-                return json.loads(mensaje_json)
-            
-            # Si no hay mensaje completo, recibir más datos
-            datos = ""
-            while '\n' not in self.buffer:
-                datos = self.cliente_socket.recv(4096).decode('utf-8')
-                if not datos:
-                    raise Exception("Conexión cerrada por el servidor")
-                self.buffer += datos
-                
-                # Verificar si ya tenemos un mensaje completo
-                if '\n' in self.buffer:
-                    break
-            
-            # Extraer un mensaje completo
-            mensaje_json, self.buffer = self.buffer.split('\n', 1)
-            return json.loads(mensaje_json)
+            # Devuelve un mensaje ya recibido o espera (recv_into) hasta completar uno
+            return self.lector.leer_mensaje(self.cliente_socket)
                 
         except json.JSONDecodeError as e:
             self.mensaje_estado = f"Error al decodificar JSON: {e}"
-            self.buffer = ""  # Limpiar buffer en caso de error
+            self.lector.descartar()  # Limpiar buffer en caso de error
             raise
         except Exception as e:
             self.mensaje_estado = f"Error al recibir mensaje: {e}"
@@ -297,25 +288,24 @@ class BuscaminasClientePygame:
                         
                     elif mensaje["estado"] == "casilla_libre":
                         # Actualizar casilla en el tablero local
-                        valor = mensaje["valor"]
-                        fila = mensaje["fila"]
-                        columna = mensaje["columna"]
+                        self.destapar_casilla(mensaje["fila"], mensaje["columna"], mensaje["valor"])
                         
-                        # Asegurarse de que no hay una bandera en esa posición
-                        self.banderas[fila][columna] = False
-                        
-                        # Actualizar la casilla en el tablero local
-                        if valor == 0:
-                            self.tablero[fila][columna] = ' '
-                        else:
-                            self.tablero[fila][columna] = str(valor)
+                    elif mensaje["estado"] == "casillas_libres":
+                        # Toda la cascada de una jugada llega en un solo mensaje
+                        for fila, columna, valor in mensaje["casillas"]:
+                            self.destapar_casilla(fila, columna, valor)
                             
                     elif mensaje["estado"] == "mina_pisada":
                         # El jugador ha perdido, actualizar tablero con todas las minas
-                        for i in range(self.filas):
-                            for j in range(self.columnas):
-                                if mensaje["tablero"][i][j] == '*':
-                                    self.tablero[i][j] = '*'
+                        if "minas" in mensaje:
+                            # Con la capacidad "minas" sólo llegan sus coordenadas
+                            for i, j in mensaje["minas"]:
+                                self.tablero[i][j] = '*'
+                        else:
+                            for i in range(self.filas):
+                                for j in range(self.columnas):
+                                    if mensaje["tablero"][i][j] == '*':
+                                        self.tablero[i][j] = '*'
                         
                         self.mensaje_estado = mensaje["mensaje"]
                         
@@ -345,11 +335,25 @@ class BuscaminasClientePygame:
                         self.mensaje_estado = "¡BOOM! Has perdido."
                     
                     self.mensaje_estado += f" Duración: {mensaje['duracion']} segundos"
+                
+                # Una vez actualizado el tablero, avisar a la vista de las casillas que cambian
+                self.vista.marcar_respuestas((mensaje,))
                     
             except Exception as e:
                 self.mensaje_estado = f"Error al recibir datos: {e}"
                 break
 
+    def destapar_casilla(self, fila, columna, valor):
+        """Marca una casilla como destapada en el tablero local"""
+        # Asegurarse de que no hay una bandera en esa posición
+        self.banderas[fila][columna] = False
+        
+        # Actualizar la casilla en el tablero local
+        if valor == 0:
+            self.tablero[fila][columna] = ' '
+        else:
+            self.tablero[fila][columna] = str(valor)
+
     def enviar_coordenada(self, fila, columna):
         """Envía una coordenada al servidor"""
         # Validar que las coordenadas estén dentro del tablero
@@ -426,6 +430,7 @@ class BuscaminasClientePygame:
             ejecutando = True
             
             instrucciones_mostradas = True
+            instrucciones_dibujadas = False
             tiempo_instrucciones = pygame.time.get_ticks()
             
             while ejecutando:
@@ -456,96 +461,56 @@ class BuscaminasClientePygame:
                                     elif evento.button == 3:
                                         self.alternar_bandera(fila, col)
                 
-                # Actualizar pantalla
-                self.pantalla.fill(self.colores["fondo"])
+                # Actualizar pantalla: sólo lo que ha cambiado desde el frame anterior
+                rectangulos = []
                 
                 # Mostrar instrucciones por 5 segundos al inicio
                 if instrucciones_mostradas and pygame.time.get_ticks() - tiempo_instrucciones < 5000:
-                    texto_instrucciones = [
-                        "¡Bienvenido a Buscaminas!",
-                        "Instrucciones:",
-                        "- Botón izquierdo: Destapar casilla",
-                        "- Botón derecho: Colocar/quitar bandera",
-                        "- Evita las minas",
-                        "- Los números indican minas adyacentes"
-                    ]
-                    
-                    for i, linea in enumerate(texto_instrucciones):
-                        texto = self.fuente.render(linea, True, (0, 0, 0))
-                        self.pantalla.blit(texto, (self.ancho_pantalla // 2 - texto.get_width() // 2, 
-                                                 20 + i * 20))
+                    if not instrucciones_dibujadas:
+                        rectangulos.append(self.vista.borrar())
+                        texto_instrucciones = [
+                            "¡Bienvenido a Buscaminas!",
+                            "Instrucciones:",
+                            "- Botón izquierdo: Destapar casilla",
+                            "- Botón derecho: Colocar/quitar bandera",
+                            "- Evita las minas",
+                            "- Los números indican minas adyacentes"
+                        ]
+                        
+                        for i, linea in enumerate(texto_instrucciones):
+                            texto = self.fuente.render(linea, True, (0, 0, 0))
+                            self.pantalla.blit(texto, (self.ancho_pantalla // 2 - texto.get_width() // 2, 
+                                                    20 + i * 20))
+                        instrucciones_dibujadas = True
                 else:
+                    # Al quitar las instrucciones la vista repinta el tablero entero una vez
                     instrucciones_mostradas = False
-                    
-                    # Dibujar tablero
-                    for fila in range(self.filas):
-                        for col in range(self.columnas):
-                            x = col * self.tamano_celda + 10
-                            y = fila * self.tamano_celda + 10
-                            
-                            # Dibujar celda según estado
-                            if self.tablero[fila][col] == '□':
-                                pygame.draw.rect(self.pantalla, self.colores["celda"], 
-                                                (x, y, self.tamano_celda, self.tamano_celda))
-                                
-                                # Dibujar bandera si existe
-                                if self.banderas[fila][col]:
-                                    # Dibujar un triángulo rojo como bandera
-                                    puntos = [
-                                        (x + self.tamano_celda // 2, y + self.tamano_celda // 4),
-                                        (x + self.tamano_celda * 3 // 4, y + self.tamano_celda // 2),
-                                        (x + self.tamano_celda // 2, y + self.tamano_celda * 3 // 4)
-                                    ]
-                                    pygame.draw.polygon(self.pantalla, self.colores["bandera"], puntos)
-                                    
-                                    # Mástil de la bandera
-                                    pygame.draw.line(self.pantalla, (0, 0, 0), 
-                                                   (x + self.tamano_celda // 2, y + self.tamano_celda // 4),
-                                                   (x + self.tamano_celda // 2, y + self.tamano_celda * 3 // 4),
-                                                   2)
-                            else:
-                                pygame.draw.rect(self.pantalla, self.colores["celda_visible"], 
-                                                (x, y, self.tamano_celda, self.tamano_celda))
-                                
-                                # Dibujar contenido
-                                if self.tablero[fila][col] == '*':
-                                    # Mina
-                                    pygame.draw.circle(self.pantalla, self.colores["mina"], 
-                                                      (x + self.tamano_celda // 2, y + self.tamano_celda // 2), 
-                                                      self.tamano_celda // 3)
-                                elif self.tablero[fila][col] != ' ':
-                                    # Número
-                                    valor = int(self.tablero[fila][col])
-                                    texto = self.fuente_grande.render(str(valor), True, 
-                                                                   self.colores["texto"][valor])
-                                    self.pantalla.blit(texto, 
-                                                      (x + self.tamano_celda // 2 - texto.get_width() // 2, 
-                                                       y + self.tamano_celda // 2 - texto.get_height() // 2))
-                            
-                            # Dibujar borde
-                            pygame.draw.rect(self.pantalla, self.colores["grid"], 
-                                            (x, y, self.tamano_celda, self.tamano_celda), 1)
+                    rectangulos.extend(self.vista.repintar(lambda fila, col: self.tablero[fila][col],
+                                                           lambda fila, col: self.banderas[fila][col]))
                 
                 # Mostrar estado
-                texto_estado = self.fuente.render(self.mensaje_estado, True, (0, 0, 0))
-                self.pantalla.blit(texto_estado, (10, self.alto_pantalla - 80))
+                rectangulos.append(self.vista.dibujar_texto("estado", self.mensaje_estado,
+                                                            (10, self.alto_pantalla - 80)))
                 
                 # Mostrar contador de banderas
                 if self.minas > 0:  # Asumiendo que el servidor envía el número de minas
-                    texto_banderas = self.fuente.render(f"Banderas: {self.banderas_colocadas}", True, (0, 0, 0))
-                    self.pantalla.blit(texto_banderas, (10, self.alto_pantalla - 55))
+                    rectangulos.append(self.vista.dibujar_texto("banderas", f"Banderas: {self.banderas_colocadas}",
+                                                                (10, self.alto_pantalla - 55)))
                 
                 # Mostrar tiempo de juego
                 if self.tiempo_inicio > 0 and not self.juego_terminado:
                     self.tiempo_transcurrido = int(time.time() - self.tiempo_inicio)
-                    texto_tiempo = self.fuente.render(f"Tiempo: {self.tiempo_transcurrido} segundos", True, (0, 0, 0))
-                    self.pantalla.blit(texto_tiempo, (10, self.alto_pantalla - 30))
+                    texto_tiempo = f"Tiempo: {self.tiempo_transcurrido} segundos"
                 elif self.juego_terminado:
-                    texto_tiempo = self.fuente.render(f"Tiempo final: {self.duracion_final} segundos", True, (0, 0, 0))
-                    self.pantalla.blit(texto_tiempo, (10, self.alto_pantalla - 30))
+                    texto_tiempo = f"Tiempo final: {self.duracion_final} segundos"
+                else:
+                    texto_tiempo = ""
+                rectangulos.append(self.vista.dibujar_texto("tiempo", texto_tiempo, (10, self.alto_pantalla - 30)))
                 
-                # Actualizar pantalla
-                pygame.display.flip()
+                # Sin cambios no se toca la pantalla
+                rectangulos = [rect for rect in rectangulos if rect is not None]
+                if rectangulos:
+                    pygame.display.update(rectangulos)
                 reloj.tick(30)
             
             pygame.quit()
@@ -1,29 +1,28 @@
-import socket
-import random
-import time
-import json
 import pygame
 import threading
 import sys
+import argparse
+
+from buscaminas_motor import agregar_argumentos_tablero, resolver_dimensiones
+from buscaminas_servidor_sesiones import ServidorSesiones
+from buscaminas_vista import CELDA_MINIMA, LADO_TABLERO, VistaTablero, calcular_tamano_celda
 
 class BuscaminasServidorPygame:
-    def __init__(self):
-        self.tablero = []
-        self.tablero_visible = []  # Lo que el cliente puede ver
+    """Vista Pygame sobre el motor de sesiones, que atiende la red en un hilo propio"""
+    def __init__(self, dificultad="principiante", filas=None, columnas=None, minas=None, semilla=None):
         self.filas = 0
         self.columnas = 0
         self.minas = 0
-        self.banderas = []
-        self.casillas_destapadas = 0
-        self.tiempo_inicio = 0
-        self.tiempo_fin = 0
-        self.servidor_socket = None
-        self.cliente_socket = None
-        self.dificultad = ""
+        self.dificultad = dificultad  # Opción marcada al abrir la pantalla de configuración
+        # Tablero personalizado de la línea de órdenes (None = el tamaño de la dificultad)
+        self.tablero_personalizado = (filas, columnas, minas)
+        self.semilla = semilla
         self.ip = ""
         self.puerto = 0
-        self.juego_terminado = False
-        self.cliente_conectado = False
+        
+        # Motor de red sin interfaz gráfica y partida que se muestra en pantalla
+        self.motor = None
+        self.sesion_observada = None
         
         # Variables de Pygame
         self.tamano_celda = 40
@@ -32,6 +31,7 @@ class BuscaminasServidorPygame:
         self.pantalla = None
         self.fuente = None
         self.fuente_grande = None
+        self.vista = None  # VistaTablero: repinta sólo las casillas que cambian
         
         # Colores
         self.colores = {
@@ -60,13 +60,17 @@ class BuscaminasServidorPygame:
 
     def inicializar_pygame(self):
         """Inicializa Pygame y configura la pantalla"""
+        # Reducir las celdas para que los tableros grandes quepan en pantalla
+        self.tamano_celda = calcular_tamano_celda(self.filas, self.columnas)
         pygame.init()
         self.ancho_pantalla = self.columnas * self.tamano_celda + 20
         self.alto_pantalla = self.filas * self.tamano_celda + 100  # Espacio extra para mensajes
         self.pantalla = pygame.display.set_mode((self.ancho_pantalla, self.alto_pantalla))
         pygame.display.set_caption(f"Buscaminas Servidor - {self.dificultad}")
         self.fuente = pygame.font.SysFont("Arial", 18)
-        self.fuente_grande = pygame.font.SysFont("Arial", 24, bold=True)
+        self.fuente_grande = pygame.font.SysFont("Arial", max(6, self.tamano_celda * 3 // 5), bold=True)
+        self.vista = VistaTablero(self.pantalla, self.filas, self.columnas, self.tamano_celda,
+                                  self.colores, self.fuente, self.fuente_grande, estilo_bandera="triangulo")
 
     def configurar_servidor(self):
         """Configura los parámetros del servidor y la dificultad del juego utilizando Pygame"""
@@ -79,7 +83,7 @@ class BuscaminasServidorPygame:
         ip_input = "localhost"
         puerto_input = "12345"
         input_activo = "ip"
-        dificultad_seleccionada = "principiante"
+        dificultad_seleccionada = self.dificultad
         
         while True:
             pantalla_config.fill((240, 240, 240))
@@ -149,24 +153,15 @@ class BuscaminasServidorPygame:
                             self.puerto = int(puerto_input)
                             self.dificultad = dificultad_seleccionada
                             
-                            # Configurar tamaño de tablero según dificultad
-                            if self.dificultad == "principiante":
-                                self.filas = 9
-                                self.columnas = 9
-                                self.minas = 10
-                            else:
-                                self.filas = 16
-                                self.columnas = 16
-                                self.minas = 40
+                            # Iniciar el motor de red (cada cliente recibe su propio tablero);
+                            # también fija el tamaño del tablero según la dificultad o --filas/--columnas/--minas
+                            self.iniciar_servidor()
                             
                             # Inicializar Pygame con el tamaño correcto
                             self.inicializar_pygame()
                             
-                            # Generar tablero
-                            self.generar_tablero()
-                            
-                            # Iniciar servidor en un hilo separado
-                            self.thread_servidor = threading.Thread(target=self.iniciar_servidor)
+                            # El motor bloquea en select() dentro de un hilo separado
+                            self.thread_servidor = threading.Thread(target=self.motor.ejecutar)
                             self.thread_servidor.daemon = True
                             self.thread_servidor.start()
                             
@@ -191,261 +186,34 @@ class BuscaminasServidorPygame:
                                 puerto_input += evento.unicode
 
     def iniciar_servidor(self):
-        """Inicia el servidor y espera la conexión de un cliente"""
+        """Inicia el motor de sesiones y se registra como observador"""
+        filas, columnas, minas = self.tablero_personalizado
+        self.motor = ServidorSesiones(self.ip, self.puerto, self.dificultad, filas, columnas, minas, self.semilla)
+        self.dificultad, self.filas, self.columnas, self.minas = (
+            self.motor.dificultad, self.motor.filas, self.motor.columnas, self.motor.minas)
+        self.motor.agregar_observador(self.observar)
         try:
-            self.servidor_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.servidor_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.servidor_socket.bind((self.ip, self.puerto))
-            self.servidor_socket.listen(1)
-            
-            self.mensaje_estado = f"Servidor iniciado en {self.ip}:{self.puerto}"
-            self.mensaje_estado += "\nEsperando conexión del cliente..."
-            
-            self.cliente_socket, direccion_cliente = self.servidor_socket.accept()
-            self.cliente_conectado = True
-            self.mensaje_estado = f"Cliente conectado desde {direccion_cliente[0]}:{direccion_cliente[1]}"
-            
-            # Enviar confirmación y dificultad al cliente
-            mensaje_inicial = {
-                "tipo": "configuracion", 
-                "dificultad": self.dificultad, 
-                "filas": self.filas, 
-                "columnas": self.columnas,
-                "minas": self.minas
-            }
-            self.enviar_mensaje(mensaje_inicial)
-            
-            # Iniciar el tiempo de juego
-            self.tiempo_inicio = time.time()
-            
-            # Procesar movimientos del cliente
-            self.procesar_movimientos()
-            
-        except Exception as e:
-            self.mensaje_estado = f"Error al iniciar servidor: {e}"
-            if self.servidor_socket:
-                self.servidor_socket.close()
-
-    def generar_tablero(self):
-        """Genera el tablero con las minas colocadas aleatoriamente"""
-        # Inicializar tablero vacío
-        self.tablero = [[0 for _ in range(self.columnas)] for _ in range(self.filas)]
-        self.tablero_visible = [['□' for _ in range(self.columnas)] for _ in range(self.filas)]
+            self.motor.iniciar_servidor()
+        except Exception:
+            self.motor.cerrar()
+            raise
         
-        # Colocar minas aleatoriamente
-        minas_colocadas = 0
-        while minas_colocadas < self.minas:
-            fila = random.randint(0, self.filas - 1)
-            columna = random.randint(0, self.columnas - 1)
-            
-            if self.tablero[fila][columna] != '*':
-                self.tablero[fila][columna] = '*'
-                minas_colocadas += 1
+        self.mensaje_estado = f"Servidor iniciado en {self.ip}:{self.puerto}"
+        self.mensaje_estado += "\nEsperando conexión del cliente..."
 
-        # Inicializar la matriz de banderas con False
-        self.banderas = [[False for _ in range(self.columnas)] for _ in range(self.filas)]
-        
-        # Calcular números adyacentes a minas
-        for i in range(self.filas):
-            for j in range(self.columnas):
-                if self.tablero[i][j] != '*':
-                    # Contar minas adyacentes
-                    minas_adyacentes = 0
-                    for di in [-1, 0, 1]:
-                        for dj in [-1, 0, 1]:
-                            if di == 0 and dj == 0:
-                                continue
-                            
-                            ni, nj = i + di, j + dj
-                            if 0 <= ni < self.filas and 0 <= nj < self.columnas:
-                                if self.tablero[ni][nj] == '*':
-                                    minas_adyacentes += 1
-                    
-                    self.tablero[i][j] = minas_adyacentes
-
-    def enviar_mensaje(self, mensaje):
-        """Envía un mensaje al cliente en formato JSON"""
-        try:
-            mensaje_json = json.dumps(mensaje) + '\n'  # Añadir delimitador
-            self.cliente_socket.sendall(mensaje_json.encode('utf-8'))
-            return True
-        except Exception as e:
-            self.mensaje_estado = f"Error al enviar mensaje: {e}"
-            return False
-
-    def procesar_movimientos(self):
-        """Procesa los movimientos recibidos del cliente"""
-        while not self.juego_terminado and self.cliente_conectado:
-            try:
-                datos = self.cliente_socket.recv(4096).decode('utf-8')
-                if not datos:
-                    self.cliente_conectado = False
-                    self.mensaje_estado = "Cliente desconectado"
-                    break
-                
-                # Procesar mensaje JSON
-                try:
-                    mensaje = json.loads(datos)
-                    
-                    if mensaje["tipo"] == "coordenada":
-                        fila = mensaje["fila"]
-                        columna = mensaje["columna"]
-                        
-                        # Verificar si la casilla ya está destapada
-                        if self.tablero_visible[fila][columna] != '□':
-                            respuesta = {
-                                "tipo": "control",
-                                "estado": "casilla_ocupada",
-                                "mensaje": "Esta casilla ya está destapada"
-                            }
-                            self.enviar_mensaje(respuesta)
-                        else:
-                            # Verificar si hay mina
-                            if self.tablero[fila][columna] == '*':
-                                # Juego perdido
-                                self.tablero_visible[fila][columna] = '*'
-                                self.juego_terminado = True
-                                
-                                # Revelar todas las minas
-                                for i in range(self.filas):
-                                    for j in range(self.columnas):
-                                        if self.tablero[i][j] == '*':
-                                            self.tablero_visible[i][j] = '*'
-                                
-                                # Enviar tablero actualizado
-                                respuesta = {
-                                    "tipo": "control",
-                                    "estado": "mina_pisada",
-                                    "mensaje": "¡BOOM! Has perdido.",
-                                    "tablero": self.tablero_visible
-                                }
-                                self.enviar_mensaje(respuesta)
-                                
-                                # Enviar mensaje de fin de juego
-                                self.tiempo_fin = time.time()
-                                duracion = round(self.tiempo_fin - self.tiempo_inicio)
-                                
-                                fin_juego = {
-                                    "tipo": "fin",
-                                    "resultado": "derrota",
-                                    "duracion": duracion
-                                }
-                                self.enviar_mensaje(fin_juego)
-                                
-                            else:
-                                # Revelar casilla
-                                valor = self.tablero[fila][columna]
-                                self.tablero_visible[fila][columna] = valor
-                                
-                                respuesta = {
-                                    "tipo": "control",
-                                    "estado": "casilla_libre",
-                                    "valor": valor,
-                                    "fila": fila,
-                                    "columna": columna
-                                }
-                                self.enviar_mensaje(respuesta)
-                                
-                                # Si es un 0, descubrir casillas adyacentes
-                                if valor == 0:
-                                    self.revelar_adyacentes(fila, columna)
-                                
-                                # Incrementar contador de casillas destapadas
-                                self.casillas_destapadas += 1
-                                
-                                # Verificar victoria
-                                if self.casillas_destapadas == (self.filas * self.columnas - self.minas):
-                                    self.juego_terminado = True
-                                    
-                                    # Enviar mensaje de victoria
-                                    self.tiempo_fin = time.time()
-                                    duracion = round(self.tiempo_fin - self.tiempo_inicio)
-                                    
-                                    fin_juego = {
-                                        "tipo": "fin",
-                                        "resultado": "victoria",
-                                        "duracion": duracion
-                                    }
-                                    self.enviar_mensaje(fin_juego)
-                    
-                    elif mensaje["tipo"] == "bandera":
-                        fila = mensaje["fila"]
-                        columna = mensaje["columna"]
-                        accion = mensaje["accion"]
-                        
-                        # Verificar que las coordenadas estén dentro del rango
-                        if not (0 <= fila < self.filas and 0 <= columna < self.columnas):
-                            continue
-                        # Verificar que la casilla no esté descubierta
-                        if self.tablero_visible[fila][columna] != '□':
-                            continue
-
-                        if accion == "colocar" and not self.banderas[fila][columna]:
-                            self.banderas[fila][columna] = True
-                            respuesta = {
-                                "tipo": "control",
-                                "estado": "bandera_colocada",
-                                "fila": fila,
-                                "columna": columna
-                            }
-                            self.enviar_mensaje(respuesta)
-                        elif accion == "retirar" and self.banderas[fila][columna]:
-                            self.banderas[fila][columna] = False
-                            respuesta = {
-                                "tipo": "control",
-                                "estado": "bandera_retirada",
-                                "fila": fila,
-                                "columna": columna
-                            }
-                            self.enviar_mensaje(respuesta)
-
-                    elif mensaje["tipo"] == "desconexion":
-                        self.cliente_conectado = False
-                        self.mensaje_estado = "Cliente desconectado"
-                        break
-                    
-                except json.JSONDecodeError:
-                    self.mensaje_estado = "Error al decodificar mensaje JSON"
-                    
-            except Exception as e:
-                self.mensaje_estado = f"Error en comunicación: {e}"
-                self.cliente_conectado = False
-                break
-        
-        # Cerrar conexión al finalizar
-        if self.cliente_socket:
-            self.cliente_socket.close()
-
-    def revelar_adyacentes(self, fila, columna):
-        """Revela casillas adyacentes cuando se descubre un 0"""
-        for di in [-1, 0, 1]:
-            for dj in [-1, 0, 1]:
-                ni, nj = fila + di, columna + dj
-                
-                # Verificar que está dentro del tablero
-                if 0 <= ni < self.filas and 0 <= nj < self.columnas:
-                    # Verificar que no esté ya destapada
-                    if self.tablero_visible[ni][nj] == '□':
-                        valor = self.tablero[ni][nj]
-                        
-                        # No revelar minas por este método
-                        if valor != '*':
-                            self.tablero_visible[ni][nj] = valor
-                            self.casillas_destapadas += 1
-                            
-                            # Enviar actualización al cliente
-                            respuesta = {
-                                "tipo": "control",
-                                "estado": "casilla_libre",
-                                "valor": valor,
-                                "fila": ni,
-                                "columna": nj
-                            }
-                            self.enviar_mensaje(respuesta)
-                            
-                            # Si también es un 0, continuar recursivamente
-                            if valor == 0:
-                                self.revelar_adyacentes(ni, nj)
+    def observar(self, evento, sesion, respuestas):
+        """Observador del motor (se llama desde el hilo de red)"""
+        if evento == "conexion":
+            self.sesion_observada = sesion
+            direccion = sesion.direccion
+            self.mensaje_estado = f"Cliente conectado desde {direccion[0]}:{direccion[1]}"
+            if self.vista is not None:
+                self.vista.marcar_todo()  # Otra partida: repintar el tablero entero
+        elif evento == "mensaje" and sesion is self.sesion_observada and self.vista is not None:
+            # Repintar sólo las casillas que cambian con las respuestas enviadas
+            self.vista.marcar_respuestas(respuestas)
+        elif evento == "desconexion" and sesion is self.sesion_observada:
+            self.mensaje_estado = "Cliente desconectado"
 
     def ejecutar(self):
         """Método principal para ejecutar el juego"""
@@ -458,70 +226,66 @@ class BuscaminasServidorPygame:
                 for evento in pygame.event.get():
                     if evento.type == pygame.QUIT:
                         ejecutando = False
-                        
-                        # Cerrar conexiones
-                        if self.cliente_socket:
-                            self.cliente_socket.close()
-                        if self.servidor_socket:
-                            self.servidor_socket.close()
                 
-                # Actualizar pantalla
-                self.pantalla.fill(self.colores["fondo"])
+                partida = self.sesion_observada.partida if self.sesion_observada else None
                 
-                # Dibujar tablero
-                for fila in range(self.filas):
-                    for col in range(self.columnas):
-                        x = col * self.tamano_celda + 10
-                        y = fila * self.tamano_celda + 10
-                        
-                        # Dibujar celda según estado
-                        if self.tablero_visible[fila][col] == '□':
-                            pygame.draw.rect(self.pantalla, self.colores["celda"], 
-                                            (x, y, self.tamano_celda, self.tamano_celda))
-                        else:
-                            pygame.draw.rect(self.pantalla, self.colores["celda_visible"], 
-                                            (x, y, self.tamano_celda, self.tamano_celda))
-                            
-                            # Dibujar contenido
-                            if self.tablero_visible[fila][col] == '*':
-                                # Mina
-                                pygame.draw.circle(self.pantalla, self.colores["mina"], 
-                                                  (x + self.tamano_celda // 2, y + self.tamano_celda // 2), 
-                                                  self.tamano_celda // 3)
-                            elif self.tablero_visible[fila][col] != 0:
-                                # Número
-                                valor = self.tablero_visible[fila][col]
-                                texto = self.fuente_grande.render(str(valor), True, 
-                                                               self.colores["texto"][valor])
-                                self.pantalla.blit(texto, 
-                                                  (x + self.tamano_celda // 2 - texto.get_width() // 2, 
-                                                   y + self.tamano_celda // 2 - texto.get_height() // 2))
-                        
-                        # Dibujar borde
-                        pygame.draw.rect(self.pantalla, self.colores["grid"], 
-                                        (x, y, self.tamano_celda, self.tamano_celda), 1)
+                # Actualizar pantalla: sólo las casillas y líneas de estado que han cambiado
+                if partida is None:
+                    contenido, bandera = (lambda fila, col: '□'), (lambda fila, col: False)
+                else:
+                    contenido, bandera = partida.casilla_visible, partida.tiene_bandera
+                rectangulos = self.vista.repintar(contenido, bandera)
                 
                 # Mostrar estado
-                texto_estado = self.fuente.render(self.mensaje_estado, True, (0, 0, 0))
-                self.pantalla.blit(texto_estado, (10, self.alto_pantalla - 60))
+                estado = f"{self.mensaje_estado} | Partidas activas: {len(self.motor.sesiones)}"
+                rectangulos.append(self.vista.dibujar_texto("estado", estado, (10, self.alto_pantalla - 60)))
                 
                 # Mostrar tiempo de juego
-                if self.tiempo_inicio > 0 and not self.juego_terminado:
-                    self.tiempo_transcurrido = int(time.time() - self.tiempo_inicio)
-                    texto_tiempo = self.fuente.render(f"Tiempo: {self.tiempo_transcurrido} segundos", True, (0, 0, 0))
-                    self.pantalla.blit(texto_tiempo, (10, self.alto_pantalla - 30))
-                elif self.juego_terminado:
-                    duracion = int(self.tiempo_fin - self.tiempo_inicio)
-                    texto_tiempo = self.fuente.render(f"Tiempo final: {duracion} segundos", True, (0, 0, 0))
-                    self.pantalla.blit(texto_tiempo, (10, self.alto_pantalla - 30))
+                if partida is not None and not partida.juego_terminado:
+                    self.tiempo_transcurrido = partida.duracion()
+                    texto_tiempo = f"Tiempo: {self.tiempo_transcurrido} segundos"
+                elif partida is not None and partida.juego_terminado:
+                    texto_tiempo = f"Tiempo final: {partida.duracion()} segundos"
+                else:
+                    texto_tiempo = ""
+                rectangulos.append(self.vista.dibujar_texto("tiempo", texto_tiempo, (10, self.alto_pantalla - 30)))
                 
-                # Actualizar pantalla
-                pygame.display.flip()
+                # Sin cambios no se toca la pantalla
+                rectangulos = [rect for rect in rectangulos if rect is not None]
+                if rectangulos:
+                    pygame.display.update(rectangulos)
                 reloj.tick(30)
             
+            # El hilo del motor es daemon y termina junto con el programa
+            self.motor.ejecutando = False
             pygame.quit()
 
 # Código para ejecutar el servidor
 if __name__ == "__main__":
-    servidor = BuscaminasServidorPygame()
-    servidor.ejecutar()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Servidor de Buscaminas con vista Pygame opcional")
+    parser.add_argument("--headless", action="store_true", help="Ejecutar sin pantalla, sólo el motor de red")
+    parser.add_argument("--ip", default="localhost")
+    parser.add_argument("--puerto", type=int, default=12345)
+    agregar_argumentos_tablero(parser)
+    argumentos = parser.parse_args()
+    
+    try:
+        _, filas, columnas, _ = resolver_dimensiones(argumentos.dificultad, argumentos.filas,
+                                                     argumentos.columnas, argumentos.minas)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if argumentos.headless:
+        # En modo headless se admiten tableros personalizados de hasta 1000x1000
+        servidor = ServidorSesiones(argumentos.ip, argumentos.puerto, argumentos.dificultad,
+                                    argumentos.filas, argumentos.columnas, argumentos.minas,
+                                    argumentos.semilla)
+        servidor.ejecutar()
+    else:
+        # Con pantalla el tablero tiene que caber en la ventana
+        if not calcular_tamano_celda(filas, columnas):
+            parser.error(f"Un tablero de {filas}x{columnas} no cabe en pantalla "
+                         f"(máximo {LADO_TABLERO // CELDA_MINIMA} casillas por lado); usa --headless")
+        servidor = BuscaminasServidorPygame(argumentos.dificultad, argumentos.filas, argumentos.columnas,
+                                            argumentos.minas, argumentos.semilla)
+        servidor.ejecutar()
\ No newline at end of file
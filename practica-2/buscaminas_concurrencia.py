@@ -0,0 +1,148 @@
+import threading
+
+# Fragmentos por defecto de un RegistroFragmentado (potencia de dos)
+FRAGMENTOS = 16
+
+class CerrojoLectorEscritor:
+    """Cerrojo de lectores/escritor: muchas lecturas a la vez o una sola escritura.
+
+    Da preferencia a los escritores: en cuanto uno espera, no entran lectores
+    nuevos, así que un flujo continuo de lecturas no deja sin turno a las
+    escrituras. No es reentrante: no se debe pedir escritura con la lectura
+    tomada (ni al revés) en el mismo hilo.
+    """
+    def __init__(self):
+        # Los with usan el Lock directamente (más barato que la Condition) y
+        # la Condition sólo para esperar y avisar; comparten el mismo Lock
+        self.cerrojo = threading.Lock()
+        self.condicion = threading.Condition(self.cerrojo)
+        self.lectores = 0  # Lectores dentro
+        self.escribiendo = False
+        self.escritores_esperando = 0
+        self.seccion_lectura = SeccionCerrojo(self.adquirir_lectura, self.liberar_lectura)
+        self.seccion_escritura = SeccionCerrojo(self.adquirir_escritura, self.liberar_escritura)
+
+    def adquirir_lectura(self):
+        """Espera a que no haya escritor activo ni esperando y entra como lector"""
+        with self.cerrojo:
+            while self.escribiendo or self.escritores_esperando:
+                self.condicion.wait()
+            self.lectores += 1
+
+    def liberar_lectura(self):
+        """Sale como lector; el último despierta a los escritores"""
+        with self.cerrojo:
+            self.lectores -= 1
+            if self.lectores == 0:
+                self.condicion.notify_all()
+
+    def adquirir_escritura(self):
+        """Espera a que no quede nadie dentro y entra en exclusiva"""
+        with self.cerrojo:
+            self.escritores_esperando += 1
+            while self.escribiendo or self.lectores:
+                self.condicion.wait()
+            self.escritores_esperando -= 1
+            self.escribiendo = True
+
+    def liberar_escritura(self):
+        """Sale de la escritura y despierta a todos los que esperan"""
+        with self.cerrojo:
+            self.escribiendo = False
+            self.condicion.notify_all()
+
+    def lectura(self):
+        """with cerrojo.lectura(): ... (compartido)"""
+        return self.seccion_lectura
+
+    def escritura(self):
+        """with cerrojo.escritura(): ... (exclusivo)"""
+        return self.seccion_escritura
+
+class SeccionCerrojo:
+    """Gestor de contexto reutilizable para una de las dos formas de tomar el cerrojo.
+
+    Se crea una vez por cerrojo en lugar de un generador por cada with, que
+    en las lecturas cortas costaba más que el propio cerrojo.
+    """
+    def __init__(self, adquirir, liberar):
+        self.adquirir = adquirir
+        self.liberar = liberar
+
+    def __enter__(self):
+        self.adquirir()
+
+    def __exit__(self, tipo, valor, traza):
+        self.liberar()
+
+class RegistroFragmentado:
+    """Diccionario compartido entre hilos con un cerrojo de lectores/escritor por fragmento.
+
+    Cada clave cae en un fragmento según su hash, así que dos hilos que tocan
+    claves de fragmentos distintos no se esperan, y las lecturas del mismo
+    fragmento tampoco. Las operaciones sólo tocan el diccionario bajo el
+    cerrojo: nada de E/S (print, send) mientras se tiene; quien llama trabaja
+    con el valor devuelto después de soltarlo.
+    """
+    def __init__(self, fragmentos=FRAGMENTOS):
+        if fragmentos < 1:
+            raise ValueError("Hace falta al menos un fragmento")
+        self.fragmentos = [({}, CerrojoLectorEscritor()) for _ in range(fragmentos)]
+
+    def fragmento(self, clave):
+        """(diccionario, cerrojo) del fragmento de una clave"""
+        return self.fragmentos[hash(clave) % len(self.fragmentos)]
+
+    def obtener(self, clave, defecto=None):
+        """Valor de una clave (lectura compartida)"""
+        datos, cerrojo = self.fragmento(clave)
+        with cerrojo.lectura():
+            return datos.get(clave, defecto)
+
+    def __contains__(self, clave):
+        datos, cerrojo = self.fragmento(clave)
+        with cerrojo.lectura():
+            return clave in datos
+
+    def poner(self, clave, valor):
+        """Asigna el valor de una clave"""
+        datos, cerrojo = self.fragmento(clave)
+        with cerrojo.escritura():
+            datos[clave] = valor
+
+    def quitar(self, clave, defecto=None):
+        """Elimina una clave y devuelve su valor"""
+        datos, cerrojo = self.fragmento(clave)
+        with cerrojo.escritura():
+            return datos.pop(clave, defecto)
+
+    def actualizar(self, clave, funcion, defecto=None):
+        """Lee, modifica y escribe una clave de forma atómica; devuelve el valor nuevo.
+
+        'funcion' recibe el valor actual (o 'defecto') y devuelve el nuevo; se
+        ejecuta con el fragmento bloqueado, así que debe ser corta y sin E/S.
+        """
+        datos, cerrojo = self.fragmento(clave)
+        with cerrojo.escritura():
+            valor = funcion(datos.get(clave, defecto))
+            datos[clave] = valor
+            return valor
+
+    def __len__(self):
+        total = 0
+        for datos, cerrojo in self.fragmentos:
+            with cerrojo.lectura():
+                total += len(datos)
+        return total
+
+    def elementos(self):
+        """Copia de los pares (clave, valor); cada fragmento es coherente, el conjunto no es atómico"""
+        copia = []
+        for datos, cerrojo in self.fragmentos:
+            with cerrojo.lectura():
+                copia.extend(datos.items())
+        return copia
+
+    def valores(self):
+        """Copia de los valores (ver elementos)"""
+        return [valor for _, valor in self.elementos()]
@@ -0,0 +1,213 @@
+import bisect
+import signal
+import sys
+import time
+
+# Límites superiores (segundos) de los cubos de latencia: de 1 µs a ~8 s,
+# duplicando en cada cubo. Un cubo extra recoge lo que supera el último.
+LIMITES_LATENCIA = tuple(1e-6 * 2 ** i for i in range(24))
+
+# Límites del tamaño de las cascadas (casillas destapadas por jugada): 1 .. 2^20
+LIMITES_CASCADA = tuple(2 ** i for i in range(21))
+
+# Etapas del procesado de un mensaje, en el orden en que ocurren
+ETAPAS = ("recepcion_parseo", "parseo_manejo", "manejo_envio")
+
+# Cabecera de la respuesta HTTP del endpoint de métricas (formato de texto de Prometheus)
+CABECERA_HTTP = ("HTTP/1.0 {estado}\r\n"
+                 "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                 "Content-Length: {longitud}\r\n"
+                 "Connection: close\r\n\r\n")
+RUTAS_METRICAS = ("/", "/metrics")
+
+# Tipos de mensaje del cliente con contador propio; el resto cuenta como "otro"
+TIPOS_MENSAJE = ("coordenada", "bandera", "protocolo", "desconexion", "otro")
+
+class Histograma:
+    """Histograma de cubos fijos: observar() sólo incrementa contadores ya reservados"""
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = limites
+        self.cubos = [0] * (len(limites) + 1)
+        self.total = 0
+        self.suma = 0.0
+
+    def observar(self, valor):
+        """Añade una observación al cubo cuyo límite es el primero >= valor"""
+        self.cubos[bisect.bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.suma += valor
+
+    def percentil(self, p):
+        """Límite superior del cubo que contiene el percentil p (0-100); infinito si se sale"""
+        if not self.total:
+            return 0.0
+        objetivo = self.total * p / 100
+        acumulado = 0
+        for indice, cantidad in enumerate(self.cubos):
+            acumulado += cantidad
+            if acumulado >= objetivo and cantidad:
+                return self.limites[indice] if indice < len(self.limites) else float("inf")
+        return float("inf")
+
+    def instantanea(self):
+        """Resumen del histograma como diccionario"""
+        return {
+            "total": self.total,
+            "media": self.suma / self.total if self.total else 0.0,
+            "p50": self.percentil(50),
+            "p90": self.percentil(90),
+            "p99": self.percentil(99),
+            "cubos": list(self.cubos),
+        }
+
+class MetricasServidor:
+    """Latencias por etapa del procesado de mensajes y contadores por tipo de mensaje.
+
+    Las etapas se miden con instantes de time.perf_counter():
+      - recepcion_parseo: desde que llegan los bytes hasta tener el mensaje decodificado,
+      - parseo_manejo:    hasta que la partida ha calculado las respuestas,
+      - manejo_envio:     hasta que las respuestas se han entregado al socket.
+    Todo está reservado al crear el objeto, así que se puede dejar activo siempre.
+    """
+    def __init__(self):
+        self.recepcion_parseo = Histograma()
+        self.parseo_manejo = Histograma()
+        self.manejo_envio = Histograma()
+        self.mensajes = dict.fromkeys(TIPOS_MENSAJE, 0)
+        self.inicio = time.time()
+        # Contadores del endpoint de métricas
+        self.conexiones = 0
+        self.mensajes_enviados = 0
+        self.bytes_recibidos = 0
+        self.bytes_enviados = 0
+        self.partidas = {"victoria": 0, "derrota": 0}
+        self.duracion_partidas = 0  # Segundos sumados de las partidas terminadas
+        self.cascadas = Histograma(LIMITES_CASCADA)
+
+    def contar_mensaje(self, tipo):
+        """Suma un mensaje al contador de su tipo"""
+        if tipo in self.mensajes:
+            self.mensajes[tipo] += 1
+        else:
+            self.mensajes["otro"] += 1
+
+    def registrar(self, tipo, recibido, parseado, manejado, enviado=None):
+        """Cuenta un mensaje y anota sus etapas; sin 'enviado' no se mide manejo_envio"""
+        self.contar_mensaje(tipo)
+        self.recepcion_parseo.observar(parseado - recibido)
+        self.parseo_manejo.observar(manejado - parseado)
+        if enviado is not None:
+            self.manejo_envio.observar(enviado - manejado)
+
+    def registrar_respuestas(self, respuestas):
+        """Anota el tamaño de la cascada y el final de partida de las respuestas a una jugada"""
+        casillas = 0
+        for respuesta in respuestas:
+            estado = respuesta.get("estado")
+            if estado == "casillas_libres":
+                casillas += len(respuesta["casillas"])
+            elif estado == "casilla_libre":
+                casillas += 1
+            elif respuesta["tipo"] == "fin" and respuesta.get("resultado") in self.partidas:
+                self.partidas[respuesta["resultado"]] += 1
+                self.duracion_partidas += respuesta.get("duracion", 0)
+        if casillas:
+            self.cascadas.observar(casillas)
+
+    def instantanea(self):
+        """Estado actual de todas las métricas como diccionario"""
+        return {
+            "segundos": round(time.time() - self.inicio, 3),
+            "mensajes": dict(self.mensajes),
+            "recepcion_parseo": self.recepcion_parseo.instantanea(),
+            "parseo_manejo": self.parseo_manejo.instantanea(),
+            "manejo_envio": self.manejo_envio.instantanea(),
+            "conexiones": self.conexiones,
+            "mensajes_enviados": self.mensajes_enviados,
+            "bytes_recibidos": self.bytes_recibidos,
+            "bytes_enviados": self.bytes_enviados,
+            "partidas": dict(self.partidas),
+            "duracion_partidas": self.duracion_partidas,
+            "cascadas": self.cascadas.instantanea(),
+        }
+
+    def texto(self):
+        """Instantánea legible: contadores por tipo y percentiles de cada etapa en microsegundos"""
+        lineas = ["Mensajes: " + ", ".join(f"{tipo}={cantidad}" for tipo, cantidad in self.mensajes.items())]
+        lineas.append(f"{'etapa':>17} {'total':>9} {'media(us)':>10} {'p50(us)':>9} {'p90(us)':>9} {'p99(us)':>9}")
+        for nombre in ETAPAS:
+            histograma = getattr(self, nombre)
+            media = histograma.suma / histograma.total if histograma.total else 0.0
+            lineas.append(f"{nombre:>17} {histograma.total:>9} {media * 1e6:>10.1f} "
+                          f"{histograma.percentil(50) * 1e6:>9.0f} {histograma.percentil(90) * 1e6:>9.0f} "
+                          f"{histograma.percentil(99) * 1e6:>9.0f}")
+        return "\n".join(lineas)
+
+    def volcar(self, fichero=None):
+        """Escribe la instantánea legible (por defecto en stderr)"""
+        print(self.texto(), file=fichero or sys.stderr, flush=True)
+
+    def instalar_senal(self):
+        """Vuelca la instantánea al recibir SIGUSR1 (sólo POSIX); devuelve si se ha instalado"""
+        senal = getattr(signal, "SIGUSR1", None)
+        if senal is None:
+            return False
+        signal.signal(senal, lambda numero, marco: self.volcar())
+        return True
+
+    def prometheus(self, conexiones_activas, partidas_activas):
+        """Métricas en el formato de texto de Prometheus; los indicadores instantáneos los da el servidor"""
+        lineas = []
+
+        def metrica(nombre, tipo, ayuda, muestras):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in muestras:
+                lineas.append(f"{nombre}{etiquetas} {valor}")
+
+        def histograma(nombre, ayuda, series):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} histogram")
+            for etiqueta, h in series:
+                prefijo = f"{etiqueta}," if etiqueta else ""
+                acumulado = 0
+                for limite, cantidad in zip(h.limites, h.cubos):
+                    acumulado += cantidad
+                    lineas.append(f'{nombre}_bucket{{{prefijo}le="{limite:g}"}} {acumulado}')
+                lineas.append(f'{nombre}_bucket{{{prefijo}le="+Inf"}} {h.total}')
+                sufijo = f"{{{etiqueta}}}" if etiqueta else ""
+                lineas.append(f"{nombre}_sum{sufijo} {h.suma:g}")
+                lineas.append(f"{nombre}_count{sufijo} {h.total}")
+
+        terminadas = sum(self.partidas.values())
+        metrica("buscaminas_conexiones_activas", "gauge", "Conexiones de clientes abiertas",
+                [("", conexiones_activas)])
+        metrica("buscaminas_partidas_activas", "gauge", "Partidas en curso sin terminar",
+                [("", partidas_activas)])
+        metrica("buscaminas_conexiones_total", "counter", "Conexiones de clientes aceptadas",
+                [("", self.conexiones)])
+        metrica("buscaminas_mensajes_recibidos_total", "counter", "Mensajes recibidos por tipo",
+                [(f'{{tipo="{tipo}"}}', cantidad) for tipo, cantidad in self.mensajes.items()])
+        metrica("buscaminas_mensajes_enviados_total", "counter", "Mensajes enviados a los clientes",
+                [("", self.mensajes_enviados)])
+        metrica("buscaminas_bytes_recibidos_total", "counter", "Bytes recibidos de los clientes",
+                [("", self.bytes_recibidos)])
+        metrica("buscaminas_bytes_enviados_total", "counter", "Bytes entregados a los sockets de los clientes",
+                [("", self.bytes_enviados)])
+        metrica("buscaminas_partidas_terminadas_total", "counter", "Partidas terminadas por resultado",
+                [(f'{{resultado="{resultado}"}}', cantidad) for resultado, cantidad in self.partidas.items()])
+        metrica("buscaminas_duracion_partida_media_segundos", "gauge", "Duración media de las partidas terminadas",
+                [("", self.duracion_partidas / terminadas if terminadas else 0)])
+        histograma("buscaminas_cascada_casillas", "Casillas destapadas por jugada", [("", self.cascadas)])
+        histograma("buscaminas_latencia_segundos", "Latencia de cada etapa del procesado de un mensaje",
+                   [(f'etapa="{etapa}"', getattr(self, etapa)) for etapa in ETAPAS])
+        return "\n".join(lineas) + "\n"
+
+def respuesta_http(peticion, cuerpo):
+    """Respuesta HTTP/1.0 completa para una petición GET del endpoint de métricas"""
+    linea = bytes(peticion).split(b"\r\n", 1)[0].split()
+    if len(linea) >= 2 and linea[0] == b"GET" and linea[1].decode("latin-1") in RUTAS_METRICAS:
+        estado, contenido = "200 OK", cuerpo.encode("utf-8")
+    else:
+        estado, contenido = "404 Not Found", b"Ruta no encontrada: use /metrics\n"
+    return CABECERA_HTTP.format(estado=estado, longitud=len(contenido)).encode("ascii") + contenido
@@ -0,0 +1,292 @@
+import random
+import time
+from collections import deque
+
+from buscaminas_tablero import DESTAPADA, MASCARA_VALOR, destapar_region_numpy, generar_tablero, numpy
+
+# Tamaños de tablero disponibles: (filas, columnas, minas)
+DIFICULTADES = {
+    "principiante": (9, 9, 10),
+    "avanzado": (16, 16, 40)
+}
+
+# Nombre de la dificultad cuando filas, columnas y minas se indican a mano
+PERSONALIZADO = "personalizado"
+
+# Tamaño máximo de cada lado del tablero (hasta 1000x1000 = un millón de casillas)
+LIMITE_DIMENSION = 1000
+
+# Casillas que revelar_region destapa en Python antes de pasar la región a
+# NumPy; por debajo, el recorrido en anchura es más rápido que las máscaras
+LIMITE_RECORRIDO = 4096
+
+# Extensiones del protocolo que el cliente puede activar con un mensaje "protocolo".
+# "casillas_libres": la cascada de una jugada se envía en un único mensaje
+# en lugar de un "casilla_libre" por casilla.
+# "binario": después del mensaje "protocolo" ambos extremos usan las tramas
+# binarias de buscaminas_protocolo en lugar de líneas JSON.
+# "minas": al pisar una mina se envían sólo las coordenadas de las minas
+# en lugar del tablero visible completo.
+CAPACIDADES_SERVIDOR = ("casillas_libres", "binario", "minas")
+
+def ampliar_limite_descriptores():
+    """Sube el límite blando de descriptores abiertos al máximo permitido (sólo POSIX)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if duro != resource.RLIM_INFINITY and blando < duro:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (duro, duro))
+        blando = duro
+    return blando
+
+def validar_dimensiones(filas, columnas, minas):
+    """Lanza ValueError si el tamaño del tablero o el número de minas no son válidos"""
+    if not (1 <= filas <= LIMITE_DIMENSION and 1 <= columnas <= LIMITE_DIMENSION):
+        raise ValueError(f"Filas y columnas deben estar entre 1 y {LIMITE_DIMENSION}")
+    if not (0 <= minas < filas * columnas):
+        raise ValueError(f"Las minas deben estar entre 0 y {filas * columnas - 1}")
+
+def resolver_dimensiones(dificultad, filas=None, columnas=None, minas=None):
+    """Devuelve (dificultad, filas, columnas, minas); si se indica algún tamaño, es personalizado"""
+    if filas is None and columnas is None and minas is None:
+        return (dificultad,) + DIFICULTADES[dificultad]
+
+    base_filas, base_columnas, _ = DIFICULTADES.get(dificultad, DIFICULTADES["principiante"])
+    filas = filas if filas is not None else base_filas
+    columnas = columnas if columnas is not None else base_columnas
+    if minas is None:
+        # Misma densidad que el modo avanzado (~15%)
+        minas = max(1, filas * columnas * 40 // 256)
+    validar_dimensiones(filas, columnas, minas)
+    return PERSONALIZADO, filas, columnas, minas
+
+def agregar_argumentos_tablero(parser):
+    """Añade --dificultad, --filas, --columnas, --minas y --semilla a un ArgumentParser"""
+    parser.add_argument("--dificultad", choices=sorted(DIFICULTADES), default="principiante")
+    parser.add_argument("--filas", type=int, help=f"Tablero personalizado (1-{LIMITE_DIMENSION})")
+    parser.add_argument("--columnas", type=int, help=f"Tablero personalizado (1-{LIMITE_DIMENSION})")
+    parser.add_argument("--minas", type=int, help="Minas del tablero personalizado")
+    parser.add_argument("--semilla", type=int, help="Semilla para generar tableros reproducibles")
+
+class PartidaBuscaminas:
+    """Estado y reglas de una partida de Buscaminas, sin sockets ni Pygame.
+
+    El tablero es un TableroCompacto (un byte por casilla con valor, estado
+    y bandera), así que una partida de un millón de casillas ocupa ~1 MB.
+    Con NumPy instalado los vecinos se cuentan de forma vectorizada.
+    """
+    def __init__(self, filas, columnas, minas, dificultad="", semilla=None):
+        validar_dimensiones(filas, columnas, minas)
+        self.tablero = None  # TableroCompacto, se crea en generar_tablero
+        self.filas = filas
+        self.columnas = columnas
+        self.minas = minas
+        self.dificultad = dificultad
+        self.casillas_restantes = filas * columnas - minas  # Libres sin destapar: 0 = victoria
+        self.tiempo_inicio = 0
+        self.tiempo_fin = 0
+        self.juego_terminado = False
+        self.resultado = None
+        self.capacidades = set()  # Extensiones negociadas con el cliente
+        self.semilla = semilla  # None = tablero distinto en cada partida
+
+    @classmethod
+    def desde_dificultad(cls, dificultad):
+        """Crea una partida con el tamaño asociado a una dificultad"""
+        filas, columnas, minas = DIFICULTADES[dificultad]
+        return cls(filas, columnas, minas, dificultad)
+
+    def generar_tablero(self):
+        """Genera el tablero con las minas colocadas aleatoriamente"""
+        self.tablero = generar_tablero(self.filas, self.columnas, self.minas,
+                                       random.Random(self.semilla))
+        self.casillas_restantes = self.filas * self.columnas - self.minas
+
+    def iniciar(self):
+        """Genera el tablero y pone en marcha el cronómetro de la partida"""
+        self.generar_tablero()
+        self.tiempo_inicio = time.time()
+
+    def casilla_visible(self, fila, columna):
+        """Lo que el cliente ve en una casilla: '□', '*' o el número de minas adyacentes"""
+        return self.tablero.visible(fila * self.columnas + columna)
+
+    def tiene_bandera(self, fila, columna):
+        """Indica si hay una bandera en la casilla"""
+        return self.tablero.tiene_bandera(fila * self.columnas + columna)
+
+    def tablero_visible_matriz(self):
+        """Tablero visible como lista de filas, tal como lo esperan los clientes"""
+        return self.tablero.matriz_visible()
+
+    def mensaje_configuracion(self):
+        """Mensaje inicial que se envía al cliente al conectarse"""
+        return {
+            "tipo": "configuracion",
+            "dificultad": self.dificultad,
+            "filas": self.filas,
+            "columnas": self.columnas,
+            "minas": self.minas,
+            "capacidades": list(CAPACIDADES_SERVIDOR)
+        }
+
+    def duracion(self):
+        """Duración de la partida en segundos (hasta ahora si no ha terminado)"""
+        if self.tiempo_inicio == 0:
+            return 0
+        fin = self.tiempo_fin if self.juego_terminado else time.time()
+        return round(fin - self.tiempo_inicio)
+
+    def procesar_mensaje(self, mensaje):
+        """Aplica un mensaje del cliente y devuelve la lista de respuestas a enviar"""
+        if mensaje["tipo"] == "coordenada":
+            return self.destapar(mensaje["fila"], mensaje["columna"])
+        elif mensaje["tipo"] == "bandera":
+            return self.cambiar_bandera(mensaje["fila"], mensaje["columna"], mensaje["accion"])
+        elif mensaje["tipo"] == "protocolo":
+            # Sólo se activan las extensiones que el servidor conoce; un cliente
+            # que nunca envía este mensaje sigue con una respuesta por casilla
+            self.capacidades = set(mensaje.get("capacidades", [])) & set(CAPACIDADES_SERVIDOR)
+        return []
+
+    def destapar(self, fila, columna):
+        """Destapa una casilla y devuelve las respuestas para el cliente"""
+        respuestas = []
+
+        # Verificar que las coordenadas estén dentro del rango
+        if not (0 <= fila < self.filas and 0 <= columna < self.columnas) or self.juego_terminado:
+            return respuestas
+
+        indice = fila * self.columnas + columna
+
+        # Verificar si la casilla ya está destapada
+        if self.tablero.esta_destapada(indice):
+            respuestas.append({
+                "tipo": "control",
+                "estado": "casilla_ocupada",
+                "mensaje": "Esta casilla ya está destapada"
+            })
+            return respuestas
+
+        # Verificar si hay mina
+        if self.tablero.es_mina(indice):
+            # Juego perdido: revelar todas las minas (O(minas) con sus posiciones precalculadas)
+            self.tablero.destapar_minas()
+
+            respuesta = {
+                "tipo": "control",
+                "estado": "mina_pisada",
+                "mensaje": "¡BOOM! Has perdido."
+            }
+            if "minas" in self.capacidades:
+                respuesta["minas"] = self.tablero.coordenadas_minas()
+            else:
+                respuesta["tablero"] = self.tablero_visible_matriz()
+            respuestas.append(respuesta)
+            respuestas.append(self.terminar("derrota"))
+            return respuestas
+
+        # Revelar casilla y, si es un 0, toda la región conectada
+        reveladas = self.revelar_region(fila, columna)
+
+        if "casillas_libres" in self.capacidades:
+            respuestas.append({
+                "tipo": "control",
+                "estado": "casillas_libres",
+                "casillas": reveladas
+            })
+        else:
+            for i, j, valor in reveladas:
+                respuestas.append({
+                    "tipo": "control",
+                    "estado": "casilla_libre",
+                    "valor": valor,
+                    "fila": i,
+                    "columna": j
+                })
+
+        # Verificar victoria (contador, sin recorrer el tablero)
+        if self.casillas_restantes == 0:
+            respuestas.append(self.terminar("victoria"))
+
+        return respuestas
+
+    def revelar_region(self, fila, columna):
+        """Destapa una casilla y, si es un 0, su región con un recorrido en anchura.
+        Si la región pasa de LIMITE_RECORRIDO casillas y NumPy está instalado,
+        el resto se destapa de forma vectorizada. Devuelve la lista
+        [fila, columna, valor] de las casillas destapadas."""
+        columnas = self.columnas
+        celdas = self.tablero.celdas
+        valor = self.tablero.destapar(fila * columnas + columna)
+        reveladas = [[fila, columna, valor]]
+
+        # Cola explícita en lugar de recursión: no depende del límite de recursión
+        pendientes = deque()
+        if valor == 0:
+            pendientes.append((fila, columna))
+
+        while pendientes:
+            if numpy is not None and len(reveladas) > LIMITE_RECORRIDO:
+                # Región grande: lo que falta sale de las máscaras sin recorrer casilla a casilla
+                reveladas.extend(destapar_region_numpy(self.tablero, fila, columna))
+                break
+            f, c = pendientes.popleft()
+            for i in range(max(0, f - 1), min(self.filas, f + 2)):
+                base = i * columnas
+                for j in range(max(0, c - 1), min(columnas, c + 2)):
+                    # Saltar casillas ya destapadas (incluida la propia)
+                    celda = celdas[base + j]
+                    if celda & DESTAPADA:
+                        continue
+
+                    # Los vecinos de un 0 nunca son minas
+                    celdas[base + j] = celda | DESTAPADA
+                    valor = celda & MASCARA_VALOR
+                    reveladas.append([i, j, valor])
+
+                    if valor == 0:
+                        pendientes.append((i, j))
+
+        self.casillas_restantes -= len(reveladas)
+        return reveladas
+
+    def cambiar_bandera(self, fila, columna, accion):
+        """Coloca o retira una bandera y devuelve las respuestas para el cliente"""
+        # Verificar que las coordenadas estén dentro del rango
+        if not (0 <= fila < self.filas and 0 <= columna < self.columnas):
+            return []
+        indice = fila * self.columnas + columna
+        # Verificar que la casilla no esté descubierta
+        if self.tablero.esta_destapada(indice):
+            return []
+
+        bandera = self.tablero.tiene_bandera(indice)
+        if accion == "colocar" and not bandera:
+            self.tablero.poner_bandera(indice, True)
+            estado = "bandera_colocada"
+        elif accion == "retirar" and bandera:
+            self.tablero.poner_bandera(indice, False)
+            estado = "bandera_retirada"
+        else:
+            return []
+
+        return [{
+            "tipo": "control",
+            "estado": estado,
+            "fila": fila,
+            "columna": columna
+        }]
+
+    def terminar(self, resultado):
+        """Marca la partida como terminada y devuelve el mensaje de fin"""
+        self.juego_terminado = True
+        self.resultado = resultado
+        self.tiempo_fin = time.time()
+        return {
+            "tipo": "fin",
+            "resultado": resultado,
+            "duracion": self.duracion()
+        }
@@ -0,0 +1,250 @@
+import json
+import struct
+from itertools import chain
+
+# Protocolo por defecto: un objeto JSON por línea terminada en '\n'.
+#
+# Protocolo binario (capacidad "binario", se activa con el mensaje "protocolo"):
+# cada trama es una cabecera de 5 bytes (tipo: 1 byte, longitud del contenido:
+# 4 bytes, big-endian) seguida del contenido. Los mensajes frecuentes tienen
+# un formato fijo con struct; cualquier otro viaja como JSON dentro de una
+# trama TRAMA_JSON, así que el binario nunca pierde información.
+TRAMA_JSON = 0
+TRAMA_COORDENADA = 1        # fila, columna
+TRAMA_BANDERA = 2           # fila, columna, accion (1 = colocar, 0 = retirar)
+TRAMA_CASILLA_LIBRE = 3     # fila, columna, valor
+TRAMA_CASILLAS_LIBRES = 4   # (fila, columna, valor) repetido
+TRAMA_ESTADO_BANDERA = 5    # fila, columna, 1 = bandera_colocada / 0 = bandera_retirada
+TRAMA_MINA_PISADA = 6       # filas, columnas, un byte por casilla visible y el texto del mensaje
+TRAMA_MINAS = 7             # número de minas, (fila, columna) de cada una y el texto del mensaje
+
+# Tramas que puede enviar un cliente; los servidores rechazan las demás sin decodificarlas
+TRAMAS_CLIENTE = (TRAMA_JSON, TRAMA_COORDENADA, TRAMA_BANDERA)
+
+CABECERA = struct.Struct("!BI")
+COORDENADA = struct.Struct("!HH")
+CUENTA = struct.Struct("!I")
+CASILLA = struct.Struct("!HHB")
+
+# Tamaño máximo del contenido de una trama o línea JSON. La cascada que
+# destapa casi todo un tablero de 1000x1000 ocupa ~5 MB en binario y ~15 MB en JSON
+LIMITE_TRAMA = 16 * 1024 * 1024
+
+# Mensajes que un servidor de un solo hilo codifica seguidos antes de volver a
+# su bucle: una cascada sin "casillas_libres" es un mensaje por casilla
+LOTE_CODIFICACION = 1024
+
+# Codificación de las casillas visibles en las instantáneas del tablero:
+# 0-8 minas vecinas, 9 = mina, 10 = casilla tapada
+VALOR_VISIBLE = list(range(9)) + ['*', '□']
+CODIGO_VISIBLE = {valor: codigo for codigo, valor in enumerate(VALOR_VISIBLE)}
+
+def codificar_json(mensaje):
+    """Mensaje como línea JSON en bytes (protocolo por defecto)"""
+    return (json.dumps(mensaje) + '\n').encode('utf-8')
+
+def trama(tipo, contenido):
+    """Cabecera más contenido de una trama binaria"""
+    return CABECERA.pack(tipo, len(contenido)) + contenido
+
+def codificar_binario(mensaje):
+    """Mensaje como trama binaria; los que no tienen formato propio van como JSON"""
+    tipo = mensaje.get("tipo")
+    estado = mensaje.get("estado")
+    try:
+        if tipo == "coordenada" and len(mensaje) == 3:
+            return trama(TRAMA_COORDENADA, COORDENADA.pack(mensaje["fila"], mensaje["columna"]))
+        if tipo == "bandera" and len(mensaje) == 4 and mensaje["accion"] in ("colocar", "retirar"):
+            accion = 1 if mensaje["accion"] == "colocar" else 0
+            return trama(TRAMA_BANDERA, CASILLA.pack(mensaje["fila"], mensaje["columna"], accion))
+        if tipo == "control" and estado == "casilla_libre" and len(mensaje) == 5:
+            return trama(TRAMA_CASILLA_LIBRE,
+                         CASILLA.pack(mensaje["fila"], mensaje["columna"], mensaje["valor"]))
+        if tipo == "control" and estado == "casillas_libres" and len(mensaje) == 3:
+            casillas = mensaje["casillas"]
+            # Un solo pack con el formato repetido es más rápido que un pack por casilla
+            return trama(TRAMA_CASILLAS_LIBRES,
+                         struct.pack("!" + "HHB" * len(casillas), *chain.from_iterable(casillas)))
+        if tipo == "control" and estado in ("bandera_colocada", "bandera_retirada") and len(mensaje) == 4:
+            colocada = 1 if estado == "bandera_colocada" else 0
+            return trama(TRAMA_ESTADO_BANDERA, CASILLA.pack(mensaje["fila"], mensaje["columna"], colocada))
+        if tipo == "control" and estado == "mina_pisada" and len(mensaje) == 4 and "minas" in mensaje:
+            minas = mensaje["minas"]
+            return trama(TRAMA_MINAS, CUENTA.pack(len(minas)) +
+                         struct.pack("!" + "HH" * len(minas), *chain.from_iterable(minas)) +
+                         mensaje["mensaje"].encode('utf-8'))
+        if tipo == "control" and estado == "mina_pisada" and len(mensaje) == 4:
+            tablero = mensaje["tablero"]
+            columnas = len(tablero[0]) if tablero else 0
+            casillas = b"".join(bytes(map(CODIGO_VISIBLE.__getitem__, fila)) for fila in tablero)
+            return trama(TRAMA_MINA_PISADA, COORDENADA.pack(len(tablero), columnas) + casillas +
+                         mensaje["mensaje"].encode('utf-8'))
+    except (KeyError, TypeError, ValueError, IndexError, struct.error):
+        pass  # Valores fuera de rango o con otra forma: se envían como JSON
+    return trama(TRAMA_JSON, json.dumps(mensaje).encode('utf-8'))
+
+def decodificar_json(datos):
+    """Objeto JSON de un mensaje; cualquier otro valor JSON (null, listas...) lanza ValueError"""
+    mensaje = json.loads(datos)
+    if not isinstance(mensaje, dict):
+        raise ValueError("El mensaje no es un objeto JSON")
+    return mensaje
+
+def codificar(mensaje, binario=False):
+    """Codifica un mensaje con el protocolo negociado"""
+    return codificar_binario(mensaje) if binario else codificar_json(mensaje)
+
+def decodificar_binario(tipo, contenido, permitidas=None):
+    """Reconstruye el diccionario de un mensaje a partir del contenido de su trama (bytes o memoryview).
+
+    Con 'permitidas' sólo se aceptan esos tipos de trama. Un contenido que no
+    encaja con su tipo lanza ValueError o struct.error.
+    """
+    if permitidas is not None and tipo not in permitidas:
+        raise ValueError(f"Tipo de trama no admitido: {tipo}")
+    if tipo == TRAMA_JSON:
+        return decodificar_json(bytes(contenido))
+    if tipo == TRAMA_COORDENADA:
+        fila, columna = COORDENADA.unpack(contenido)
+        return {"tipo": "coordenada", "fila": fila, "columna": columna}
+    if tipo == TRAMA_BANDERA:
+        fila, columna, accion = CASILLA.unpack(contenido)
+        return {"tipo": "bandera", "accion": "colocar" if accion else "retirar", "fila": fila, "columna": columna}
+    if tipo == TRAMA_CASILLA_LIBRE:
+        fila, columna, valor = CASILLA.unpack(contenido)
+        return {"tipo": "control", "estado": "casilla_libre", "valor": valor, "fila": fila, "columna": columna}
+    if tipo == TRAMA_CASILLAS_LIBRES:
+        return {"tipo": "control", "estado": "casillas_libres",
+                "casillas": list(map(list, CASILLA.iter_unpack(contenido)))}
+    if tipo == TRAMA_ESTADO_BANDERA:
+        fila, columna, colocada = CASILLA.unpack(contenido)
+        estado = "bandera_colocada" if colocada else "bandera_retirada"
+        return {"tipo": "control", "estado": estado, "fila": fila, "columna": columna}
+    if tipo == TRAMA_MINA_PISADA:
+        filas, columnas = COORDENADA.unpack_from(contenido)
+        inicio = COORDENADA.size
+        fin = inicio + filas * columnas
+        if fin > len(contenido):
+            raise ValueError("Tablero incompleto")
+        if max(contenido[inicio:fin], default=0) >= len(VALOR_VISIBLE):
+            raise ValueError("Código de casilla desconocido")
+        tablero = [list(map(VALOR_VISIBLE.__getitem__, contenido[i:i + columnas]))
+                   for i in range(inicio, fin, columnas)]
+        return {"tipo": "control", "estado": "mina_pisada",
+                "mensaje": bytes(contenido[fin:]).decode('utf-8'), "tablero": tablero}
+    if tipo == TRAMA_MINAS:
+        cantidad, = CUENTA.unpack_from(contenido)
+        fin = CUENTA.size + cantidad * COORDENADA.size
+        if fin > len(contenido):
+            raise ValueError("Lista de minas incompleta")
+        minas = list(map(list, COORDENADA.iter_unpack(contenido[CUENTA.size:fin])))
+        return {"tipo": "control", "estado": "mina_pisada",
+                "mensaje": bytes(contenido[fin:]).decode('utf-8'), "minas": minas}
+    raise ValueError(f"Tipo de trama desconocido: {tipo}")
+
+class LectorTramas:
+    """Buffer de recepción reutilizable con enmarcado sin copias (líneas JSON o tramas binarias).
+
+    Los datos se leen con recv_into directamente en un bytearray; inicio y fin
+    delimitan los bytes pendientes, así que extraer un mensaje sólo avanza un
+    índice en lugar de copiar el resto del buffer. Los mensajes se decodifican
+    enteros, por lo que un carácter UTF-8 partido entre dos recv no se rompe.
+    """
+    def __init__(self, capacidad=4096):
+        self.buffer = bytearray(capacidad)
+        self.vista = memoryview(self.buffer)
+        self.inicio = 0  # Primer byte sin consumir
+        self.fin = 0     # Final de los datos recibidos
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def descartar(self):
+        """Olvida todos los bytes pendientes"""
+        self.inicio = self.fin = 0
+
+    def reservar(self, minimo):
+        """Garantiza al menos 'minimo' bytes libres al final del buffer"""
+        pendientes = self.fin - self.inicio
+        if pendientes == 0:
+            self.inicio = self.fin = 0
+        if len(self.buffer) - self.fin >= minimo:
+            return
+
+        if pendientes + minimo > len(self.buffer):
+            # No cabe ni moviendo los pendientes al principio: crecer al doble
+            if pendientes > LIMITE_TRAMA + CABECERA.size:
+                self.descartar()
+                raise ValueError(f"Mensaje demasiado largo ({pendientes} bytes sin terminar)")
+            nuevo = bytearray(max(2 * len(self.buffer), pendientes + minimo))
+            nuevo[:pendientes] = self.vista[self.inicio:self.fin]
+            self.buffer = nuevo
+            self.vista = memoryview(nuevo)
+        else:
+            # Mover los pendientes al principio: una copia por vuelta del buffer, no por mensaje
+            self.vista[:pendientes] = self.vista[self.inicio:self.fin]
+        self.inicio, self.fin = 0, pendientes
+
+    def recibir(self, sock, minimo=1024):
+        """Lee del socket con recv_into en el espacio libre; devuelve los bytes leídos (0 = cerrado)"""
+        self.reservar(minimo)
+        leidos = sock.recv_into(self.vista[self.fin:])
+        self.fin += leidos
+        return leidos
+
+    def agregar(self, datos):
+        """Añade bytes ya recibidos por otra vía"""
+        self.reservar(len(datos))
+        self.vista[self.fin:self.fin + len(datos)] = datos
+        self.fin += len(datos)
+
+    def tiene_mensaje(self, binario=False):
+        """Indica si hay al menos un mensaje completo pendiente"""
+        if binario:
+            if self.fin - self.inicio < CABECERA.size:
+                return False
+            _, longitud = CABECERA.unpack_from(self.buffer, self.inicio)
+            return self.fin - self.inicio >= CABECERA.size + longitud
+        return self.buffer.find(b'\n', self.inicio, self.fin) >= 0
+
+    def extraer(self, binario=False, permitidas=None):
+        """Devuelve el siguiente mensaje completo decodificado, o None si falta por llegar.
+
+        Un mensaje mal formado, que no es un objeto JSON o, en binario, de un
+        tipo fuera de 'permitidas' se consume y lanza ValueError, así que None
+        sólo significa que no hay mensaje completo; una longitud mayor que
+        LIMITE_TRAMA descarta todo lo pendiente porque ya no se puede
+        recuperar el enmarcado.
+        """
+        if binario:
+            if self.fin - self.inicio < CABECERA.size:
+                return None
+            tipo, longitud = CABECERA.unpack_from(self.buffer, self.inicio)
+            if longitud > LIMITE_TRAMA:
+                self.descartar()
+                raise ValueError(f"Trama demasiado larga ({longitud} bytes)")
+            comienzo = self.inicio + CABECERA.size
+            final = comienzo + longitud
+            if final > self.fin:
+                return None
+            self.inicio = final
+            try:
+                return decodificar_binario(tipo, self.vista[comienzo:final], permitidas)
+            except (struct.error, IndexError, KeyError) as e:
+                raise ValueError(f"Trama mal formada: {e}")
+
+        posicion = self.buffer.find(b'\n', self.inicio, self.fin)
+        if posicion < 0:
+            return None
+        linea = bytes(self.vista[self.inicio:posicion])  # Sólo se copia el propio mensaje
+        self.inicio = posicion + 1
+        return decodificar_json(linea)
+
+    def leer_mensaje(self, sock, binario=False):
+        """Bloquea hasta tener un mensaje completo del socket y lo devuelve"""
+        while True:
+            mensaje = self.extraer(binario)
+            if mensaje is not None:
+                return mensaje
+            if self.recibir(sock) == 0:
+                raise ConnectionError("Conexión cerrada por el servidor")
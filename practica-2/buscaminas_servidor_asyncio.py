@@ -0,0 +1,215 @@
+import asyncio
+import struct
+import sys
+import time
+import argparse
+
+from buscaminas_motor import (PartidaBuscaminas, ampliar_limite_descriptores,
+                              agregar_argumentos_tablero, resolver_dimensiones)
+from buscaminas_metricas import MetricasServidor, respuesta_http
+from buscaminas_protocolo import (CABECERA, LIMITE_TRAMA, LOTE_CODIFICACION, TRAMAS_CLIENTE, codificar,
+                                  decodificar_binario, decodificar_json)
+
+# Tamaño máximo de una línea JSON recibida; una línea más larga cierra la conexión
+LIMITE_LINEA = 64 * 1024
+
+# Tamaño máximo de una petición HTTP al endpoint de métricas
+LIMITE_PETICION_METRICAS = 8192
+
+class ServidorAsyncio:
+    """Servidor de Buscaminas con asyncio: una corrutina por conexión, protocolo JSON por líneas"""
+    def __init__(self, ip, puerto, dificultad="principiante", filas=None, columnas=None, minas=None,
+                 semilla=None, puerto_metricas=None, reuse_port=False):
+        self.ip = ip
+        self.puerto = puerto
+        # Con SO_REUSEPORT varios procesos escuchan en el mismo puerto y el núcleo reparte las conexiones
+        self.reuse_port = reuse_port
+        self.puerto_metricas = puerto_metricas  # None = sin endpoint de métricas
+        # Sin filas/columnas/minas se usa el tamaño de la dificultad; con ellas, un tablero personalizado
+        self.dificultad, self.filas, self.columnas, self.minas = resolver_dimensiones(
+            dificultad, filas, columnas, minas)
+        # Con semilla, la partida n usa semilla + n: tableros distintos pero reproducibles
+        self.semilla = semilla
+        self.partidas_creadas = 0
+        self.servidor = None
+        self.servidor_metricas = None
+        self.conexiones_activas = 0
+        self.partidas = set()  # Partidas de las conexiones abiertas
+        self.metricas = MetricasServidor()  # Latencias por etapa y mensajes por tipo
+
+    def crear_partida(self):
+        """Crea una partida nueva para una conexión recién aceptada"""
+        semilla = None if self.semilla is None else self.semilla + self.partidas_creadas
+        self.partidas_creadas += 1
+        return PartidaBuscaminas(self.filas, self.columnas, self.minas, self.dificultad, semilla)
+
+    def enviar_mensaje(self, escritor, mensaje, binario=False):
+        """Encola un mensaje en el transporte con el protocolo negociado (no bloquea)"""
+        datos = codificar(mensaje, binario)
+        self.metricas.mensajes_enviados += 1
+        self.metricas.bytes_enviados += len(datos)
+        escritor.write(datos)
+
+    async def leer_mensaje(self, lector, binario, direccion):
+        """Lee el siguiente mensaje del cliente; devuelve (mensaje, instante de recepción) o
+        (None, 0) si ha cerrado la conexión.
+
+        En JSON las líneas que no son un objeto se descartan aquí, así que None
+        sólo significa fin de conexión; en binario una trama inválida lanza
+        ValueError porque ya no se puede confiar en el enmarcado.
+        """
+        while not binario:
+            # readline se encarga del enmarcado por '\n'
+            linea = await lector.readline()
+            if not linea:
+                return None, 0
+            recibido = time.perf_counter()
+            self.metricas.bytes_recibidos += len(linea)
+            try:
+                return decodificar_json(linea), recibido
+            except ValueError as e:
+                print(f"Error al decodificar mensaje de {direccion}: {e}")
+
+        try:
+            tipo, longitud = CABECERA.unpack(await lector.readexactly(CABECERA.size))
+            if longitud > LIMITE_TRAMA:
+                raise ValueError(f"Trama demasiado larga ({longitud} bytes)")
+            contenido = await lector.readexactly(longitud)
+        except asyncio.IncompleteReadError:
+            return None, 0
+        recibido = time.perf_counter()
+        self.metricas.bytes_recibidos += CABECERA.size + longitud
+        try:
+            return decodificar_binario(tipo, contenido, TRAMAS_CLIENTE), recibido
+        except (struct.error, IndexError, KeyError) as e:
+            raise ValueError(f"Trama mal formada: {e}")
+
+    async def atender_cliente(self, lector, escritor):
+        """Corrutina que atiende una conexión durante toda su partida"""
+        self.conexiones_activas += 1
+        self.metricas.conexiones += 1
+        direccion = escritor.get_extra_info("peername")
+        partida = self.crear_partida()
+        partida.iniciar()
+        self.partidas.add(partida)
+
+        try:
+            # Enviar confirmación y dificultad al cliente
+            self.enviar_mensaje(escritor, partida.mensaje_configuracion())
+            await escritor.drain()
+
+            while True:
+                # Tras el mensaje "protocolo" el cliente puede pasar a tramas binarias
+                binario = "binario" in partida.capacidades
+                mensaje, recibido = await self.leer_mensaje(lector, binario, direccion)
+                if mensaje is None:
+                    break  # Conexión cerrada por el cliente
+                parseado = time.perf_counter()
+
+                if mensaje.get("tipo") == "desconexion":
+                    self.metricas.contar_mensaje("desconexion")
+                    break
+
+                try:
+                    respuestas = partida.procesar_mensaje(mensaje)
+                except Exception as e:
+                    print(f"Error al procesar mensaje de {direccion}: {e}")
+                    continue
+                manejado = time.perf_counter()
+                self.metricas.registrar_respuestas(respuestas)
+
+                # Todas las respuestas de la jugada en una sola escritura; una cascada de
+                # miles de mensajes se codifica por lotes cediendo el bucle entre uno y otro
+                binario = "binario" in partida.capacidades
+                for inicio in range(0, len(respuestas), LOTE_CODIFICACION):
+                    if inicio:
+                        await asyncio.sleep(0)
+                    datos = [codificar(respuesta, binario)
+                             for respuesta in respuestas[inicio:inicio + LOTE_CODIFICACION]]
+                    self.metricas.mensajes_enviados += len(datos)
+                    self.metricas.bytes_enviados += sum(map(len, datos))
+                    escritor.writelines(datos)
+                    await escritor.drain()
+                self.metricas.registrar(mensaje["tipo"], recibido, parseado, manejado, time.perf_counter())
+
+        except ValueError as e:
+            # Línea mayor que LIMITE_LINEA o trama binaria inválida
+            print(f"Mensaje inválido de {direccion} ({e}), cerrando conexión")
+        except ConnectionError:
+            pass
+        finally:
+            self.conexiones_activas -= 1
+            self.partidas.discard(partida)
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def iniciar_servidor(self):
+        """Crea el socket de escucha"""
+        self.servidor = await asyncio.start_server(
+            self.atender_cliente, self.ip, self.puerto,
+            limit=LIMITE_LINEA, backlog=4096, reuse_address=True, reuse_port=self.reuse_port)
+        print(f"Servidor asyncio iniciado en {self.ip}:{self.puerto} ({self.dificultad}, {self.filas}x{self.columnas}, {self.minas} minas)")
+
+        if self.puerto_metricas is not None:
+            # Endpoint de métricas en el mismo bucle de eventos
+            self.servidor_metricas = await asyncio.start_server(
+                self.atender_metricas, self.ip, self.puerto_metricas,
+                limit=LIMITE_PETICION_METRICAS, reuse_address=True)
+            print(f"Métricas disponibles en http://{self.ip}:{self.puerto_metricas}/metrics")
+
+    def texto_metricas(self):
+        """Métricas actuales en formato Prometheus"""
+        activas = sum(1 for partida in self.partidas if not partida.juego_terminado)
+        return self.metricas.prometheus(self.conexiones_activas, activas)
+
+    async def atender_metricas(self, lector, escritor):
+        """Responde a una petición HTTP del endpoint de métricas y cierra la conexión"""
+        try:
+            peticion = await lector.readuntil(b"\r\n\r\n")
+            escritor.write(respuesta_http(peticion, self.texto_metricas()))
+            await escritor.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self):
+        """Atiende conexiones hasta que se cancela la tarea"""
+        await self.iniciar_servidor()
+        try:
+            async with self.servidor:
+                await self.servidor.serve_forever()
+        finally:
+            if self.servidor_metricas is not None:
+                self.servidor_metricas.close()
+
+    def ejecutar(self):
+        """Bucle principal: atiende todas las conexiones hasta Ctrl+C"""
+        try:
+            asyncio.run(self.servir())
+        except KeyboardInterrupt:
+            print("\nServidor detenido")
+            self.metricas.volcar(sys.stdout)
+
+# Código para ejecutar el servidor asyncio
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de Buscaminas basado en asyncio")
+    parser.add_argument("--ip", default="localhost")
+    parser.add_argument("--puerto", type=int, default=12345)
+    parser.add_argument("--puerto-metricas", type=int, help="Puerto del endpoint de métricas Prometheus (/metrics)")
+    agregar_argumentos_tablero(parser)
+    argumentos = parser.parse_args()
+
+    ampliar_limite_descriptores()
+    try:
+        servidor = ServidorAsyncio(argumentos.ip, argumentos.puerto, argumentos.dificultad,
+                                   argumentos.filas, argumentos.columnas, argumentos.minas,
+                                   argumentos.semilla, puerto_metricas=argumentos.puerto_metricas)
+    except ValueError as e:
+        parser.error(str(e))
+    # kill -USR1 <pid> muestra las métricas sin detener el servidor
+    servidor.metricas.instalar_senal()
+    servidor.ejecutar()
@@ -0,0 +1,346 @@
+import socket
+import selectors
+import threading
+import queue
+import time
+import sys
+import argparse
+from collections import deque
+
+from buscaminas_concurrencia import RegistroFragmentado
+from buscaminas_metricas import MetricasServidor
+from buscaminas_motor import (PartidaBuscaminas, ampliar_limite_descriptores,
+                              agregar_argumentos_tablero, resolver_dimensiones)
+from buscaminas_protocolo import TRAMAS_CLIENTE, LectorTramas, codificar
+
+# Tamaño por defecto del pool y de la cola de tareas (conexiones nuevas o con
+# datos por leer) a la espera de un hilo
+HILOS = 32
+LIMITE_COLA = 128
+
+# Segundos sin recibir nada antes de cerrar una conexión
+INACTIVIDAD = 60
+
+class ConexionHilos:
+    """Conexión de un cliente con su partida y su buffer de recepción.
+
+    No está nunca a la vez en el selector y en un hilo del pool, así que sólo
+    la toca un hilo en cada momento y no necesita cerrojo.
+    """
+    def __init__(self, cliente_socket, direccion):
+        self.cliente_socket = cliente_socket
+        self.direccion = direccion
+        self.partida = None  # Se crea en el pool para no frenar al despachador
+        self.lector = LectorTramas()
+        self.ultima_actividad = time.monotonic()
+
+class ServidorHilos:
+    """Servidor con un hilo despachador y un pool acotado de hilos compartido por todos los clientes.
+
+    El despachador vigila el socket de escucha y todas las conexiones con un
+    selector. Cada conexión nueva, y cada vez que una conexión tiene datos
+    por leer, se saca del selector y se mete como tarea en una cola acotada;
+    un hilo del pool la atiende con llamadas bloqueantes (un recv, los
+    mensajes completos que haya y un sendall por jugada) y la devuelve al
+    selector. Así N hilos atienden a cualquier número de clientes. Con la
+    cola llena, las conexiones nuevas se rechazan cerrándolas en lugar de
+    crear más hilos.
+    """
+    def __init__(self, ip, puerto, dificultad="principiante", filas=None, columnas=None, minas=None,
+                 semilla=None, hilos=HILOS, limite_cola=LIMITE_COLA, inactividad=INACTIVIDAD):
+        self.ip = ip
+        self.puerto = puerto
+        # Sin filas/columnas/minas se usa el tamaño de la dificultad; con ellas, un tablero personalizado
+        self.dificultad, self.filas, self.columnas, self.minas = resolver_dimensiones(
+            dificultad, filas, columnas, minas)
+        # Con semilla, la partida n usa semilla + n: tableros distintos pero reproducibles
+        self.semilla = semilla
+        self.partidas_creadas = 0
+        self.hilos = hilos
+        self.inactividad = inactividad
+        self.cola = queue.Queue(maxsize=limite_cola)  # ConexionHilos pendientes de un hilo
+        self.cerrojo = threading.Lock()  # Protege los contadores y las métricas compartidos
+        self.conexiones_activas = 0
+        self.conexiones_rechazadas = 0
+        self.partidas = RegistroFragmentado()  # dirección del cliente -> partida en curso
+        self.metricas = MetricasServidor()
+        self.servidor_socket = None
+        self.selector = None
+        # Conexiones que el pool devuelve al despachador; el aviso lo despierta del select
+        self.reactivar = deque()
+        self.aviso_lectura = None
+        self.aviso_escritura = None
+        self.thread_despachador = None
+        self.trabajadores = []
+        self.ejecutando = False
+
+    def crear_partida(self):
+        """Crea una partida nueva para una conexión (se llama desde los hilos del pool)"""
+        with self.cerrojo:
+            semilla = None if self.semilla is None else self.semilla + self.partidas_creadas
+            self.partidas_creadas += 1
+        return PartidaBuscaminas(self.filas, self.columnas, self.minas, self.dificultad, semilla)
+
+    def iniciar_servidor(self):
+        """Crea el socket de escucha y arranca el despachador y el pool (no bloquea)"""
+        self.servidor_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.servidor_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.servidor_socket.bind((self.ip, self.puerto))
+        self.servidor_socket.listen(socket.SOMAXCONN)
+        self.servidor_socket.setblocking(False)
+
+        self.aviso_lectura, self.aviso_escritura = socket.socketpair()
+        self.aviso_lectura.setblocking(False)
+        self.aviso_escritura.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.servidor_socket, selectors.EVENT_READ)
+        self.selector.register(self.aviso_lectura, selectors.EVENT_READ)
+        self.ejecutando = True
+
+        for numero in range(self.hilos):
+            trabajador = threading.Thread(target=self.trabajar, name=f"trabajador-{numero}", daemon=True)
+            trabajador.start()
+            self.trabajadores.append(trabajador)
+
+        self.thread_despachador = threading.Thread(target=self.despachar, name="despachador", daemon=True)
+        self.thread_despachador.start()
+        print(f"Servidor con pool de {self.hilos} hilos iniciado en {self.ip}:{self.puerto} "
+              f"({self.dificultad}, {self.filas}x{self.columnas}, {self.minas} minas)")
+
+    def despachar(self):
+        """Hilo despachador: acepta conexiones y pasa al pool las que tienen datos por leer"""
+        revision = time.monotonic()
+        while self.ejecutando:
+            for clave, _ in self.selector.select(timeout=1.0):
+                if clave.fileobj is self.servidor_socket:
+                    self.aceptar_conexiones()
+                elif clave.fileobj is self.aviso_lectura:
+                    self.reactivar_conexiones()
+                else:
+                    # Fuera del selector mientras un hilo la atiende: una tarea por conexión a la vez
+                    self.selector.unregister(clave.fileobj)
+                    self.cola.put(clave.data)  # Con la cola llena, esperar frena la lectura de todos
+            if time.monotonic() - revision >= 1.0:
+                revision = time.monotonic()
+                self.cerrar_inactivas()
+
+        # Al parar, cerrar el socket de escucha y las conexiones que esperaban datos
+        for clave in list(self.selector.get_map().values()):
+            clave.fileobj.close()
+        self.selector.close()
+        self.servidor_socket = None
+
+    def aceptar_conexiones(self):
+        """Acepta las conexiones pendientes y encarga al pool darlas de alta"""
+        while True:
+            try:
+                cliente_socket, direccion = self.servidor_socket.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # Por ejemplo, límite de descriptores alcanzado (EMFILE)
+                print(f"Error al aceptar conexión: {e}")
+                time.sleep(0.1)
+                return
+            try:
+                self.cola.put_nowait(ConexionHilos(cliente_socket, direccion))
+            except queue.Full:
+                # Pool ocupado y cola llena: rechazar en lugar de acumular conexiones
+                with self.cerrojo:
+                    self.conexiones_rechazadas += 1
+                cliente_socket.close()
+
+    def reactivar_conexiones(self):
+        """Vuelve a vigilar en el selector las conexiones que el pool ya ha atendido"""
+        try:
+            while self.aviso_lectura.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        while self.reactivar:
+            conexion = self.reactivar.popleft()
+            self.selector.register(conexion.cliente_socket, selectors.EVENT_READ, conexion)
+
+    def avisar(self):
+        """Despierta al despachador (desde cualquier hilo)"""
+        try:
+            self.aviso_escritura.send(b"\0")
+        except OSError:
+            pass  # Buffer lleno (ya hay avisos pendientes) o servidor cerrado
+
+    def cerrar_inactivas(self):
+        """Cierra las conexiones que llevan más de 'inactividad' segundos sin enviar nada"""
+        limite = time.monotonic() - self.inactividad
+        for clave in list(self.selector.get_map().values()):
+            conexion = clave.data
+            if conexion is not None and conexion.ultima_actividad < limite:
+                self.selector.unregister(clave.fileobj)
+                print(f"Cliente {conexion.direccion} inactivo durante {self.inactividad} s, cerrando conexión")
+                self.desconectar(conexion)
+
+    def trabajar(self):
+        """Bucle de un hilo del pool: atiende tareas de la cola hasta recibir None"""
+        while True:
+            conexion = self.cola.get()
+            if conexion is None:
+                return
+            try:
+                abierta = self.atender(conexion)
+            except Exception as e:
+                # Un fallo con un cliente no debe dejar al pool con un hilo menos
+                print(f"Error inesperado atendiendo a {conexion.direccion}: {e}")
+                abierta = False
+            if abierta and self.ejecutando:
+                conexion.ultima_actividad = time.monotonic()
+                self.reactivar.append(conexion)
+                self.avisar()
+            else:
+                self.desconectar(conexion)
+
+    def atender(self, conexion):
+        """Atiende una tarea de una conexión; devuelve False si hay que cerrarla"""
+        try:
+            if conexion.partida is None:
+                self.dar_de_alta(conexion)
+                return True
+            return self.atender_mensajes(conexion)
+        except socket.timeout:
+            print(f"Cliente {conexion.direccion} no lee sus respuestas en {self.inactividad} s, cerrando conexión")
+        except OSError:
+            pass  # Conexión reiniciada o cerrada por el cliente
+        return False
+
+    def dar_de_alta(self, conexion):
+        """Crea la partida de una conexión nueva y le envía la configuración"""
+        with self.cerrojo:
+            self.conexiones_activas += 1
+            self.metricas.conexiones += 1
+        # Los recv sólo se hacen con datos disponibles; el plazo acota los sendall a un cliente que no lee
+        conexion.cliente_socket.settimeout(self.inactividad)
+        conexion.partida = self.crear_partida()
+        conexion.partida.iniciar()
+        self.partidas.poner(conexion.direccion, conexion.partida)
+        conexion.cliente_socket.sendall(codificar(conexion.partida.mensaje_configuracion()))
+
+    def atender_mensajes(self, conexion):
+        """Lee lo que haya llegado y responde a todos los mensajes completos; False si hay que cerrar"""
+        cliente_socket, direccion, partida, lector = (
+            conexion.cliente_socket, conexion.direccion, conexion.partida, conexion.lector)
+        leidos = lector.recibir(cliente_socket)
+        if leidos == 0:
+            return False  # Conexión cerrada por el cliente
+        recibido = time.perf_counter()  # Los mensajes completos se terminan de recibir en este recv
+        with self.cerrojo:
+            self.metricas.bytes_recibidos += leidos
+
+        while True:
+            # Tras el mensaje "protocolo" el cliente puede pasar a tramas binarias
+            binario = "binario" in partida.capacidades
+            try:
+                mensaje = lector.extraer(binario, TRAMAS_CLIENTE)
+            except ValueError as e:
+                print(f"Error al decodificar mensaje de {direccion}: {e}")
+                if binario:
+                    return False  # Sin un enmarcado fiable no se puede seguir leyendo
+                continue  # extraer ya ha descartado la línea inválida
+            if mensaje is None:
+                return True  # Falta por llegar el resto del siguiente mensaje
+            parseado = time.perf_counter()
+
+            if mensaje.get("tipo") == "desconexion":
+                with self.cerrojo:
+                    self.metricas.contar_mensaje("desconexion")
+                return False
+
+            try:
+                respuestas = partida.procesar_mensaje(mensaje)
+            except Exception as e:
+                print(f"Error al procesar mensaje de {direccion}: {e}")
+                continue
+            manejado = time.perf_counter()
+
+            # Todas las respuestas de la jugada en un único sendall
+            binario = "binario" in partida.capacidades
+            datos = b"".join(codificar(respuesta, binario) for respuesta in respuestas)
+            if datos:
+                cliente_socket.sendall(datos)
+            with self.cerrojo:
+                self.metricas.registrar(mensaje["tipo"], recibido, parseado, manejado, time.perf_counter())
+                self.metricas.registrar_respuestas(respuestas)
+                self.metricas.mensajes_enviados += len(respuestas)
+                self.metricas.bytes_enviados += len(datos)
+
+    def desconectar(self, conexion):
+        """Cierra una conexión y libera su partida"""
+        conexion.cliente_socket.close()
+        if conexion.partida is not None:
+            self.partidas.quitar(conexion.direccion)
+            with self.cerrojo:
+                self.conexiones_activas -= 1
+
+    def partidas_activas(self):
+        """Número de partidas en curso sin terminar"""
+        return sum(1 for partida in self.partidas.valores() if not partida.juego_terminado)
+
+    def ejecutar(self):
+        """Arranca el servidor y espera hasta Ctrl+C"""
+        if self.servidor_socket is None:
+            self.iniciar_servidor()
+        try:
+            while self.ejecutando:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("\nServidor detenido")
+            print(f"Conexiones rechazadas por pool lleno: {self.conexiones_rechazadas} | "
+                  f"partidas abiertas: {len(self.partidas)} ({self.partidas_activas()} sin terminar)")
+            self.metricas.volcar(sys.stdout)
+        finally:
+            self.cerrar()
+
+    def cerrar(self):
+        """Deja de aceptar conexiones, cierra las que esperaban y pide a los hilos del pool que terminen"""
+        self.ejecutando = False
+        if self.thread_despachador is not None:
+            # El despachador cierra el socket de escucha y las conexiones del selector al salir del bucle
+            self.avisar()
+            self.thread_despachador.join(timeout=2.0)
+            self.aviso_escritura.close()
+
+        # Cerrar las conexiones que esperaban un hilo y avisar a cada hilo con un None
+        while True:
+            try:
+                conexion = self.cola.get_nowait()
+            except queue.Empty:
+                break
+            if conexion is not None:
+                conexion.cliente_socket.close()
+        # Los hilos son daemon: los que sigan atendiendo a un cliente terminan con el proceso
+        for _ in self.trabajadores:
+            try:
+                self.cola.put_nowait(None)
+            except queue.Full:
+                break
+
+# Código para ejecutar el servidor con pool de hilos
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de Buscaminas con un pool acotado de hilos")
+    parser.add_argument("--ip", default="localhost")
+    parser.add_argument("--puerto", type=int, default=12345)
+    parser.add_argument("--hilos", type=int, default=HILOS, help="Hilos del pool")
+    parser.add_argument("--limite-cola", type=int, default=LIMITE_COLA,
+                        help="Tareas (conexiones nuevas o con datos por leer) que pueden esperar un hilo libre")
+    parser.add_argument("--inactividad", type=float, default=INACTIVIDAD,
+                        help="Segundos sin mensajes antes de cerrar una conexión")
+    agregar_argumentos_tablero(parser)
+    argumentos = parser.parse_args()
+
+    ampliar_limite_descriptores()
+    try:
+        servidor = ServidorHilos(argumentos.ip, argumentos.puerto, argumentos.dificultad,
+                                 argumentos.filas, argumentos.columnas, argumentos.minas,
+                                 argumentos.semilla, argumentos.hilos, argumentos.limite_cola,
+                                 argumentos.inactividad)
+    except ValueError as e:
+        parser.error(str(e))
+    servidor.metricas.instalar_senal()
+    servidor.ejecutar()
@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from buscaminas_motor import ampliar_limite_descriptores, agregar_argumentos_tablero, resolver_dimensiones
+from buscaminas_servidor_asyncio import ServidorAsyncio
+from buscaminas_servidor_sesiones import ServidorSesiones
+
+# Cada proceso usa semillas separadas por este salto para no repetir tableros entre procesos
+SALTO_SEMILLA = 10 ** 9
+
+MOTORES = {
+    "sesiones": ServidorSesiones,
+    "asyncio": ServidorAsyncio,
+}
+
+def ejecutar_trabajador(numero, motor, ip, puerto, dificultad, filas, columnas, minas, semilla,
+                        puerto_metricas):
+    """Cuerpo de un proceso trabajador: su propio bucle de eventos y sus propias partidas"""
+    ampliar_limite_descriptores()
+    semilla = None if semilla is None else semilla + numero * SALTO_SEMILLA
+    # Cada trabajador expone sus métricas en su propio puerto (base + número)
+    metricas = None if puerto_metricas is None else puerto_metricas + numero
+    servidor = MOTORES[motor](ip, puerto, dificultad, filas, columnas, minas, semilla,
+                              puerto_metricas=metricas, reuse_port=True)
+    servidor.metricas.instalar_senal()
+    servidor.ejecutar()
+
+class LanzadorMultiproceso:
+    """Pre-fork: arranca N procesos que escuchan en el mismo ip:puerto con SO_REUSEPORT.
+
+    El núcleo reparte las conexiones entrantes entre los procesos, y cada uno
+    atiende las suyas con su propio bucle de eventos, sin estado compartido:
+    el rendimiento crece con el número de núcleos.
+    """
+    def __init__(self, procesos, motor, ip, puerto, dificultad="principiante", filas=None, columnas=None,
+                 minas=None, semilla=None, puerto_metricas=None):
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("Este sistema no admite SO_REUSEPORT")
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor}")
+        if procesos < 1:
+            raise ValueError("Hace falta al menos un proceso")
+        # Validar el tablero antes de lanzar los procesos
+        resolver_dimensiones(dificultad, filas, columnas, minas)
+        self.procesos = procesos
+        self.argumentos = (motor, ip, puerto, dificultad, filas, columnas, minas, semilla, puerto_metricas)
+        self.trabajadores = []
+
+    def iniciar(self):
+        """Lanza los procesos trabajadores"""
+        for numero in range(self.procesos):
+            trabajador = multiprocessing.Process(target=ejecutar_trabajador, args=(numero,) + self.argumentos,
+                                                 name=f"buscaminas-{numero}")
+            trabajador.start()
+            self.trabajadores.append(trabajador)
+        if hasattr(signal, "SIGUSR1"):
+            # kill -USR1 al lanzador: cada trabajador vuelca sus métricas
+            signal.signal(signal.SIGUSR1, self.reenviar_senal)
+        print(f"{self.procesos} procesos escuchando en {self.argumentos[1]}:{self.argumentos[2]}")
+
+    def reenviar_senal(self, numero, marco):
+        """Reenvía una señal recibida por el lanzador a los trabajadores vivos"""
+        for trabajador in self.trabajadores:
+            if trabajador.is_alive():
+                os.kill(trabajador.pid, numero)
+
+    def esperar(self):
+        """Espera a los trabajadores hasta que terminen o llegue Ctrl+C"""
+        try:
+            for trabajador in self.trabajadores:
+                trabajador.join()
+        except KeyboardInterrupt:
+            self.detener()
+
+    def esperar_todos(self, segundos):
+        """Espera como mucho 'segundos' en total a que terminen los trabajadores"""
+        limite = time.monotonic() + segundos
+        for trabajador in self.trabajadores:
+            trabajador.join(timeout=max(0, limite - time.monotonic()))
+
+    def detener(self):
+        """Detiene los trabajadores dejándoles mostrar sus estadísticas"""
+        # Desde la terminal, Ctrl+C ya les ha llegado a todos: darles tiempo a cerrar
+        self.esperar_todos(1)
+        # Si sólo se ha interrumpido al lanzador (kill -INT <pid>), reenviar la señal
+        self.reenviar_senal(signal.SIGINT, None)
+        self.esperar_todos(5)
+        for trabajador in self.trabajadores:
+            if trabajador.is_alive():
+                trabajador.terminate()
+                trabajador.join()
+
+# Código para ejecutar el servidor multiproceso
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de Buscaminas con varios procesos (SO_REUSEPORT)")
+    parser.add_argument("--ip", default="localhost")
+    parser.add_argument("--puerto", type=int, default=12345)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos trabajadores")
+    parser.add_argument("--motor", choices=sorted(MOTORES), default="sesiones",
+                        help="Bucle de eventos de cada proceso")
+    parser.add_argument("--puerto-metricas", type=int,
+                        help="Puerto de métricas del primer proceso; el proceso n usa este + n")
+    agregar_argumentos_tablero(parser)
+    argumentos = parser.parse_args()
+
+    try:
+        lanzador = LanzadorMultiproceso(argumentos.procesos, argumentos.motor, argumentos.ip, argumentos.puerto,
+                                        argumentos.dificultad, argumentos.filas, argumentos.columnas,
+                                        argumentos.minas, argumentos.semilla, argumentos.puerto_metricas)
+    except ValueError as e:
+        parser.error(str(e))
+    lanzador.iniciar()
+    lanzador.esperar()
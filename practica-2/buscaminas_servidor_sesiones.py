@@ -0,0 +1,477 @@
+import socket
+import selectors
+import argparse
+import sys
+import time
+from collections import deque
+
+from buscaminas_motor import (PartidaBuscaminas, ampliar_limite_descriptores,
+                              agregar_argumentos_tablero, resolver_dimensiones)
+from buscaminas_metricas import MetricasServidor, respuesta_http
+from buscaminas_protocolo import LOTE_CODIFICACION, TRAMAS_CLIENTE, LectorTramas, codificar
+
+# Contrapresión por conexión: con más de MARCA_ALTA bytes pendientes de enviar
+# se deja de leer a ese cliente; se vuelve a leer al bajar de MARCA_BAJA
+MARCA_ALTA = 256 * 1024
+MARCA_BAJA = 64 * 1024
+
+# Envío agrupado (scatter-gather) con sendmsg donde existe; en Windows se juntan los bytes
+ENVIO_AGRUPADO = hasattr(socket.socket, "sendmsg")
+MAX_BUFFERS_ENVIO = 1024  # IOV_MAX habitual en Linux
+
+# Tamaño máximo de una petición HTTP al endpoint de métricas
+LIMITE_PETICION_METRICAS = 8192
+
+class SesionCliente:
+    """Conexión de un cliente con su propia partida y buffers de recepción y envío"""
+    def __init__(self, cliente_socket, direccion, partida):
+        self.cliente_socket = cliente_socket
+        self.direccion = direccion
+        self.partida = partida
+        self.lector = LectorTramas()  # Buffer de recepción con enmarcado sin copias
+        self.cola_salida = deque()  # Bytes pendientes de enviar, en orden
+        self.respuestas_pendientes = deque()  # Respuestas aún sin codificar, en orden
+        self.bytes_pendientes = 0
+        self.lectura_pausada = False  # True mientras la cola supera la marca alta
+        self.eventos = selectors.EVENT_READ  # Eventos registrados en el selector
+        self.conectado = True
+        self.instante_recepcion = 0.0  # perf_counter() del último recv con datos
+        self.instante_parseo = 0.0  # perf_counter() al decodificar el mensaje en curso
+        self.jugadas_sin_enviar = 0  # Jugadas cuyas respuestas siguen en la cola de envío
+        self.llamadas_jugada = 0  # Llamadas de envío hechas desde que la cola estuvo vacía
+
+    def binario(self):
+        """Indica si el cliente ha negociado el protocolo binario"""
+        return "binario" in self.partida.capacidades
+
+class ServidorSesiones:
+    """Servidor sin interfaz gráfica que atiende muchas partidas en un único bucle de selectores"""
+    def __init__(self, ip, puerto, dificultad="principiante", filas=None, columnas=None, minas=None,
+                 semilla=None, marca_alta=MARCA_ALTA, marca_baja=MARCA_BAJA, puerto_metricas=None,
+                 reuse_port=False):
+        self.ip = ip
+        self.puerto = puerto
+        # Con SO_REUSEPORT varios procesos escuchan en el mismo puerto y el núcleo reparte las conexiones
+        self.reuse_port = reuse_port
+        self.puerto_metricas = puerto_metricas  # None = sin endpoint de métricas
+        # Sin filas/columnas/minas se usa el tamaño de la dificultad; con ellas, un tablero personalizado
+        self.dificultad, self.filas, self.columnas, self.minas = resolver_dimensiones(
+            dificultad, filas, columnas, minas)
+        # Con semilla, la partida n usa semilla + n: tableros distintos pero reproducibles
+        self.semilla = semilla
+        self.partidas_creadas = 0
+        self.marca_alta = marca_alta
+        self.marca_baja = marca_baja
+        # Llamadas al sistema de envío, para comprobar que no crecen con el tamaño de la cascada.
+        # llamadas_envio las cuenta todas; llamadas_jugadas sólo las de mensajes con respuesta
+        self.llamadas_envio = 0
+        self.llamadas_jugadas = 0
+        self.jugadas_atendidas = 0
+        self.max_llamadas_por_jugada = 0
+        self.metricas = MetricasServidor()  # Latencias por etapa y mensajes por tipo
+        self.servidor_socket = None
+        self.metricas_socket = None
+        self.peticiones_metricas = {}  # socket -> bytes de la petición o de la respuesta pendiente
+        self.sesiones = {}  # socket del cliente -> SesionCliente
+        self.selector = selectors.DefaultSelector()
+        self.ejecutando = False
+        self.observadores = []  # Callables observador(evento, sesion, respuestas), p. ej. una vista Pygame
+
+    def agregar_observador(self, observador):
+        """Registra un observador que se llama con ("conexion" | "mensaje" | "desconexion", sesion, respuestas).
+
+        'respuestas' son los mensajes enviados al cliente por un "mensaje"
+        (vacía en los demás eventos), para saber qué casillas han cambiado.
+        """
+        self.observadores.append(observador)
+
+    def notificar(self, evento, sesion, respuestas=()):
+        """Avisa a los observadores de un cambio en una sesión"""
+        for observador in self.observadores:
+            observador(evento, sesion, respuestas)
+
+    def crear_partida(self):
+        """Crea una partida nueva para una conexión recién aceptada"""
+        semilla = None if self.semilla is None else self.semilla + self.partidas_creadas
+        self.partidas_creadas += 1
+        return PartidaBuscaminas(self.filas, self.columnas, self.minas, self.dificultad, semilla)
+
+    def iniciar_servidor(self):
+        """Crea el socket de escucha y lo registra en el selector"""
+        self.servidor_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.servidor_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            self.servidor_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.servidor_socket.bind((self.ip, self.puerto))
+        self.servidor_socket.listen(socket.SOMAXCONN)
+
+        # Configurar el socket como no bloqueante
+        self.servidor_socket.setblocking(False)
+
+        # Registrar socket con el selector para aceptar conexiones
+        self.selector.register(self.servidor_socket, selectors.EVENT_READ, self.aceptar_conexion)
+        print(f"Servidor de sesiones iniciado en {self.ip}:{self.puerto} ({self.dificultad}, {self.filas}x{self.columnas}, {self.minas} minas)")
+
+        if self.puerto_metricas is not None:
+            self.iniciar_metricas()
+
+    def iniciar_metricas(self):
+        """Crea el socket del endpoint de métricas, atendido por el mismo selector"""
+        self.metricas_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.metricas_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.metricas_socket.bind((self.ip, self.puerto_metricas))
+        self.metricas_socket.listen(16)
+        self.metricas_socket.setblocking(False)
+        self.selector.register(self.metricas_socket, selectors.EVENT_READ, self.aceptar_metricas)
+        print(f"Métricas disponibles en http://{self.ip}:{self.puerto_metricas}/metrics")
+
+    def aceptar_metricas(self, socket_servidor, mascara):
+        """Callback para aceptar conexiones al endpoint de métricas"""
+        while True:
+            try:
+                conexion, _ = socket_servidor.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Error al aceptar conexión de métricas: {e}")
+                return
+            conexion.setblocking(False)
+            self.peticiones_metricas[conexion] = b""
+            self.selector.register(conexion, selectors.EVENT_READ, self.atender_metricas)
+
+    def atender_metricas(self, conexion, mascara):
+        """Lee la petición HTTP y, cuando está completa, envía las métricas y cierra"""
+        try:
+            if mascara & selectors.EVENT_READ:
+                datos = conexion.recv(4096)
+                if not datos:
+                    self.cerrar_metricas(conexion)
+                    return
+                peticion = self.peticiones_metricas[conexion] + datos
+                if b"\r\n\r\n" not in peticion and len(peticion) < LIMITE_PETICION_METRICAS:
+                    self.peticiones_metricas[conexion] = peticion
+                    return
+                # Petición completa: a partir de aquí se guarda la respuesta pendiente de enviar
+                self.peticiones_metricas[conexion] = respuesta_http(peticion, self.texto_metricas())
+                self.selector.modify(conexion, selectors.EVENT_WRITE, self.atender_metricas)
+            if mascara & selectors.EVENT_WRITE or self.peticiones_metricas[conexion]:
+                pendiente = self.peticiones_metricas[conexion]
+                enviados = conexion.send(pendiente)
+                self.peticiones_metricas[conexion] = pendiente[enviados:]
+                if enviados == len(pendiente):
+                    self.cerrar_metricas(conexion)
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.cerrar_metricas(conexion)
+
+    def cerrar_metricas(self, conexion):
+        """Cierra una conexión del endpoint de métricas"""
+        self.peticiones_metricas.pop(conexion, None)
+        try:
+            self.selector.unregister(conexion)
+        except (KeyError, ValueError):
+            pass
+        conexion.close()
+
+    def texto_metricas(self):
+        """Métricas actuales en formato Prometheus"""
+        activas = sum(1 for sesion in self.sesiones.values() if not sesion.partida.juego_terminado)
+        return self.metricas.prometheus(len(self.sesiones), activas)
+
+    def aceptar_conexion(self, socket_servidor, mascara):
+        """Callback para aceptar todas las conexiones pendientes"""
+        while True:
+            try:
+                cliente_socket, direccion = socket_servidor.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # Por ejemplo, límite de descriptores alcanzado (EMFILE)
+                print(f"Error al aceptar conexión: {e}")
+                return
+
+            cliente_socket.setblocking(False)
+
+            partida = self.crear_partida()
+            partida.iniciar()
+            sesion = SesionCliente(cliente_socket, direccion, partida)
+            self.sesiones[cliente_socket] = sesion
+            self.metricas.conexiones += 1
+
+            # Registrar cliente para eventos de lectura (y de escritura cuando haya cola)
+            self.selector.register(cliente_socket, selectors.EVENT_READ, self.atender_cliente)
+
+            # Enviar confirmación y dificultad al cliente
+            self.enviar_mensaje(sesion, partida.mensaje_configuracion())
+            self.notificar("conexion", sesion)
+
+    def atender_cliente(self, socket_cliente, mascara):
+        """Callback del selector para un cliente: primero vacía la cola de envío y luego lee"""
+        sesion = self.sesiones.get(socket_cliente)
+        if sesion is None:
+            return
+        if mascara & selectors.EVENT_WRITE:
+            pausada = sesion.lectura_pausada
+            if sesion.respuestas_pendientes and sesion.bytes_pendientes <= self.marca_baja:
+                self.codificar_lote(sesion)
+            self.vaciar_cola(sesion)
+            if pausada and sesion.conectado and not sesion.lectura_pausada:
+                # Mensajes que llegaron mientras estaba pausada y ya están en el buffer
+                self.procesar_pendientes(sesion)
+        if mascara & selectors.EVENT_READ and sesion.conectado and not sesion.lectura_pausada:
+            self.recibir_datos(sesion)
+
+    def recibir_datos(self, sesion):
+        """Lee los datos disponibles de un cliente y procesa los mensajes completos"""
+        socket_cliente = sesion.cliente_socket
+
+        try:
+            # recv_into escribe directamente en el buffer de la sesión
+            leidos = sesion.lector.recibir(socket_cliente)
+        except (BlockingIOError, InterruptedError):
+            return
+        except ConnectionError:
+            # Conexión reiniciada por el cliente
+            self.desconectar_cliente(sesion)
+            return
+        except Exception as e:
+            print(f"Error al recibir datos de {sesion.direccion}: {e}")
+            self.desconectar_cliente(sesion)
+            return
+
+        if not leidos:
+            # Conexión cerrada por el cliente
+            self.desconectar_cliente(sesion)
+            return
+
+        sesion.instante_recepcion = time.perf_counter()
+        self.metricas.bytes_recibidos += leidos
+        self.procesar_pendientes(sesion)
+
+    def procesar_pendientes(self, sesion):
+        """Procesa los mensajes completos del buffer mientras no haya contrapresión"""
+        # El protocolo puede cambiar a binario entre dos mensajes
+        while sesion.conectado and not sesion.lectura_pausada:
+            binario = sesion.binario()
+            try:
+                mensaje = sesion.lector.extraer(binario, TRAMAS_CLIENTE)
+            except ValueError as e:
+                print(f"Error al decodificar mensaje de {sesion.direccion}: {e}")
+                if binario:
+                    # Sin un enmarcado fiable no se puede seguir leyendo
+                    self.desconectar_cliente(sesion)
+                continue
+            if mensaje is None:
+                break
+            sesion.instante_parseo = time.perf_counter()
+            self.procesar_mensaje(sesion, mensaje)
+
+    def procesar_mensaje(self, sesion, mensaje):
+        """Procesa un mensaje completo recibido de un cliente"""
+        try:
+            if mensaje["tipo"] == "desconexion":
+                self.metricas.contar_mensaje("desconexion")
+                self.desconectar_cliente(sesion)
+                return
+
+            # Encolar las respuestas de la jugada y enviarlas juntas; una cascada larga se
+            # codifica por lotes en las siguientes vueltas del bucle para no bloquear a los demás
+            respuestas = sesion.partida.procesar_mensaje(mensaje)
+            manejado = time.perf_counter()
+            self.metricas.registrar_respuestas(respuestas)
+            sesion.respuestas_pendientes.extend(respuestas)
+            self.codificar_lote(sesion)
+            # Las llamadas de la jugada se cuentan al vaciarse la cola, aunque falten varios EVENT_WRITE;
+            # un mensaje sin respuesta (p. ej. "protocolo") no es una jugada
+            if respuestas:
+                sesion.jugadas_sin_enviar += 1
+            self.vaciar_cola(sesion)
+            self.metricas.registrar(mensaje["tipo"], sesion.instante_recepcion, sesion.instante_parseo,
+                                    manejado, time.perf_counter())
+            self.notificar("mensaje", sesion, respuestas)
+
+        except Exception as e:
+            print(f"Error al procesar mensaje de {sesion.direccion}: {e}")
+
+    def registrar_jugada(self, llamadas, jugadas=1):
+        """Acumula las llamadas de envío usadas para responder a unos mensajes.
+
+        Si llega otra jugada antes de que salgan las respuestas de la
+        anterior, las dos comparten cola y sus llamadas se cuentan juntas.
+        """
+        self.jugadas_atendidas += jugadas
+        self.llamadas_jugadas += llamadas
+        self.max_llamadas_por_jugada = max(self.max_llamadas_por_jugada, llamadas)
+
+    def llamadas_por_jugada(self):
+        """Media de llamadas al sistema de envío por mensaje con respuesta"""
+        return self.llamadas_jugadas / self.jugadas_atendidas if self.jugadas_atendidas else 0.0
+
+    def encolar_mensaje(self, sesion, mensaje):
+        """Codifica un mensaje con el protocolo negociado (JSON por defecto) y lo añade a la cola"""
+        datos = codificar(mensaje, sesion.binario())
+        sesion.cola_salida.append(datos)
+        sesion.bytes_pendientes += len(datos)
+        self.metricas.mensajes_enviados += 1
+
+    def codificar_lote(self, sesion):
+        """Codifica y encola hasta LOTE_CODIFICACION respuestas pendientes de la sesión"""
+        pendientes = sesion.respuestas_pendientes
+        for _ in range(min(LOTE_CODIFICACION, len(pendientes))):
+            self.encolar_mensaje(sesion, pendientes.popleft())
+
+    def enviar_mensaje(self, sesion, mensaje):
+        """Encola un mensaje e intenta enviarlo enseguida"""
+        if not sesion.conectado:
+            return False
+        self.encolar_mensaje(sesion, mensaje)
+        return self.vaciar_cola(sesion)
+
+    def vaciar_cola(self, sesion):
+        """Envía la cola con una llamada por vuelta (sendmsg); lo que no quepa espera a EVENT_WRITE"""
+        if not sesion.conectado:
+            return False
+        cola = sesion.cola_salida
+        try:
+            while cola:
+                if len(cola) > 1 and (not ENVIO_AGRUPADO or len(cola) > MAX_BUFFERS_ENVIO):
+                    # Demasiados buffers para un sendmsg (o no hay sendmsg): juntarlos en uno
+                    datos = b"".join(cola)
+                    cola.clear()
+                    cola.append(datos)
+                buffers = list(cola)
+                self.llamadas_envio += 1
+                if sesion.jugadas_sin_enviar:
+                    # La configuración inicial no cuenta como llamada de una jugada
+                    sesion.llamadas_jugada += 1
+                if ENVIO_AGRUPADO:
+                    enviados = sesion.cliente_socket.sendmsg(buffers)
+                else:
+                    enviados = sesion.cliente_socket.send(buffers[0])
+                sesion.bytes_pendientes -= enviados
+                self.metricas.bytes_enviados += enviados
+                completo = enviados == sum(len(buffer) for buffer in buffers)
+
+                # Quitar de la cola lo enviado; un buffer a medias se recorta sin copiar
+                while enviados:
+                    if enviados >= len(cola[0]):
+                        enviados -= len(cola[0])
+                        cola.popleft()
+                    else:
+                        cola[0] = memoryview(cola[0])[enviados:]
+                        enviados = 0
+                if not completo:
+                    break  # Buffer del núcleo lleno
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            if not isinstance(e, ConnectionError):
+                print(f"Error al enviar mensaje a {sesion.direccion}: {e}")
+            self.desconectar_cliente(sesion)
+            return False
+
+        if not cola and not sesion.respuestas_pendientes:
+            # Ya han salido todas las respuestas pendientes: cerrar la cuenta de sus jugadas
+            if sesion.jugadas_sin_enviar:
+                self.registrar_jugada(sesion.llamadas_jugada, sesion.jugadas_sin_enviar)
+            sesion.jugadas_sin_enviar = sesion.llamadas_jugada = 0
+        self.actualizar_eventos(sesion)
+        return True
+
+    def actualizar_eventos(self, sesion):
+        """Ajusta lectura/escritura en el selector según la cola de envío y las marcas"""
+        # Con respuestas sin codificar no se lee: el siguiente mensaje debe esperar a que salgan
+        if not sesion.lectura_pausada and (sesion.bytes_pendientes > self.marca_alta or
+                                           sesion.respuestas_pendientes):
+            # El cliente no lee al ritmo al que produce respuestas: dejar de leerle
+            sesion.lectura_pausada = True
+        elif (sesion.lectura_pausada and sesion.bytes_pendientes <= self.marca_baja and
+              not sesion.respuestas_pendientes):
+            sesion.lectura_pausada = False
+
+        eventos = 0 if sesion.lectura_pausada else selectors.EVENT_READ
+        if sesion.cola_salida or sesion.respuestas_pendientes:
+            eventos |= selectors.EVENT_WRITE
+        if eventos != sesion.eventos:
+            self.selector.modify(sesion.cliente_socket, eventos, self.atender_cliente)
+            sesion.eventos = eventos
+
+    def desconectar_cliente(self, sesion):
+        """Libera el socket y la partida de un cliente"""
+        if not sesion.conectado:
+            return
+        sesion.conectado = False
+        self.sesiones.pop(sesion.cliente_socket, None)
+        try:
+            self.selector.unregister(sesion.cliente_socket)
+        except (KeyError, ValueError):
+            pass
+        sesion.cliente_socket.close()
+        self.notificar("desconexion", sesion)
+
+    def check_eventos_red(self, timeout=None):
+        """Atiende los eventos de red pendientes (bloquea hasta `timeout` segundos)"""
+        eventos = self.selector.select(timeout=timeout)
+        for key, mascara in eventos:
+            callback = key.data
+            callback(key.fileobj, mascara)
+
+    def ejecutar(self):
+        """Bucle principal: bloquea en select() y atiende todas las sesiones hasta Ctrl+C"""
+        if self.servidor_socket is None:
+            self.iniciar_servidor()
+        self.ejecutando = True
+        try:
+            while self.ejecutando:
+                self.check_eventos_red()
+        except KeyboardInterrupt:
+            print("\nServidor detenido")
+            print(f"Envíos: {self.llamadas_envio} llamadas, {self.llamadas_jugadas} para "
+                  f"{self.jugadas_atendidas} mensajes con respuesta ({self.llamadas_por_jugada():.2f} "
+                  f"por mensaje, máximo {self.max_llamadas_por_jugada})")
+            self.metricas.volcar(sys.stdout)
+        finally:
+            self.cerrar()
+
+    def cerrar(self):
+        """Cierra todas las sesiones, el socket de escucha y el selector"""
+        self.ejecutando = False
+        for sesion in list(self.sesiones.values()):
+            self.desconectar_cliente(sesion)
+
+        if self.servidor_socket:
+            try:
+                self.selector.unregister(self.servidor_socket)
+            except (KeyError, ValueError):
+                pass
+            self.servidor_socket.close()
+            self.servidor_socket = None
+
+        for conexion in list(self.peticiones_metricas):
+            self.cerrar_metricas(conexion)
+        if self.metricas_socket:
+            self.cerrar_metricas(self.metricas_socket)
+            self.metricas_socket = None
+
+        self.selector.close()
+
+# Código para ejecutar el servidor sin interfaz gráfica
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de Buscaminas multipartida sin interfaz gráfica")
+    parser.add_argument("--ip", default="localhost")
+    parser.add_argument("--puerto", type=int, default=12345)
+    parser.add_argument("--puerto-metricas", type=int, help="Puerto del endpoint de métricas Prometheus (/metrics)")
+    agregar_argumentos_tablero(parser)
+    argumentos = parser.parse_args()
+
+    ampliar_limite_descriptores()
+    try:
+        servidor = ServidorSesiones(argumentos.ip, argumentos.puerto, argumentos.dificultad,
+                                    argumentos.filas, argumentos.columnas, argumentos.minas,
+                                    argumentos.semilla, puerto_metricas=argumentos.puerto_metricas)
+    except ValueError as e:
+        parser.error(str(e))
+    # kill -USR1 <pid> muestra las métricas sin detener el servidor
+    servidor.metricas.instalar_senal()
+    servidor.ejecutar()
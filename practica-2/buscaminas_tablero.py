@@ -0,0 +1,261 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Sin NumPy los vecinos se cuentan en Python puro
+
+# Cada casilla ocupa un byte de un bytearray:
+#   bits 0-3: valor oculto (0-8 minas vecinas, 9 = mina)
+#   bit 4:    casilla destapada
+#   bit 5:    bandera colocada
+MASCARA_VALOR = 0x0F
+MINA = 9
+DESTAPADA = 0x10
+BANDERA = 0x20
+
+# Por debajo de este número de casillas el coste fijo de NumPy supera al de Python
+UMBRAL_NUMPY = 256
+
+# Tabla para bytearray.translate que destapa todas las minas de una pasada
+TABLA_DESTAPAR_MINAS = bytes(
+    celda | DESTAPADA if celda & MASCARA_VALOR == MINA else celda for celda in range(256))
+
+# Con más de una mina por cada CASILLAS_POR_MINA casillas, una pasada de
+# translate (en C) es más rápida que recorrer la lista de minas en Python
+CASILLAS_POR_MINA = 100
+
+class TableroCompacto:
+    """Tablero de Buscaminas en un único bytearray indexado por fila * columnas + columna.
+
+    Un tablero de 1000x1000 ocupa ~1 MB en lugar de las tres listas de
+    punteros (valor, visible y bandera) que necesitaba la versión anterior.
+    """
+    def __init__(self, filas, columnas, relleno=0):
+        self.filas = filas
+        self.columnas = columnas
+        self.celdas = bytearray([relleno]) * (filas * columnas)
+        # Índices de las minas en un array('I'); generar_tablero sólo los guarda
+        # si hay pocas minas (None = se buscan en el tablero al perder)
+        self.posiciones_minas = None
+
+    def __len__(self):
+        return len(self.celdas)
+
+    def indice(self, fila, columna):
+        """Posición de una casilla en el bytearray"""
+        return fila * self.columnas + columna
+
+    def valor(self, indice):
+        """Valor oculto de la casilla: número de minas vecinas o MINA"""
+        return self.celdas[indice] & MASCARA_VALOR
+
+    def es_mina(self, indice):
+        """Indica si la casilla contiene una mina"""
+        return self.celdas[indice] & MASCARA_VALOR == MINA
+
+    def esta_destapada(self, indice):
+        """Indica si la casilla ya se ha destapado"""
+        return bool(self.celdas[indice] & DESTAPADA)
+
+    def destapar(self, indice):
+        """Marca la casilla como destapada y devuelve su valor"""
+        celda = self.celdas[indice] | DESTAPADA
+        self.celdas[indice] = celda
+        return celda & MASCARA_VALOR
+
+    def tiene_bandera(self, indice):
+        """Indica si hay una bandera en la casilla"""
+        return bool(self.celdas[indice] & BANDERA)
+
+    def poner_bandera(self, indice, colocada):
+        """Coloca (True) o retira (False) la bandera de la casilla"""
+        if colocada:
+            self.celdas[indice] |= BANDERA
+        else:
+            self.celdas[indice] &= ~BANDERA & 0xFF
+
+    def visible(self, indice):
+        """Lo que ve el cliente: '□' si está tapada, '*' si es mina o el número de minas vecinas"""
+        celda = self.celdas[indice]
+        if not celda & DESTAPADA:
+            return '□'
+        valor = celda & MASCARA_VALOR
+        return '*' if valor == MINA else valor
+
+    def destapar_minas(self):
+        """Destapa todas las minas (al perder la partida): O(minas) si se conocen sus posiciones"""
+        if self.posiciones_minas is None or len(self.posiciones_minas) * CASILLAS_POR_MINA > len(self.celdas):
+            self.celdas[:] = self.celdas.translate(TABLA_DESTAPAR_MINAS)
+            return
+        celdas = self.celdas
+        for indice in self.posiciones_minas:
+            celdas[indice] |= DESTAPADA
+
+    def buscar_minas(self):
+        """Índices de todas las minas recorriendo el tablero (vectorizado con NumPy si está instalado)"""
+        if numpy is not None and len(self.celdas) >= UMBRAL_NUMPY:
+            valores = numpy.frombuffer(self.celdas, dtype=numpy.uint8) & MASCARA_VALOR
+            return numpy.flatnonzero(valores == MINA).tolist()
+        return [i for i, celda in enumerate(self.celdas) if celda & MASCARA_VALOR == MINA]
+
+    def coordenadas_minas(self):
+        """Lista [fila, columna] de todas las minas, sin recorrer el tablero si se conocen sus posiciones"""
+        posiciones = self.posiciones_minas
+        if posiciones is None:
+            # No se guarda: sólo se necesita una vez, al perder la partida
+            posiciones = self.buscar_minas()
+        columnas = self.columnas
+        return [[indice // columnas, indice % columnas] for indice in posiciones]
+
+    def matriz_visible(self):
+        """Tablero visible como lista de filas, tal como lo esperan los clientes"""
+        return [[self.visible(i * self.columnas + j) for j in range(self.columnas)]
+                for i in range(self.filas)]
+
+
+def contar_vecinos_python(tablero, posiciones_minas):
+    """Suma 1 a los vecinos de cada mina y marca las minas (tablero inicialmente a 0)"""
+    filas, columnas = tablero.filas, tablero.columnas
+    celdas = tablero.celdas
+    for indice in posiciones_minas:
+        fila, columna = divmod(indice, columnas)
+        desde_columna = max(0, columna - 1)
+        hasta_columna = min(columnas, columna + 2)
+        for i in range(max(0, fila - 1), min(filas, fila + 2)):
+            base = i * columnas
+            for j in range(base + desde_columna, base + hasta_columna):
+                celdas[j] += 1
+
+    # Marcar las minas al final para no sumar sobre ellas
+    for indice in posiciones_minas:
+        celdas[indice] = MINA
+
+def contar_vecinos_libres_python(tablero, posiciones_libres):
+    """Vacía las casillas libres y cuenta sus minas vecinas (tablero inicialmente todo minas)"""
+    filas, columnas = tablero.filas, tablero.columnas
+    celdas = tablero.celdas
+    for indice in posiciones_libres:
+        celdas[indice] = 0
+    for indice in posiciones_libres:
+        fila, columna = divmod(indice, columnas)
+        desde_columna = max(0, columna - 1)
+        hasta_columna = min(columnas, columna + 2)
+        cuenta = 0
+        for i in range(max(0, fila - 1), min(filas, fila + 2)):
+            base = i * columnas
+            for j in range(base + desde_columna, base + hasta_columna):
+                if celdas[j] == MINA:
+                    cuenta += 1
+        celdas[indice] = cuenta
+
+def contar_vecinos_numpy(tablero, posiciones, son_minas=True):
+    """Cuenta los vecinos de todas las casillas a la vez sumando 9 desplazamientos de la máscara de minas"""
+    filas, columnas = tablero.filas, tablero.columnas
+    if son_minas:
+        mascara = numpy.zeros(filas * columnas, dtype=numpy.uint8)
+    else:
+        mascara = numpy.ones(filas * columnas, dtype=numpy.uint8)
+    mascara[numpy.array(posiciones, dtype=numpy.intp)] = 1 if son_minas else 0
+    mascara = mascara.reshape(filas, columnas)
+
+    # Con un borde de ceros cada vecino es un corte desplazado del mismo tamaño
+    ampliada = numpy.pad(mascara, 1)
+    cuenta = numpy.zeros((filas, columnas), dtype=numpy.uint8)
+    for i in range(3):
+        for j in range(3):
+            cuenta += ampliada[i:i + filas, j:j + columnas]
+
+    cuenta[mascara.astype(bool)] = MINA
+    tablero.celdas[:] = cuenta.tobytes()
+
+def dilatar(mascara):
+    """Máscara de las casillas que tienen alguna casilla de 'mascara' en su entorno 3x3"""
+    filas, columnas = mascara.shape
+    ampliada = numpy.pad(mascara, 1)
+    dilatada = numpy.zeros_like(mascara)
+    for i in range(3):
+        for j in range(3):
+            dilatada |= ampliada[i:i + filas, j:j + columnas]
+    return dilatada
+
+def extender_tramos(region, ceros):
+    """Extiende 'region' a los tramos completos de ceros de cada fila que ya toca"""
+    filas, columnas = ceros.shape
+    # Una columna de separación para que un tramo no continúe en la fila siguiente;
+    # las casillas de un mismo tramo de ceros comparten identificador
+    separados = numpy.ones((filas, columnas + 1), dtype=bool)
+    separados[:, :columnas] = ~ceros
+    tramo = numpy.cumsum(separados).reshape(filas, columnas + 1)[:, :columnas]
+    alcanzados = numpy.zeros(separados.size + 1, dtype=bool)
+    alcanzados[tramo[region]] = True
+    return ceros & alcanzados[tramo]
+
+def destapar_region_numpy(tablero, fila, columna):
+    """Destapa la región de ceros que contiene la casilla y su borde con máscaras de NumPy.
+
+    La región crece por tramos enteros de filas y de columnas y con una
+    dilatación 3x3 para los pasos en diagonal hasta que deja de cambiar, así
+    que el número de vueltas depende de los giros de la región y no de su
+    tamaño. Devuelve [fila, columna, valor] de las casillas que estaban tapadas.
+    """
+    filas, columnas = tablero.filas, tablero.columnas
+    celdas = numpy.frombuffer(tablero.celdas, dtype=numpy.uint8).reshape(filas, columnas)
+    ceros = celdas & MASCARA_VALOR == 0
+    region = numpy.zeros((filas, columnas), dtype=bool)
+    region[fila, columna] = True
+    tamano = 1
+    while True:
+        region = extender_tramos(region, ceros)
+        region = extender_tramos(region.T, ceros.T).T
+        region = dilatar(region) & ceros
+        nuevo = numpy.count_nonzero(region)
+        if nuevo == tamano:
+            break
+        tamano = nuevo
+
+    # Los vecinos de un 0 nunca son minas: se destapa el borde entero
+    indices = numpy.flatnonzero(dilatar(region) & (celdas & DESTAPADA == 0))
+    plana = celdas.reshape(-1)
+    plana[indices] |= DESTAPADA
+    valores = plana[indices] & MASCARA_VALOR
+    return numpy.column_stack((indices // columnas, indices % columnas, valores)).tolist()
+
+def generar_tablero(filas, columnas, minas, aleatorio, usar_numpy=None):
+    """Crea un TableroCompacto con las minas en posiciones sorteadas con 'aleatorio' (random.Random).
+
+    Se sortea sin reemplazo el conjunto más pequeño (las minas o las casillas
+    libres), así que el recorrido en Python es O(min(minas, libres)). Con
+    NumPy el recuento es vectorizado; el sorteo es el mismo en ambos caminos,
+    de modo que una semilla da el mismo tablero con y sin NumPy. Con menos
+    de una mina por CASILLAS_POR_MINA casillas sus posiciones quedan en
+    tablero.posiciones_minas (array de enteros de 4 bytes) para perder la
+    partida sin recorrer el tablero; con más, guardarlas costaría más
+    memoria que el propio tablero y destapar_minas no las usaría.
+    """
+    total = filas * columnas
+    if usar_numpy is None:
+        usar_numpy = numpy is not None and total >= UMBRAL_NUMPY
+    son_minas = minas <= total // 2
+    if son_minas:
+        posiciones = aleatorio.sample(range(total), minas)
+    else:
+        posiciones = aleatorio.sample(range(total), total - minas)
+
+    if usar_numpy:
+        tablero = TableroCompacto(filas, columnas)
+        contar_vecinos_numpy(tablero, posiciones, son_minas)
+    elif son_minas:
+        # Pocas minas: sumar 1 a los vecinos de cada mina
+        tablero = TableroCompacto(filas, columnas)
+        contar_vecinos_python(tablero, posiciones)
+    else:
+        # Casi todo minas: sortear las casillas libres y contar sus vecinos
+        tablero = TableroCompacto(filas, columnas, MINA)
+        contar_vecinos_libres_python(tablero, posiciones)
+
+    if minas * CASILLAS_POR_MINA <= total:
+        # Pocas minas (así que se sortearon ellas): guardarlas ordenadas
+        posiciones.sort()
+        tablero.posiciones_minas = array('I', posiciones)
+    return tablero
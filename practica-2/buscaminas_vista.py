@@ -0,0 +1,202 @@
+from collections import deque
+
+import pygame
+
+# Distancia en píxeles entre el borde de la ventana y el tablero
+MARGEN = 10
+
+# Con más rectángulos sucios que este límite se actualiza su unión de una vez
+LIMITE_RECTANGULOS = 256
+
+# Contenido de una casilla ya pedida al servidor cuyo resultado aún no se conoce
+PENDIENTE = "pendiente"
+
+# Marca en la cola de casillas sucias que pide repintar la pantalla entera
+TODO = None
+
+# Lado en píxeles de las casillas y máximo que ocupa el lado más largo del tablero
+CELDA_MINIMA = 2
+CELDA_MAXIMA = 40
+LADO_TABLERO = 800
+
+def calcular_tamano_celda(filas, columnas):
+    """Lado de casilla para que el tablero quepa en LADO_TABLERO píxeles, o 0 si haría falta menos de CELDA_MINIMA"""
+    tamano = min(CELDA_MAXIMA, LADO_TABLERO // max(filas, columnas))
+    return tamano if tamano >= CELDA_MINIMA else 0
+
+class VistaTablero:
+    """Dibujo en modo retenido del tablero de Buscaminas para los clientes y servidores Pygame.
+
+    Cada casilla se dibuja una vez y se queda en la superficie de la
+    pantalla; quien usa la vista marca las casillas que cambian (a partir de
+    los mensajes de control) y, una vez por frame, repintar() dibuja sólo esas
+    y devuelve sus rectángulos para pygame.display.update. Las líneas de la
+    barra de estado se repintan sólo cuando cambia su texto.
+
+    marcar() y marcar_todo() pueden llamarse desde otro hilo (la cola es un
+    deque), siempre después de modificar el estado: el hilo de Pygame lee el
+    estado al sacar la marca. El atributo todo sólo lo toca el hilo de Pygame.
+
+    Las casillas no se dibujan con primitivas en cada repintado: al crear la
+    vista se prepara un atlas con una superficie por tipo de casilla (tapada,
+    con bandera, vacía, mina, pendiente y cada número) y después sólo se
+    copian con blit.
+    """
+    def __init__(self, pantalla, filas, columnas, tamano_celda, colores, fuente, fuente_grande,
+                 estilo_bandera="mastil"):
+        self.pantalla = pantalla
+        self.filas = filas
+        self.columnas = columnas
+        self.tamano_celda = tamano_celda
+        self.colores = colores
+        self.fuente = fuente
+        self.fuente_grande = fuente_grande
+        self.estilo_bandera = estilo_bandera  # "mastil" (clientes) o "triangulo" (servidores)
+        self.sucias = deque()  # (fila, columna) pendientes de repintar
+        self.todo = True  # Repintar la pantalla entera en el siguiente frame
+        self.textos = {}  # Último texto dibujado en cada línea de estado
+        self.atlas = self.crear_atlas()  # Tipo de casilla -> superficie ya dibujada
+
+    def marcar(self, fila, columna):
+        """Apunta una casilla para repintarla en el siguiente frame"""
+        self.sucias.append((fila, columna))
+
+    def marcar_todo(self):
+        """Repinta la pantalla entera en el siguiente frame (p. ej. al cambiar de partida)"""
+        # Por la cola y no con self.todo = True: repintar() podría borrar la petición
+        # de otro hilo entre leer el atributo y ponerlo a False
+        self.sucias.append(TODO)
+
+    def marcar_respuestas(self, respuestas):
+        """Marca las casillas que cambian con unos mensajes de control del servidor"""
+        for respuesta in respuestas:
+            estado = respuesta.get("estado")
+            if estado in ("casilla_libre", "bandera_colocada", "bandera_retirada"):
+                self.marcar(respuesta["fila"], respuesta["columna"])
+            elif estado == "casillas_libres":
+                for fila, columna, _ in respuesta["casillas"]:
+                    self.marcar(fila, columna)
+            elif estado == "mina_pisada":
+                if "minas" in respuesta:
+                    for fila, columna in respuesta["minas"]:
+                        self.marcar(fila, columna)
+                else:
+                    self.marcar_todo()
+
+    def borrar(self):
+        """Rellena la pantalla con el fondo y olvida lo dibujado; devuelve su rectángulo"""
+        self.pantalla.fill(self.colores["fondo"])
+        self.textos.clear()
+        self.todo = True
+        return self.pantalla.get_rect()
+
+    def crear_atlas(self):
+        """Dibuja una vez cada tipo de casilla con el tamaño de celda de la vista"""
+        atlas = {}
+        for clave in ["tapada", "bandera", "vacia", "mina", PENDIENTE] + list(range(1, 9)):
+            superficie = pygame.Surface((self.tamano_celda, self.tamano_celda))
+            self.dibujar_casilla(superficie, clave)
+            # Con el formato de la pantalla el blit no tiene que convertir píxeles
+            atlas[clave] = superficie.convert()
+        return atlas
+
+    def dibujar_casilla(self, superficie, clave):
+        """Dibuja con primitivas un tipo de casilla del atlas sobre una superficie del tamaño de la celda"""
+        tamano = self.tamano_celda
+        rect = pygame.Rect(0, 0, tamano, tamano)
+
+        if clave in ("tapada", "bandera"):
+            pygame.draw.rect(superficie, self.colores["celda"], rect)
+            if clave == "bandera":
+                self.dibujar_bandera(superficie)
+        else:
+            pygame.draw.rect(superficie, self.colores["celda_visible"], rect)
+            if clave == "mina":
+                pygame.draw.circle(superficie, self.colores["mina"], (tamano // 2, tamano // 2), tamano // 3)
+            elif clave == PENDIENTE:
+                # Punto pequeño: destapada a la espera de que el servidor diga su valor
+                pygame.draw.circle(superficie, self.colores["grid"], (tamano // 2, tamano // 2), tamano // 8)
+            elif clave != "vacia":
+                # Número
+                texto = self.fuente_grande.render(str(clave), True, self.colores["texto"][clave])
+                superficie.blit(texto, (tamano // 2 - texto.get_width() // 2,
+                                        tamano // 2 - texto.get_height() // 2))
+
+        # Dibujar borde
+        pygame.draw.rect(superficie, self.colores["grid"], rect, 1)
+
+    def dibujar_bandera(self, superficie):
+        """Bandera roja en una superficie del tamaño de la celda"""
+        tamano = self.tamano_celda
+        if self.estilo_bandera == "triangulo":
+            pygame.draw.polygon(superficie, (255, 0, 0), [
+                (tamano // 4, tamano // 4),
+                (tamano // 4, tamano * 3 // 4),
+                (tamano * 3 // 4, tamano // 2)
+            ])
+            return
+        # Triángulo con mástil
+        pygame.draw.polygon(superficie, self.colores["bandera"], [
+            (tamano // 2, tamano // 4),
+            (tamano * 3 // 4, tamano // 2),
+            (tamano // 2, tamano * 3 // 4)
+        ])
+        pygame.draw.line(superficie, (0, 0, 0), (tamano // 2, tamano // 4), (tamano // 2, tamano * 3 // 4), 2)
+
+    def baldosa(self, fila, columna, contenido, bandera):
+        """(superficie del atlas, posición) de una casilla ('□', ' ' o 0, '*', PENDIENTE o un número)"""
+        if contenido == '□':
+            clave = "bandera" if bandera else "tapada"
+        elif contenido == '*':
+            clave = "mina"
+        elif contenido in (' ', 0):
+            clave = "vacia"
+        elif contenido == PENDIENTE:
+            clave = PENDIENTE
+        else:
+            clave = int(contenido)
+        return self.atlas[clave], (columna * self.tamano_celda + MARGEN, fila * self.tamano_celda + MARGEN)
+
+    def repintar(self, contenido, bandera):
+        """Dibuja las casillas marcadas y devuelve los rectángulos que hay que actualizar.
+
+        contenido(fila, columna) y bandera(fila, columna) leen el estado
+        actual; sin cambios pendientes no se dibuja nada y la lista es vacía.
+        """
+        # Sacar las marcas antes de leer el estado: las que lleguen mientras tanto quedan para el siguiente frame
+        marcas = [self.sucias.popleft() for _ in range(len(self.sucias))]
+        if self.todo or TODO in marcas:
+            rect = self.borrar()  # También olvida las líneas de estado, que se vuelven a escribir
+            self.todo = False
+            # Un solo blits para todo el tablero en lugar de un blit por casilla
+            self.pantalla.blits([self.baldosa(fila, columna, contenido(fila, columna), bandera(fila, columna))
+                                 for fila in range(self.filas) for columna in range(self.columnas)],
+                                doreturn=False)
+            return [rect]
+
+        baldosas = []
+        repintadas = set()
+        for casilla in marcas:
+            if casilla in repintadas:
+                continue
+            repintadas.add(casilla)
+            fila, columna = casilla
+            baldosas.append(self.baldosa(fila, columna, contenido(fila, columna), bandera(fila, columna)))
+        rectangulos = self.pantalla.blits(baldosas) if baldosas else []
+
+        if len(rectangulos) > LIMITE_RECTANGULOS:
+            # Una cascada grande: un solo rectángulo es más barato que miles
+            return [rectangulos[0].unionall(rectangulos[1:])]
+        return rectangulos
+
+    def dibujar_texto(self, clave, texto, posicion):
+        """Escribe una línea de la barra de estado si su texto ha cambiado; devuelve su rectángulo o None"""
+        if self.textos.get(clave) == texto:
+            return None
+        self.textos[clave] = texto
+        x, y = posicion
+        rect = pygame.Rect(x, y, self.pantalla.get_width() - x, self.fuente.get_linesize())
+        self.pantalla.fill(self.colores["fondo"], rect)
+        if texto:
+            self.pantalla.blit(self.fuente.render(texto, True, (0, 0, 0)), (x, y))
+        return rect